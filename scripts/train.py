@@ -34,6 +34,7 @@ def create_env_from_config(config: dict) -> MarketMakingEnv:
         initial_midprice=config.get('initial_midprice', 100.0),
         initial_spread=config.get('initial_spread', 0.02),
         tick_size=config.get('tick_size', 0.01),
+        fill_log=config.get('fill_log', 'list'),
         seed=config.get('seed')
     )
     
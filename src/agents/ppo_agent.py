@@ -7,13 +7,16 @@ Wraps Stable-Baselines3 PPO for market making with custom features:
 - Curriculum learning support
 """
 
+import copy
 import numpy as np
-from typing import Optional, Dict, Any, Callable
+from typing import Optional, Dict, Any, Callable, List, Union
+import gymnasium as gym
 import torch
 import torch.nn as nn
 from stable_baselines3 import PPO
 from stable_baselines3.common.policies import ActorCriticPolicy
 from stable_baselines3.common.callbacks import BaseCallback
+from stable_baselines3.common.vec_env import VecEnv
 
 
 class MarketMakingPolicy(ActorCriticPolicy):
@@ -34,6 +37,115 @@ class MarketMakingPolicy(ActorCriticPolicy):
         super().__init__(*args, **kwargs)
 
 
+class VectorEnvAdapter(VecEnv):
+    """
+    Expose a gymnasium VectorEnv with SAME_STEP autoreset (such as
+    VectorMarketMakingEnv) as a Stable-Baselines3 VecEnv.
+    
+    Gymnasium's dict-of-arrays infos are split into SB3's per-env info
+    dicts, with `terminal_observation` and `TimeLimit.truncated` set for
+    envs that finished this step.
+    
+    The envs of a VectorEnv are not separate objects, so attributes and
+    methods are the venv's own: attributes holding one entry per env (a
+    list or array of length num_envs) are read and written per env, other
+    attributes and all methods only for every env at once.
+    """
+    
+    def __init__(self, venv: gym.vector.VectorEnv):
+        self.venv = venv
+        self._actions = None
+        super().__init__(venv.num_envs, venv.single_observation_space, venv.single_action_space)
+        
+        # Seeds and options for the next reset, set through seed() / set_options()
+        self._next_seeds: Optional[List[int]] = None
+        self._next_options: Optional[Dict[str, Any]] = None
+    
+    def _split_infos(self, infos: Dict[str, Any]) -> List[Dict[str, Any]]:
+        keys = [key for key in infos
+                if not key.startswith('_') and key not in ('final_obs', 'final_info')]
+        return [{key: infos[key][i] for key in keys} for i in range(self.num_envs)]
+    
+    def _check_all_envs(self, indices: List[int], what: str):
+        if sorted(indices) != list(range(self.num_envs)):
+            raise NotImplementedError(
+                f"{what} applies to the whole VectorEnv and can't target envs {indices}"
+            )
+    
+    def _is_per_env(self, value: Any) -> bool:
+        return isinstance(value, (list, np.ndarray)) and len(value) == self.num_envs
+    
+    def seed(self, seed: Optional[int] = None) -> List[int]:
+        """Seed env i's next reset with `seed + i`, as SB3 VecEnvs do."""
+        if seed is None:
+            seed = int(np.random.randint(0, np.iinfo(np.uint32).max, dtype=np.uint32))
+        self._next_seeds = [seed + i for i in range(self.num_envs)]
+        return list(self._next_seeds)
+    
+    def set_options(self, options: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None):
+        """Pass `options` to the next reset; a VectorEnv takes one dict for all envs."""
+        if isinstance(options, (list, tuple)):
+            if any(env_options != options[0] for env_options in options):
+                raise ValueError("A VectorEnv takes one options dict for all envs")
+            options = options[0] if options else None
+        self._next_options = copy.deepcopy(options) or None
+    
+    def reset(self) -> np.ndarray:
+        # Seeds and options set through seed() / set_options() apply to this reset only
+        observations, infos = self.venv.reset(seed=self._next_seeds, options=self._next_options)
+        self.reset_infos = self._split_infos(infos)
+        self._next_seeds = None
+        self._next_options = None
+        return observations
+    
+    def step_async(self, actions: np.ndarray):
+        self._actions = actions
+    
+    def step_wait(self):
+        observations, rewards, terminations, truncations, infos = self.venv.step(self._actions)
+        dones = terminations | truncations
+        
+        info_list = self._split_infos(infos)
+        for i in np.flatnonzero(dones).tolist():
+            info_list[i] = dict(infos['final_info'][i])
+            info_list[i]['terminal_observation'] = infos['final_obs'][i]
+            info_list[i]['TimeLimit.truncated'] = bool(truncations[i] and not terminations[i])
+        
+        return observations, rewards.astype(np.float32), dones, info_list
+    
+    def close(self):
+        self.venv.close()
+    
+    def get_attr(self, attr_name: str, indices=None) -> List[Any]:
+        """Per-env entries of a per-env attribute, else the venv-wide value for each env."""
+        value = getattr(self.venv, attr_name)
+        indices = list(self._get_indices(indices))
+        if self._is_per_env(value):
+            return [value[i] for i in indices]
+        return [value for _ in indices]
+    
+    def set_attr(self, attr_name: str, value: Any, indices=None):
+        """Set the selected envs' entries of a per-env attribute, else the venv attribute."""
+        indices = list(self._get_indices(indices))
+        current = getattr(self.venv, attr_name, None)
+        if self._is_per_env(current):
+            for i in indices:
+                current[i] = value
+            return
+        self._check_all_envs(indices, f"set_attr({attr_name!r})")
+        setattr(self.venv, attr_name, value)
+    
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> List[Any]:
+        """Call a venv method once, for all envs; its result is reported for each env."""
+        indices = list(self._get_indices(indices))
+        self._check_all_envs(indices, f"env_method({method_name!r})")
+        result = getattr(self.venv, method_name)(*method_args, **method_kwargs)
+        return [result for _ in indices]
+    
+    def env_is_wrapped(self, wrapper_class, indices=None) -> List[bool]:
+        return [False for _ in self._get_indices(indices)]
+
+
 class PPOMarketMaker:
     """
     PPO-based market making agent with training utilities.
@@ -62,7 +174,8 @@ class PPOMarketMaker:
         Initialize PPO market maker.
         
         Args:
-            env: Gymnasium environment
+            env: Gymnasium environment, SB3 VecEnv, or gymnasium VectorEnv
+                (wrapped in a VectorEnvAdapter)
             learning_rate: Learning rate
             n_steps: Number of steps to collect per update
             batch_size: Minibatch size
@@ -77,6 +190,8 @@ class PPOMarketMaker:
             verbose: Verbosity level
             device: Device to use ('cpu', 'cuda', or 'auto')
         """
+        if isinstance(env, gym.vector.VectorEnv):
+            env = VectorEnvAdapter(env)
         self.env = env
         
         # Create PPO model
@@ -182,6 +297,8 @@ class CurriculumCallback(BaseCallback):
         self.initial_vol = initial_vol
         self.target_vol = target_vol
         self.vol_increase_steps = vol_increase_steps
+        self._applied_vol = None
+        self._supported = None
     
     def _on_step(self) -> bool:
         """Called at each step."""
@@ -189,12 +306,13 @@ class CurriculumCallback(BaseCallback):
         progress = min(1.0, self.num_timesteps / self.vol_increase_steps)
         current_vol = self.initial_vol + (self.target_vol - self.initial_vol) * progress
         
-        # Update environment volatility (if supported)
-        if hasattr(self.training_env, 'envs'):
-            for env in self.training_env.envs:
-                if hasattr(env.unwrapped, 'simulator'):
-                    # Update order flow volatility
-                    env.unwrapped.simulator.order_flow.vol_regime.base_vol = current_vol
+        # Update environment volatility (if supported); every SB3 VecEnv
+        # (subprocess ones and VectorEnvAdapter included) forwards the call to its envs
+        if self._supported is None:
+            self._supported = self.training_env.has_attr('set_market_params')
+        if self._supported and current_vol != self._applied_vol:
+            self.training_env.env_method('set_market_params', base_volatility=current_vol)
+            self._applied_vol = current_vol
         
         if self.verbose > 0 and self.num_timesteps % 10000 == 0:
             print(f"Curriculum: volatility = {current_vol:.4f}")
@@ -1,7 +1,24 @@
 """
 Custom Gymnasium environments for market making.
+
+The vector environments need gymnasium>=1.1 (SAME_STEP autoreset) and are
+imported on first use, so MarketMakingEnv works on older gymnasium.
 """
 
+import importlib
+
 from .market_making_env import MarketMakingEnv, MarketMakingConfig
 
-__all__ = ['MarketMakingEnv', 'MarketMakingConfig']
+_VECTOR_ENVS = {
+    'VectorMarketMakingEnv': '.vector_market_making_env',
+    'SharedMemoryVectorEnv': '.shared_memory_vector_env'
+}
+
+
+def __getattr__(name):
+    if name in _VECTOR_ENVS:
+        return getattr(importlib.import_module(_VECTOR_ENVS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['MarketMakingEnv', 'MarketMakingConfig', 'VectorMarketMakingEnv', 'SharedMemoryVectorEnv']
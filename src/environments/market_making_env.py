@@ -59,6 +59,51 @@ class MarketMakingConfig:
     # Impact model
     enable_impact: bool = True
     impact_decay_rate: float = 0.5
+    
+    # Quoting: keep resting quotes whose target tick and size are unchanged,
+    # amend the rest in place, and price off the book without our own quotes
+    requote_on_change: bool = False
+
+
+def requote(
+    simulator: MarketSimulator,
+    mm_id: str,
+    order_id: Optional[int],
+    side: OrderSide,
+    price: float,
+    size: int,
+    last_target: Optional[Tuple[int, int]]
+) -> Tuple[int, Tuple[int, int]]:
+    """
+    Move a quote to (price, size), touching the book only when the target changes.
+    
+    A resting quote with an unchanged (tick, size) target is left alone, so it
+    keeps its queue position; a changed one is amended with modify_mm_order.
+    A quote that is no longer resting (filled, or in flight under latency) is
+    cancelled if still possible and replaced.
+    
+    Args:
+        simulator: Market simulator the quote lives in
+        mm_id: Market maker ID
+        order_id: Current quote's order ID (None if there is none)
+        side: Quote side
+        price: Target price
+        size: Target size
+        last_target: (tick, size) target the current quote was placed for
+    
+    Returns:
+        (order ID of the quote, its (tick, size) target)
+    """
+    target = (simulator.lob.to_ticks(price), size)
+    if order_id is not None:
+        if order_id in simulator.lob.orders:
+            if target == last_target:
+                return order_id, target
+            amended_id = simulator.modify_mm_order(mm_id, order_id, new_size=size, new_price=price)
+            if amended_id is not None:
+                return amended_id, target
+        simulator.cancel_mm_order(mm_id, order_id)
+    return simulator.submit_mm_order(mm_id, side, price, size), target
 
 
 class MarketMakingEnv(gym.Env):
@@ -127,9 +172,11 @@ class MarketMakingEnv(gym.Env):
             dtype=np.float32
         )
         
-        # Active orders
+        # Active orders and the (tick, size) targets they were placed for
         self.active_bid_id = None
         self.active_ask_id = None
+        self.bid_target = None
+        self.ask_target = None
         
         # Previous state for reward calculation
         self.prev_pnl = 0.0
@@ -140,11 +187,18 @@ class MarketMakingEnv(gym.Env):
         seed: Optional[int] = None,
         options: Optional[Dict[str, Any]] = None
     ) -> Tuple[np.ndarray, Dict[str, Any]]:
-        """Reset the environment to initial state."""
+        """
+        Reset the environment to initial state.
+        
+        Args:
+            seed: If given, reseeds the simulator's order flow as well as
+                `np_random`, so equal seeds replay the same episode
+            options: Unused
+        """
         super().reset(seed=seed)
         
         # Reset simulator
-        self.simulator.reset()
+        self.simulator.reset(seed)
         self.simulator.register_market_maker(self.mm_id, self.config.initial_cash)
         
         # Reset tracking
@@ -153,6 +207,8 @@ class MarketMakingEnv(gym.Env):
         self.episode_inventory = []
         self.active_bid_id = None
         self.active_ask_id = None
+        self.bid_target = None
+        self.ask_target = None
         self.prev_pnl = 0.0
         self.prev_inventory = 0
         
@@ -177,19 +233,25 @@ class MarketMakingEnv(gym.Env):
         """
         # Parse action
         bid_offset_ticks, ask_offset_ticks, bid_size, ask_size = action
+        requote_on_change = self.config.requote_on_change
         
-        # Cancel existing orders
-        if self.active_bid_id is not None:
+        # Cancel existing orders (unless they are only amended below)
+        if self.active_bid_id is not None and not requote_on_change:
             self.simulator.cancel_mm_order(self.mm_id, self.active_bid_id)
             self.active_bid_id = None
         
-        if self.active_ask_id is not None:
+        if self.active_ask_id is not None and not requote_on_change:
             self.simulator.cancel_mm_order(self.mm_id, self.active_ask_id)
             self.active_ask_id = None
         
         # Get current market state
         market_state = self.simulator.get_market_state()
         midprice = market_state.midprice
+        if requote_on_change:
+            # Our own resting quotes must not move the price we quote around
+            midprice = self.simulator.lob.get_midprice_excluding(
+                [self.active_bid_id, self.active_ask_id]
+            ) or midprice
         tick_size = self.simulator.lob.tick_size
         
         # Place new orders
@@ -200,12 +262,22 @@ class MarketMakingEnv(gym.Env):
         ask_size = int(np.clip(ask_size, self.config.min_quote_size, self.config.max_quote_size))
         
         # Submit orders
-        self.active_bid_id = self.simulator.submit_mm_order(
-            self.mm_id, OrderSide.BUY, bid_price, bid_size
-        )
-        self.active_ask_id = self.simulator.submit_mm_order(
-            self.mm_id, OrderSide.SELL, ask_price, ask_size
-        )
+        if requote_on_change:
+            self.active_bid_id, self.bid_target = requote(
+                self.simulator, self.mm_id, self.active_bid_id,
+                OrderSide.BUY, bid_price, bid_size, self.bid_target
+            )
+            self.active_ask_id, self.ask_target = requote(
+                self.simulator, self.mm_id, self.active_ask_id,
+                OrderSide.SELL, ask_price, ask_size, self.ask_target
+            )
+        else:
+            self.active_bid_id = self.simulator.submit_mm_order(
+                self.mm_id, OrderSide.BUY, bid_price, bid_size
+            )
+            self.active_ask_id = self.simulator.submit_mm_order(
+                self.mm_id, OrderSide.SELL, ask_price, ask_size
+            )
         
         # Simulate market for one time step
         fills = self.simulator.step(self.config.time_step)
@@ -369,6 +441,10 @@ class MarketMakingEnv(gym.Env):
         
         return info
     
+    def set_market_params(self, **params):
+        """Update market parameters; see MarketSimulator.set_market_params."""
+        self.simulator.set_market_params(**params)
+    
     def render(self):
         """Render the environment (optional)."""
         if self.render_mode == "human":
@@ -0,0 +1,354 @@
+"""
+Subprocess Market Making Vector Environment over Shared Memory
+
+Scales VectorMarketMakingEnv past one core. Each worker process steps a
+contiguous slice of the envs as its own VectorMarketMakingEnv; actions,
+observations, rewards, done flags and infos live in one
+`multiprocessing.shared_memory` segment that parent and workers map as NumPy
+arrays. A step is:
+1. the parent writes actions and a command code, then releases each
+   worker's start semaphore
+2. workers read their action rows in place, step, write their result rows
+   in place, and release a shared done semaphore the parent waits on
+No per-step data is pickled or sent through pipes.
+
+Parameter updates (e.g. from CurriculumCallback) go through the same
+segment: `set_market_params` writes the values and bumps a version counter,
+and workers apply a new version before their next step or reset.
+"""
+
+import multiprocessing as mp
+import time
+import traceback
+from multiprocessing import shared_memory
+
+import gymnasium as gym
+from gymnasium.vector import AutoresetMode
+from gymnasium.vector.utils import batch_space
+import numpy as np
+from typing import Optional, Dict, Tuple, Any, List, Union
+
+from .market_making_env import MarketMakingConfig
+from .vector_market_making_env import VectorMarketMakingEnv
+from ..simulation.market_simulator import SimulationConfig
+from ..simulation.parallel_runner import spawn_seeds
+
+
+# Info fields carried in shared memory, in column order
+INFO_FIELDS = ('step', 'time', 'midprice', 'spread', 'volatility', 'imbalance',
+               'num_trades', 'total_volume', 'inventory', 'pnl', 'total_impact')
+INT_INFO_FIELDS = ('step', 'num_trades', 'total_volume', 'inventory')
+
+# Parameters settable across processes (see MarketSimulator.set_market_params)
+MARKET_PARAMS = ('base_volatility', 'high_vol_multiplier')
+
+_STEP, _RESET, _CLOSE = 1, 2, 3
+
+
+def _buffer_specs(num_envs: int) -> Dict[str, Tuple[Tuple[int, ...], type]]:
+    """Shapes and dtypes of every array in the shared segment."""
+    return {
+        'actions': ((num_envs, 4), np.float64),
+        'observations': ((num_envs, 9), np.float32),
+        'rewards': ((num_envs,), np.float64),
+        'terminations': ((num_envs,), np.bool_),
+        'truncations': ((num_envs,), np.bool_),
+        'infos': ((num_envs, len(INFO_FIELDS)), np.float64),
+        'final_observations': ((num_envs, 9), np.float32),
+        'final_infos': ((num_envs, len(INFO_FIELDS)), np.float64),
+        'seeds': ((num_envs,), np.uint64),
+        'reseed': ((num_envs,), np.bool_),
+        'command': ((1,), np.int64),
+        'failed': ((1,), np.bool_),
+        'params': ((len(MARKET_PARAMS),), np.float64),
+        'param_version': ((1,), np.int64)
+    }
+
+
+def _map_buffers(shm: shared_memory.SharedMemory, num_envs: int) -> Dict[str, np.ndarray]:
+    """NumPy views of every array in a shared segment (8-byte aligned)."""
+    arrays = {}
+    offset = 0
+    for name, (shape, dtype) in _buffer_specs(num_envs).items():
+        count = int(np.prod(shape))
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+        offset += -(-count * np.dtype(dtype).itemsize // 8) * 8
+    return arrays
+
+
+def _segment_size(num_envs: int) -> int:
+    return sum(-(-int(np.prod(shape)) * np.dtype(dtype).itemsize // 8) * 8
+               for shape, dtype in _buffer_specs(num_envs).values())
+
+
+def _write_infos(target: np.ndarray, infos: Dict[str, Any], rows: slice):
+    for column, name in enumerate(INFO_FIELDS):
+        if name in infos:
+            target[rows, column] = infos[name]
+
+
+def _worker(
+    shm_name: str,
+    num_envs: int,
+    start: int,
+    stop: int,
+    config: MarketMakingConfig,
+    seeds: List[int],
+    start_semaphore,
+    done_semaphore,
+    errors
+):
+    """Step envs [start, stop) in place in the shared segment until closed."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    buffers = None
+    try:
+        buffers = _map_buffers(shm, num_envs)
+        env = VectorMarketMakingEnv(stop - start, config, seeds=seeds)
+        rows = slice(start, stop)
+        param_version = 0
+        
+        while True:
+            start_semaphore.acquire()
+            command = int(buffers['command'][0])
+            if command == _CLOSE:
+                break
+            
+            if buffers['param_version'][0] != param_version:
+                param_version = int(buffers['param_version'][0])
+                env.set_market_params(**{
+                    name: float(value) for name, value in zip(MARKET_PARAMS, buffers['params'])
+                    if not np.isnan(value)
+                })
+            
+            if command == _RESET:
+                seeds = [int(seed) if reseed else None
+                         for seed, reseed in zip(buffers['seeds'][rows], buffers['reseed'][rows])]
+                observations, infos = env.reset(seed=seeds)
+                buffers['terminations'][rows] = False
+                buffers['truncations'][rows] = False
+            else:
+                observations, rewards, terminations, truncations, infos = env.step(buffers['actions'][rows])
+                buffers['rewards'][rows] = rewards
+                buffers['terminations'][rows] = terminations
+                buffers['truncations'][rows] = truncations
+                for i in np.flatnonzero(terminations | truncations).tolist():
+                    buffers['final_observations'][start + i] = infos['final_obs'][i]
+                    _write_infos(buffers['final_infos'], infos['final_info'][i], start + i)
+            buffers['observations'][rows] = observations
+            _write_infos(buffers['infos'], infos, rows)
+            
+            done_semaphore.release()
+    except Exception:
+        errors.put(traceback.format_exc())
+        if buffers is not None:
+            buffers['failed'][0] = True
+        done_semaphore.release()
+    finally:
+        buffers = None  # Views must be released before the mapping is closed
+        shm.close()
+
+
+class SharedMemoryVectorEnv(gym.vector.VectorEnv):
+    """
+    N market making envs stepped across worker processes.
+    
+    Envs are split into `num_workers` contiguous slices, and env i is seeded
+    with the i-th spawned seed however the envs are split, so trajectories
+    match a VectorMarketMakingEnv with the same config. Autoreset is
+    SAME_STEP, as in VectorMarketMakingEnv.
+    
+    A worker that raises stops the env with a RuntimeError carrying its
+    traceback. One that dies outright (e.g. killed by the OOM killer) is
+    detected after `timeout` seconds without a reply.
+    """
+    
+    metadata = {'render_modes': [], 'autoreset_mode': AutoresetMode.SAME_STEP}
+    
+    def __init__(
+        self,
+        num_envs: int,
+        config: Optional[MarketMakingConfig] = None,
+        num_workers: Optional[int] = None,
+        context: Optional[str] = None,
+        timeout: Optional[float] = 60.0
+    ):
+        if num_envs <= 0:
+            raise ValueError(f"num_envs must be positive, got {num_envs}")
+        num_workers = min(num_envs, num_workers or mp.cpu_count())
+        
+        self.num_envs = num_envs
+        self.config = config or MarketMakingConfig()
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self.closed = False
+        
+        # Spaces are built from the config alone; workers own the simulators
+        observation_space, action_space = VectorMarketMakingEnv.single_spaces(self.config)
+        self.single_observation_space = observation_space
+        self.single_action_space = action_space
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        self._has_impact = self.config.enable_impact
+        
+        self._shm = shared_memory.SharedMemory(create=True, size=_segment_size(num_envs))
+        self._buffers = _map_buffers(self._shm, num_envs)
+        self._buffers['params'][:] = np.nan
+        self._buffers['param_version'][0] = 0
+        self._buffers['failed'][0] = False
+        
+        sim_config = self.config.simulation_config or SimulationConfig()
+        seeds = spawn_seeds(num_envs, sim_config.seed)
+        bounds = np.linspace(0, num_envs, num_workers + 1).astype(int)
+        
+        ctx = mp.get_context(context)
+        # Semaphores rather than a Barrier: a Barrier party that dies while
+        # waiting can block the others with no timeout
+        self._start_semaphores = [ctx.Semaphore(0) for _ in range(num_workers)]
+        self._done_semaphore = ctx.Semaphore(0)
+        self._errors = ctx.SimpleQueue()
+        self._processes = []
+        for start, stop, start_semaphore in zip(bounds[:-1].tolist(), bounds[1:].tolist(),
+                                                self._start_semaphores):
+            process = ctx.Process(
+                target=_worker,
+                args=(self._shm.name, num_envs, start, stop, self.config, seeds[start:stop],
+                      start_semaphore, self._done_semaphore, self._errors),
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+    
+    def _run(self, command: int):
+        """Have every worker execute `command` and wait for them to finish."""
+        self._buffers['command'][0] = command
+        for semaphore in self._start_semaphores:
+            semaphore.release()
+        if command == _CLOSE:
+            return
+        
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        replied = 0
+        while replied < self.num_workers:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not self._done_semaphore.acquire(True, remaining):
+                break
+            replied += 1
+        if replied == self.num_workers and not self._buffers['failed'][0]:
+            return
+        
+        # A worker that raised reports its traceback; one that was killed can't
+        dead = [f"worker {i} exited with code {process.exitcode}"
+                for i, process in enumerate(self._processes) if not process.is_alive()]
+        if not self._errors.empty():
+            message = self._errors.get()
+        elif dead:
+            message = "\n".join(dead)
+        else:
+            message = f"no reply within {self.timeout}s"
+        self.close()
+        raise RuntimeError(f"SharedMemoryVectorEnv worker failed:\n{message}")
+    
+    def _read_infos(self, source: np.ndarray) -> Dict[str, Any]:
+        infos = {}
+        for column, name in enumerate(INFO_FIELDS):
+            if name == 'total_impact' and not self._has_impact:
+                continue
+            values = source[:, column].copy()
+            infos[name] = values.astype(np.int64) if name in INT_INFO_FIELDS else values
+        mask = np.ones(self.num_envs, dtype=np.bool_)
+        infos.update({f'_{key}': mask for key in list(infos)})
+        return infos
+    
+    def reset(
+        self,
+        seed: Optional[Union[int, List[int]]] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Reset every env to its initial state.
+        
+        Args:
+            seed: Root seed or per-env seeds, as for VectorMarketMakingEnv.reset
+            options: Unused
+        """
+        if seed is None:
+            seeds = [None] * self.num_envs
+        elif isinstance(seed, (list, tuple, np.ndarray)):
+            if len(seed) != self.num_envs:
+                raise ValueError(f"Expected {self.num_envs} seeds, got {len(seed)}")
+            seeds = list(seed)
+        else:
+            seeds = spawn_seeds(self.num_envs, seed)
+        super().reset(seed=seeds[0])
+        
+        self._buffers['reseed'][:] = [s is not None for s in seeds]
+        self._buffers['seeds'][:] = [0 if s is None else int(s) for s in seeds]
+        self._run(_RESET)
+        return self._buffers['observations'].copy(), self._read_infos(self._buffers['infos'])
+    
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        Execute one time step in every env.
+        
+        Args:
+            actions: (N, 4) array of [bid_offset_ticks, ask_offset_ticks, bid_size, ask_size]
+        
+        Returns:
+            (observations, rewards, terminations, truncations, infos)
+        """
+        self._buffers['actions'][:] = np.asarray(actions, dtype=np.float64).reshape(self.num_envs, 4)
+        self._run(_STEP)
+        
+        buffers = self._buffers
+        terminations = buffers['terminations'].copy()
+        truncations = buffers['truncations'].copy()
+        infos = self._read_infos(buffers['infos'])
+        
+        done = terminations | truncations
+        if done.any():
+            final_infos = self._read_infos(buffers['final_infos'])
+            final_obs = np.empty(self.num_envs, dtype=object)
+            final_info = np.empty(self.num_envs, dtype=object)
+            for i in np.flatnonzero(done).tolist():
+                final_obs[i] = buffers['final_observations'][i].copy()
+                final_info[i] = {key: value[i] for key, value in final_infos.items()
+                                 if not key.startswith('_')}
+            infos.update(final_obs=final_obs, _final_obs=done,
+                         final_info=final_info, _final_info=done)
+        
+        return buffers['observations'].copy(), buffers['rewards'].copy(), terminations, truncations, infos
+    
+    def set_market_params(self, **params):
+        """
+        Update every env's market parameters in the worker processes.
+        
+        Takes the keyword arguments of MarketSimulator.set_market_params;
+        workers apply them before their next step or reset.
+        """
+        unknown = set(params) - set(MARKET_PARAMS)
+        if unknown:
+            raise ValueError(f"Unknown market parameters: {sorted(unknown)}")
+        
+        values = self._buffers['params']
+        updated = values.copy()
+        for name, value in params.items():
+            if value is not None:
+                updated[MARKET_PARAMS.index(name)] = value
+        if not np.array_equal(updated, values, equal_nan=True):
+            values[:] = updated
+            self._buffers['param_version'][0] += 1
+    
+    def close_extras(self, **kwargs):
+        """Stop the workers and release the shared segment."""
+        if self.closed:
+            return
+        self.closed = True
+        if all(process.is_alive() for process in self._processes) and not self._buffers['failed'][0]:
+            self._run(_CLOSE)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._buffers = None
+        self._shm.close()
+        self._shm.unlink()
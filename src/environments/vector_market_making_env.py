@@ -0,0 +1,357 @@
+"""
+Vectorized Market Making Environment
+
+Steps N independent MarketMakingEnv-equivalent markets in one process behind
+the gymnasium VectorEnv API. Book matching is inherently per market, but
+everything around it is batched:
+- actions arrive as one (N, 4) array and are clipped and scaled together
+- each simulator steps through the columnar `step_batch` path, so no Fill
+  objects are built
+- market and MM state are read once per env per step into arrays, and
+  rewards, terminations and observations are computed over all N at once
+
+Observations, rewards and termination rules match MarketMakingEnv.
+"""
+
+import gymnasium as gym
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode
+from gymnasium.vector.utils import batch_space
+import numpy as np
+from dataclasses import replace
+from typing import Optional, Dict, Tuple, Any, List, Sequence, Union
+
+from .market_making_env import MarketMakingConfig, requote
+from ..simulation.market_simulator import MarketSimulator, SimulationConfig
+from ..simulation.order_book import OrderSide
+from ..simulation.parallel_runner import spawn_seeds
+from ..impact.impact_models import AlmgrenChrissImpact, ImpactTracker, AlmgrenChrissParameters
+
+
+class VectorMarketMakingEnv(gym.vector.VectorEnv):
+    """
+    N market making environments stepped together in one process.
+    
+    Each env owns a MarketSimulator seeded from its own SeedSequence child of
+    the simulation config seed, unless `seeds` are given. Finished envs are reset within the same step
+    (SAME_STEP autoreset): the returned observation is the reset one and the
+    final observation is in `infos['final_obs']`.
+    """
+    
+    metadata = {'render_modes': [], 'autoreset_mode': AutoresetMode.SAME_STEP}
+    
+    def __init__(
+        self,
+        num_envs: int,
+        config: Optional[MarketMakingConfig] = None,
+        seeds: Optional[Sequence[int]] = None
+    ):
+        if num_envs <= 0:
+            raise ValueError(f"num_envs must be positive, got {num_envs}")
+        if seeds is not None and len(seeds) != num_envs:
+            raise ValueError(f"Expected {num_envs} seeds, got {len(seeds)}")
+        
+        self.num_envs = num_envs
+        self.config = config or MarketMakingConfig()
+        self.mm_id = "rl_agent"
+        
+        # One simulator per env, each on an independent seed
+        sim_config = self.config.simulation_config or SimulationConfig()
+        if seeds is None:
+            seeds = spawn_seeds(num_envs, sim_config.seed)
+        self.simulators: List[MarketSimulator] = [
+            MarketSimulator(replace(sim_config, seed=seed)) for seed in seeds
+        ]
+        for simulator in self.simulators:
+            simulator.register_market_maker(self.mm_id, self.config.initial_cash)
+        self.tick_size = sim_config.tick_size
+        
+        if self.config.enable_impact:
+            self.impact_trackers = [
+                ImpactTracker(AlmgrenChrissImpact(AlmgrenChrissParameters()),
+                              decay_rate=self.config.impact_decay_rate)
+                for _ in range(num_envs)
+            ]
+        else:
+            self.impact_trackers = None
+        
+        self.max_steps = int(self.config.episode_duration / self.config.time_step)
+        
+        self.single_observation_space, self.single_action_space = self.single_spaces(self.config)
+        self.observation_space = batch_space(self.single_observation_space, num_envs)
+        self.action_space = batch_space(self.single_action_space, num_envs)
+        
+        # Per-env episode state; -1 marks no resting quote
+        self.current_step = np.zeros(num_envs, dtype=np.int64)
+        self.active_bid_ids = np.full(num_envs, -1, dtype=np.int64)
+        self.active_ask_ids = np.full(num_envs, -1, dtype=np.int64)
+        self.bid_targets: List[Optional[Tuple[int, int]]] = [None] * num_envs
+        self.ask_targets: List[Optional[Tuple[int, int]]] = [None] * num_envs
+        self.prev_pnl = np.zeros(num_envs)
+        self.prev_inventory = np.zeros(num_envs, dtype=np.int64)
+    
+    @staticmethod
+    def single_spaces(config: MarketMakingConfig) -> Tuple[spaces.Box, spaces.Box]:
+        """
+        Observation and action space of one env under `config`.
+        
+        These are the same spaces as MarketMakingEnv's; building them needs
+        no simulator.
+        
+        Returns:
+            (single_observation_space, single_action_space)
+        """
+        observation_space = spaces.Box(
+            low=np.array([0, 0, -config.max_inventory, 0, -1, 0, 0, -np.inf, 0]),
+            high=np.array([np.inf, np.inf, config.max_inventory, np.inf, 1, 1, 1, np.inf, np.inf]),
+            dtype=np.float32
+        )
+        action_space = spaces.Box(
+            low=np.array([0, 0, config.min_quote_size, config.min_quote_size]),
+            high=np.array([
+                config.max_spread_offset_ticks,
+                config.max_spread_offset_ticks,
+                config.max_quote_size,
+                config.max_quote_size
+            ]),
+            dtype=np.float32
+        )
+        return observation_space, action_space
+    
+    def reset(
+        self,
+        seed: Optional[Union[int, List[int]]] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Reset every env to its initial state.
+        
+        Args:
+            seed: Root seed the per-env seeds are spawned from (as for the
+                simulation config seed), or one seed per env. Envs keep
+                their current random streams if None.
+            options: Unused
+        """
+        if seed is None:
+            seeds = [None] * self.num_envs
+        elif isinstance(seed, (list, tuple, np.ndarray)):
+            if len(seed) != self.num_envs:
+                raise ValueError(f"Expected {self.num_envs} seeds, got {len(seed)}")
+            seeds = [None if s is None else int(s) for s in seed]
+        else:
+            seeds = spawn_seeds(self.num_envs, seed)
+        super().reset(seed=seeds[0])
+        for i in range(self.num_envs):
+            self._reset_env(i, seeds[i])
+        state = self._snapshot()
+        return self._get_observations(state), self._get_infos(state)
+    
+    def _reset_env(self, i: int, seed: Optional[int] = None):
+        """Reset env `i` (used by reset and autoreset), reseeding it if `seed` is given."""
+        simulator = self.simulators[i]
+        simulator.reset(seed)
+        simulator.register_market_maker(self.mm_id, self.config.initial_cash)
+        
+        self.current_step[i] = 0
+        self.active_bid_ids[i] = -1
+        self.active_ask_ids[i] = -1
+        self.bid_targets[i] = None
+        self.ask_targets[i] = None
+        self.prev_pnl[i] = 0.0
+        self.prev_inventory[i] = 0
+        
+        if self.impact_trackers:
+            self.impact_trackers[i].reset()
+    
+    def step(self, actions: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        Execute one time step in every env.
+        
+        Args:
+            actions: (N, 4) array of [bid_offset_ticks, ask_offset_ticks, bid_size, ask_size]
+        
+        Returns:
+            (observations, rewards, terminations, truncations, infos)
+        """
+        actions = np.asarray(actions, dtype=np.float64).reshape(self.num_envs, 4)
+        bid_offsets = (actions[:, 0] * self.tick_size).tolist()
+        ask_offsets = (actions[:, 1] * self.tick_size).tolist()
+        sizes = np.clip(actions[:, 2:], self.config.min_quote_size,
+                        self.config.max_quote_size).astype(np.int64)
+        bid_sizes, ask_sizes = sizes[:, 0].tolist(), sizes[:, 1].tolist()
+        
+        mm_id = self.mm_id
+        time_step = self.config.time_step
+        for i, simulator in enumerate(self.simulators):
+            if self.config.requote_on_change:
+                # Keep or amend resting quotes, pricing off the book without them
+                bid_id = int(self.active_bid_ids[i]) if self.active_bid_ids[i] >= 0 else None
+                ask_id = int(self.active_ask_ids[i]) if self.active_ask_ids[i] >= 0 else None
+                midprice = (simulator.lob.get_midprice_excluding([bid_id, ask_id])
+                            or simulator.lob.get_midprice() or simulator.config.initial_midprice)
+                bid_id, self.bid_targets[i] = requote(
+                    simulator, mm_id, bid_id, OrderSide.BUY,
+                    midprice - bid_offsets[i], bid_sizes[i], self.bid_targets[i]
+                )
+                ask_id, self.ask_targets[i] = requote(
+                    simulator, mm_id, ask_id, OrderSide.SELL,
+                    midprice + ask_offsets[i], ask_sizes[i], self.ask_targets[i]
+                )
+            else:
+                # Cancel existing quotes, then quote around the midprice they leave
+                if self.active_bid_ids[i] >= 0:
+                    simulator.cancel_mm_order(mm_id, int(self.active_bid_ids[i]))
+                if self.active_ask_ids[i] >= 0:
+                    simulator.cancel_mm_order(mm_id, int(self.active_ask_ids[i]))
+                midprice = simulator.lob.get_midprice() or simulator.config.initial_midprice
+                bid_id = simulator.submit_mm_order(mm_id, OrderSide.BUY, midprice - bid_offsets[i], bid_sizes[i])
+                ask_id = simulator.submit_mm_order(mm_id, OrderSide.SELL, midprice + ask_offsets[i], ask_sizes[i])
+            self.active_bid_ids[i] = bid_id
+            self.active_ask_ids[i] = ask_id
+            
+            result = simulator.step_batch(time_step)
+            
+            if self.impact_trackers and len(result):
+                fills = result.fills
+                ours = fills[(fills['passive_order_id'] == bid_id) | (fills['passive_order_id'] == ask_id)]
+                for price, size, is_buy in zip(ours['price'].tolist(), ours['size'].tolist(),
+                                               ours['is_buy'].tolist()):
+                    self.impact_trackers[i].add_trade(
+                        timestamp=simulator.current_time,
+                        volume=size if is_buy else -size,
+                        midprice=price
+                    )
+        
+        state = self._snapshot()
+        rewards = self._calculate_rewards(state)
+        self.current_step += 1
+        terminations = self._check_terminations(state)
+        truncations = self.current_step >= self.max_steps
+        observations = self._get_observations(state)
+        infos = self._get_infos(state)
+        
+        # Reset finished envs now, keeping their final observation and info
+        done = np.flatnonzero(terminations | truncations)
+        if len(done):
+            final_obs = np.empty(self.num_envs, dtype=object)
+            final_info = np.empty(self.num_envs, dtype=object)
+            for i in done.tolist():
+                final_obs[i] = observations[i].copy()
+                final_info[i] = {key: value[i] for key, value in infos.items()
+                                 if not key.startswith('_')}
+                self._reset_env(i)
+            observations[done] = self._get_observations(self._snapshot())[done]
+            mask = np.zeros(self.num_envs, dtype=np.bool_)
+            mask[done] = True
+            infos.update(final_obs=final_obs, _final_obs=mask,
+                         final_info=final_info, _final_info=mask)
+        
+        return observations, rewards, terminations, truncations, infos
+    
+    def _snapshot(self) -> Dict[str, np.ndarray]:
+        """Read every env's market and MM state once, as arrays."""
+        mm_id = self.mm_id
+        states = [simulator.get_market_state() for simulator in self.simulators]
+        inventory = np.array([simulator.mm_inventory[mm_id] for simulator in self.simulators],
+                             dtype=np.int64)
+        cash = np.array([simulator.mm_cash[mm_id] for simulator in self.simulators])
+        # Inventory is only marked when the book has a midprice, as in get_mm_pnl
+        marks = np.array([simulator.lob.get_midprice() or 0.0 for simulator in self.simulators])
+        
+        state = {
+            'time': np.array([simulator.current_time for simulator in self.simulators]),
+            'midprice': np.array([state.midprice for state in states]),
+            'spread': np.array([state.spread for state in states]),
+            'volatility': np.array([state.volatility for state in states]),
+            'imbalance': np.array([state.imbalance for state in states]),
+            'num_trades': np.array([state.num_trades for state in states], dtype=np.int64),
+            'total_volume': np.array([state.total_volume for state in states], dtype=np.int64),
+            'inventory': inventory,
+            'pnl': cash + inventory * marks
+        }
+        if self.impact_trackers:
+            state['total_impact'] = np.array([
+                tracker.get_total_impact(simulator.current_time)
+                for tracker, simulator in zip(self.impact_trackers, self.simulators)
+            ])
+        return state
+    
+    def _queue_fractions(self, order_ids: np.ndarray) -> np.ndarray:
+        """Normalized queue position of each env's quote (0 when not resting)."""
+        fractions = np.zeros(self.num_envs)
+        for i, order_id in enumerate(order_ids.tolist()):
+            if order_id > 0:
+                queue_info = self.simulators[i].lob.get_queue_position(order_id)
+                if queue_info:
+                    position, total = queue_info
+                    fractions[i] = position / max(total, 1)
+        return fractions
+    
+    def _get_observations(self, state: Dict[str, np.ndarray]) -> np.ndarray:
+        """Construct the (N, 9) observation array."""
+        # Fully filled quotes stay in the MM's order list; count them as fills
+        num_fills = np.array([
+            len(simulator.mm_orders[self.mm_id])
+            - sum(order_id in simulator.mm_orders[self.mm_id] for order_id in (bid_id, ask_id))
+            for simulator, bid_id, ask_id in zip(self.simulators, self.active_bid_ids.tolist(),
+                                                 self.active_ask_ids.tolist())
+        ])
+        
+        return np.column_stack([
+            state['midprice'],
+            state['spread'],
+            state['inventory'],
+            state['volatility'],
+            state['imbalance'],
+            self._queue_fractions(self.active_bid_ids),
+            self._queue_fractions(self.active_ask_ids),
+            state['pnl'] - self.prev_pnl,
+            num_fills
+        ]).astype(np.float32)
+    
+    def _calculate_rewards(self, state: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Calculate every env's reward for the current step.
+        
+        Reward = ΔP&L - λ_I * inventory² - λ_V * σ² - λ_Q * impact_cost
+        """
+        pnl = state['pnl']
+        inventory = state['inventory']
+        
+        rewards = (
+            (pnl - self.prev_pnl)
+            - self.config.inventory_penalty_lambda * inventory.astype(np.float64) ** 2
+            - self.config.volatility_penalty_lambda * state['volatility'] ** 2
+        )
+        if self.impact_trackers:
+            rewards -= self.config.impact_penalty_lambda * np.abs(state['total_impact'])
+        
+        self.prev_pnl = pnl.copy()
+        self.prev_inventory = inventory.copy()
+        
+        return rewards
+    
+    def _check_terminations(self, state: Dict[str, np.ndarray]) -> np.ndarray:
+        """Check which envs should terminate early."""
+        inventory = state['inventory']
+        return (
+            (np.abs(inventory) > self.config.max_inventory)
+            | (np.abs(inventory * state['midprice']) > self.config.max_position_value)
+            | (state['pnl'] < -self.config.initial_cash * 0.5)  # Lost 50% of capital
+        )
+    
+    def _get_infos(self, state: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        """Per-env info arrays, with gymnasium's `_key` validity masks."""
+        infos = {'step': self.current_step.copy(), **state}
+        mask = np.ones(self.num_envs, dtype=np.bool_)
+        infos.update({f'_{key}': mask for key in list(infos)})
+        return infos
+    
+    def set_market_params(self, **params):
+        """Update every env's market parameters; see MarketSimulator.set_market_params."""
+        for simulator in self.simulators:
+            simulator.set_market_params(**params)
+    
+    def close_extras(self, **kwargs):
+        """Clean up resources."""
+        pass
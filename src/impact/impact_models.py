@@ -344,6 +344,7 @@ class ImpactTracker:
         if time_elapsed > 0:
             decay_factor = np.exp(-self.decay_rate * time_elapsed)
             self.current_temporary_impact *= decay_factor
+            self.last_update_time = current_time
     
     def get_total_impact(self, current_time: float) -> float:
         """Get total current impact (temporary + permanent)."""
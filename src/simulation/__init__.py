@@ -3,14 +3,27 @@ Simulation module for realistic LOB and order flow dynamics.
 """
 
 from .order_book import LimitOrderBook, Order, OrderType, OrderSide
+from .order_batch import OrderBatch
+from .array_order_book import ArrayLimitOrderBook
+from .event_scheduler import EventScheduler
+from .market_data import L2BookMirror, MarketDataRecorder
 from .market_simulator import MarketSimulator
+from .batched_simulator import BatchedMarketSimulator
+from .parallel_runner import run_parallel_simulations
 from .order_flow import OrderFlowGenerator
 
 __all__ = [
     'LimitOrderBook',
+    'ArrayLimitOrderBook',
+    'L2BookMirror',
+    'MarketDataRecorder',
+    'EventScheduler',
     'Order',
+    'OrderBatch',
     'OrderType',
     'OrderSide',
     'MarketSimulator',
+    'BatchedMarketSimulator',
+    'run_parallel_simulations',
     'OrderFlowGenerator'
 ]
@@ -0,0 +1,487 @@
+"""
+Dense NumPy-backed Limit Order Book for bounded price bands.
+
+In normal simulations prices stay within a few hundred ticks of the initial
+midprice. Instead of a dict of PriceLevel objects per side, this book keeps
+each side as a ladder over a band of ticks around a movable center:
+- Aggregate size per tick lives in a preallocated int64 array, so L2 depth,
+  snapshots and imbalance are vectorized slices
+- Each occupied tick holds a bare FIFO of its orders for price-time matching
+- Only levels holding queue-tracked orders carry a PriceLevel, which keeps
+  their QueuePositions current
+- The band recenters when an order arrives outside it, and widens when the
+  resting book no longer fits, so no level is ever dropped
+"""
+
+import numpy as np
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from .order_book import (
+    LimitOrderBook, Order, OrderQueue, OrderSide, PriceLevel, QueuePosition, Fill,
+    FILL_DTYPE, _fill_to_row, ticks_to_price
+)
+
+
+class TickQueue(OrderQueue):
+    """FIFO of the orders at one tick, tagged with its copy-on-write owner."""
+    
+    __slots__ = ('owner',)
+    
+    def __init__(self, owner: object):
+        super().__init__()
+        self.owner = owner
+
+
+class LadderSide:
+    """
+    One side of an ArrayLimitOrderBook.
+    
+    Index i of the ladder is tick `origin + i`: `sizes[i]` is the aggregate
+    size resting there and `queues[i]` its TickQueue (None when empty).
+    `levels` maps ticks to the PriceLevel of levels with queue-tracked
+    orders; a PriceLevel shares its tick's queue. Reads follow BookSide
+    (`best`, `top`, `size_at`, len), so price queries work on either book.
+    """
+    
+    __slots__ = ('is_bid', 'origin', 'sizes', 'queues', 'levels', 'best_index', 'num_levels')
+    
+    def __init__(self, is_bid: bool, origin: int, band_ticks: int):
+        self.is_bid = is_bid
+        self.origin = origin
+        self.sizes = np.zeros(band_ticks, dtype=np.int64)
+        self.queues = np.full(band_ticks, None, dtype=object)
+        self.levels: Dict[int, PriceLevel] = {}
+        self.best_index = -1 if is_bid else band_ticks
+        self.num_levels = 0
+    
+    def __len__(self) -> int:
+        return self.num_levels
+    
+    def __contains__(self, ticks: int) -> bool:
+        index = ticks - self.origin
+        return 0 <= index < len(self.sizes) and self.sizes[index] > 0
+    
+    def best(self) -> Optional[int]:
+        """Best tick on this side (highest bid / lowest ask)."""
+        if not self.num_levels:
+            return None
+        return self.best_index + self.origin
+    
+    def top_indices(self, levels: int) -> np.ndarray:
+        """Ladder indices of up to `levels` occupied ticks, touch first."""
+        if not self.num_levels or levels <= 0:
+            return np.empty(0, dtype=np.int64)
+        if self.is_bid:
+            return np.flatnonzero(self.sizes[:self.best_index + 1])[::-1][:levels]
+        return np.flatnonzero(self.sizes[self.best_index:])[:levels] + self.best_index
+    
+    def top(self, levels: int) -> List[int]:
+        """Up to `levels` ticks ordered from the touch outwards."""
+        return (self.top_indices(levels) + self.origin).tolist()
+    
+    def size_at(self, ticks: int) -> int:
+        """Aggregate size resting at `ticks` (0 if no level)."""
+        index = ticks - self.origin
+        return int(self.sizes[index]) if 0 <= index < len(self.sizes) else 0
+    
+    def occupied_range(self) -> Optional[Tuple[int, int]]:
+        """Lowest and highest occupied tick, or None when the side is empty."""
+        if not self.num_levels:
+            return None
+        occupied = np.flatnonzero(self.sizes)
+        return int(occupied[0]) + self.origin, int(occupied[-1]) + self.origin
+    
+    def open_level(self, index: int, queue: TickQueue):
+        """Start a level at an empty index."""
+        self.queues[index] = queue
+        self.num_levels += 1
+        if self.is_bid:
+            self.best_index = max(self.best_index, index)
+        else:
+            self.best_index = min(self.best_index, index)
+    
+    def close_level(self, index: int):
+        """Drop the level at `index` once its size has reached zero."""
+        self.queues[index] = None
+        self.levels.pop(index + self.origin, None)
+        self.num_levels -= 1
+        if index == self.best_index:
+            self.best_index = self._next_occupied(index)
+    
+    def _next_occupied(self, index: int, window: int = 64) -> int:
+        """Nearest occupied index behind `index`, scanning outwards in windows."""
+        sizes = self.sizes
+        if self.is_bid:
+            stop = index
+            while stop > 0:
+                start = max(0, stop - window)
+                occupied = np.flatnonzero(sizes[start:stop])
+                if len(occupied):
+                    return start + int(occupied[-1])
+                stop = start
+            return -1
+        start = index + 1
+        while start < len(sizes):
+            stop = min(len(sizes), start + window)
+            occupied = np.flatnonzero(sizes[start:stop])
+            if len(occupied):
+                return start + int(occupied[0])
+            start = stop
+        return len(sizes)
+    
+    def relayout(self, origin: int, band_ticks: int):
+        """Move the ladder to a new origin and width; occupied ticks must fit."""
+        shift = origin - self.origin
+        sizes = np.zeros(band_ticks, dtype=np.int64)
+        queues = np.full(band_ticks, None, dtype=object)
+        start, stop = max(0, shift), min(len(self.sizes), shift + band_ticks)
+        if start < stop:
+            sizes[start - shift:stop - shift] = self.sizes[start:stop]
+            queues[start - shift:stop - shift] = self.queues[start:stop]
+        
+        self.sizes = sizes
+        self.queues = queues
+        self.origin = origin
+        if self.num_levels:
+            self.best_index -= shift
+        else:
+            self.best_index = -1 if self.is_bid else band_ticks
+    
+    def fork(self) -> 'LadderSide':
+        """Copy the ladder, sharing the queues and PriceLevels themselves."""
+        forked = LadderSide.__new__(LadderSide)
+        forked.is_bid = self.is_bid
+        forked.origin = self.origin
+        forked.sizes = self.sizes.copy()
+        forked.queues = self.queues.copy()
+        forked.levels = dict(self.levels)
+        forked.best_index = self.best_index
+        forked.num_levels = self.num_levels
+        return forked
+
+
+class ArrayLimitOrderBook(LimitOrderBook):
+    """
+    LimitOrderBook with dense per-tick ladders instead of PriceLevel dicts.
+    
+    `bids` and `asks` are LadderSides spanning the same band of `band_ticks`
+    ticks from `origin`. Matching walks the ladders in price-time priority
+    and produces the same fills as LimitOrderBook; queue positions are
+    maintained for tracked owners' levels only, and seeded on first query
+    for any other order. Forks share queues copy-on-write per tick.
+    """
+    
+    def __init__(
+        self,
+        tick_size: float = 0.01,
+        band_ticks: int = 512,
+        center_price: Optional[float] = None,
+        **book_kwargs
+    ):
+        # Remaining keyword arguments (fill log settings) go to LimitOrderBook
+        super().__init__(tick_size=tick_size, **book_kwargs)
+        
+        if band_ticks < 16:
+            raise ValueError(f"band_ticks must be at least 16, got {band_ticks}")
+        
+        self.band_ticks = band_ticks
+        # A band only recenters if the resting book fits inside these margins
+        self.recenter_margin = band_ticks // 8
+        
+        # Band origin; set from the first order if no center price is given
+        self.origin: Optional[int] = None
+        if center_price is not None:
+            self.origin = self.to_ticks(center_price) - band_ticks // 2
+        self.bids = LadderSide(True, self.origin or 0, band_ticks)
+        self.asks = LadderSide(False, self.origin or 0, band_ticks)
+        
+        self.num_recenters = 0
+    
+    @property
+    def bid_sizes(self) -> np.ndarray:
+        """Aggregate bid size per band tick."""
+        return self.bids.sizes
+    
+    @property
+    def ask_sizes(self) -> np.ndarray:
+        """Aggregate ask size per band tick."""
+        return self.asks.sizes
+    
+    def recenter(self, center_ticks: int, band_ticks: Optional[int] = None):
+        """
+        Move the band to be centered on `center_ticks`, optionally resizing it.
+        
+        Raises:
+            ValueError: If resting levels would fall outside the new band
+        """
+        band_ticks = band_ticks or self.band_ticks
+        origin = center_ticks - band_ticks // 2
+        for side in (self.bids, self.asks):
+            occupied = side.occupied_range()
+            if occupied is not None and (occupied[0] < origin or occupied[1] >= origin + band_ticks):
+                raise ValueError(
+                    f"Band of {band_ticks} ticks from {origin} would drop resting levels in "
+                    f"[{occupied[0]}, {occupied[1]}]"
+                )
+        
+        for side in (self.bids, self.asks):
+            side.relayout(origin, band_ticks)
+        self.origin = origin
+        self.band_ticks = band_ticks
+        self.recenter_margin = band_ticks // 8
+        self.num_recenters += 1
+    
+    def _band_index(self, ticks: int) -> int:
+        """Ladder index of `ticks`, moving or widening the band to cover it."""
+        if self.origin is None:
+            self.origin = ticks - self.band_ticks // 2
+            self.bids.origin = self.asks.origin = self.origin
+        
+        index = ticks - self.origin
+        if 0 <= index < self.band_ticks:
+            return index
+        
+        # Recenter on the resting book plus the new tick, widening until the
+        # span fits inside the margins
+        low = high = ticks
+        for side in (self.bids, self.asks):
+            occupied = side.occupied_range()
+            if occupied is not None:
+                low, high = min(low, occupied[0]), max(high, occupied[1])
+        band_ticks = self.band_ticks
+        while band_ticks - 2 * (band_ticks // 8) < high - low + 1:
+            band_ticks *= 2
+        self.recenter((low + high) // 2, band_ticks)
+        return ticks - self.origin
+    
+    def _writable_queue(self, side: LadderSide, index: int) -> TickQueue:
+        """Get a tick's queue for mutation, copying it first if it is shared with a fork."""
+        queue = side.queues[index]
+        if queue.owner is self._cow_token:
+            return queue
+        
+        clone = TickQueue(self._cow_token)
+        self._copy_queue(queue, clone)
+        side.queues[index] = clone
+        
+        ticks = index + side.origin
+        level = side.levels.get(ticks)
+        if level is not None:
+            side.levels[ticks] = PriceLevel(
+                price=level.price,
+                orders=clone,
+                total_size=level.total_size,
+                price_ticks=ticks,
+                tracked={oid: replace(qp) for oid, qp in level.tracked.items()},
+                next_seq=level.next_seq,
+                owner=self._cow_token
+            )
+        return clone
+    
+    def _tracked_level(self, side: LadderSide, index: int) -> PriceLevel:
+        """PriceLevel of a (writable) tick, created with fresh arrival stamps if needed."""
+        ticks = index + side.origin
+        level = side.levels.get(ticks)
+        if level is None:
+            queue = side.queues[index]
+            for seq, order in enumerate(queue):
+                order._seq = seq
+            level = PriceLevel(
+                price=self.to_price(ticks),
+                orders=queue,
+                total_size=int(side.sizes[index]),
+                price_ticks=ticks,
+                next_seq=len(queue),
+                owner=self._cow_token
+            )
+            side.levels[ticks] = level
+        return level
+    
+    def _match(self, order_id, is_buy, size, limit_ticks, fill_buffer=None):
+        """Match an aggressive order against the opposite ladder; see LimitOrderBook._match."""
+        fills = []
+        remaining_size = size
+        side = OrderSide.BUY if is_buy else OrderSide.SELL
+        ladder = self.asks if is_buy else self.bids
+        sizes = ladder.sizes
+        
+        while remaining_size > 0 and ladder.num_levels:
+            index = ladder.best_index
+            ticks = index + ladder.origin
+            if limit_ticks is not None and (ticks > limit_ticks if is_buy else ticks < limit_ticks):
+                break
+            
+            queue = self._writable_queue(ladder, index)
+            level = ladder.levels.get(ticks) if ladder.levels else None
+            price = self.to_price(ticks)
+            level_size = int(sizes[index])
+            
+            while queue.head is not None and remaining_size > 0:
+                passive_order = queue.head
+                fill_size = min(remaining_size, passive_order.size)
+                
+                if fill_buffer is None:
+                    fills.append(Fill(
+                        order_id=order_id,
+                        price=price,
+                        size=fill_size,
+                        timestamp=self.current_time,
+                        aggressive_order_id=order_id,
+                        passive_order_id=passive_order.order_id,
+                        side=side
+                    ))
+                else:
+                    fill_buffer.append((order_id, price, fill_size, self.current_time,
+                                        order_id, passive_order.order_id, is_buy))
+                if self._trade_listeners:
+                    self._print_trade(price, fill_size, side)
+                
+                # Only levels with tracked orders need their queue standings moved
+                if level is None:
+                    passive_order.size -= fill_size
+                    if passive_order.size == 0:
+                        queue.remove(passive_order)
+                else:
+                    moved = level.fill_head(fill_size)
+                    if moved:
+                        self._push_queue_updates(moved)
+                level_size -= fill_size
+                remaining_size -= fill_size
+                self.total_volume += fill_size
+                self.total_trades += 1
+                
+                if passive_order.size == 0:
+                    self.orders.pop(passive_order.order_id, None)
+            
+            sizes[index] = level_size
+            if level_size == 0:
+                ladder.close_level(index)
+            self._on_level_change(ladder.is_bid, ticks, level_size)
+        
+        if fills:
+            self.fills.extend(fills)
+            if self._fill_routes and fill_buffer is None:
+                self._route_fills(np.array([_fill_to_row(f) for f in fills], dtype=FILL_DTYPE))
+        return fills, remaining_size
+    
+    def _add_to_book(self, order: Order):
+        """Rest an order at the back of its tick's queue."""
+        ladder = self.bids if order.side == OrderSide.BUY else self.asks
+        ticks = order.price_ticks
+        index = self._band_index(ticks)
+        
+        if ladder.queues[index] is None:
+            queue = TickQueue(self._cow_token)
+            ladder.open_level(index, queue)
+        else:
+            queue = self._writable_queue(ladder, index)
+        
+        track = order.trader_id in self._tracked_owners
+        level = ladder.levels.get(ticks) if ladder.levels else None
+        if track and level is None:
+            level = self._tracked_level(ladder, index)
+        if level is None:
+            # Arrival stamps are only compared within tracked levels, which restamp on creation
+            order._seq = 0
+            queue.append(order)
+        else:
+            level.add_order(order, track=track)
+        
+        total_size = int(ladder.sizes[index]) + order.size
+        ladder.sizes[index] = total_size
+        self.orders[order.order_id] = order
+        self._on_level_change(ladder.is_bid, ticks, total_size)
+    
+    def _remove_resting(self, order_id: int) -> Optional[Order]:
+        """Take a resting order off its tick's queue; see LimitOrderBook._remove_resting."""
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        
+        ladder = self.bids if order.side == OrderSide.BUY else self.asks
+        ticks = order.price_ticks
+        index = ticks - ladder.origin
+        
+        # Copying a shared queue replaces its orders, so look the order up again
+        queue = self._writable_queue(ladder, index)
+        order = self.orders.pop(order_id)
+        level = ladder.levels.get(ticks) if ladder.levels else None
+        if level is None:
+            queue.remove(order)
+        else:
+            moved = level.unlink_order(order)
+            if moved:
+                self._push_queue_updates(moved)
+        
+        total_size = int(ladder.sizes[index]) - order.size
+        ladder.sizes[index] = total_size
+        if total_size == 0:
+            ladder.close_level(index)
+        self._on_level_change(ladder.is_bid, ticks, total_size)
+        return order
+    
+    def _reduce_order(self, order_id: int, reduction: int):
+        """Shrink a resting order in place, keeping its queue priority."""
+        order = self.orders[order_id]
+        ladder = self.bids if order.side == OrderSide.BUY else self.asks
+        ticks = order.price_ticks
+        index = ticks - ladder.origin
+        self._writable_queue(ladder, index)
+        order = self.orders[order_id]
+        
+        order.size -= reduction
+        level = ladder.levels.get(ticks) if ladder.levels else None
+        if level is not None:
+            level.total_size -= reduction
+            moved = level._advance_tracked(order._seq, 0, reduction)
+            if moved:
+                self._push_queue_updates(moved)
+        total_size = int(ladder.sizes[index]) - reduction
+        ladder.sizes[index] = total_size
+        self._on_level_change(ladder.is_bid, ticks, total_size)
+    
+    def _queue_standing(self, order_id: int) -> Optional[Tuple[QueuePosition, PriceLevel]]:
+        """Tracked queue standing of a resting order, giving its tick a PriceLevel on first use."""
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        
+        ladder = self.bids if order.side == OrderSide.BUY else self.asks
+        level = ladder.levels.get(order.price_ticks)
+        qp = None if level is None else level.tracked.get(order_id)
+        if qp is None:
+            # Seeding tracking mutates the tick
+            index = order.price_ticks - ladder.origin
+            self._writable_queue(ladder, index)
+            level = self._tracked_level(ladder, index)
+            qp = level.track(self.orders[order_id])
+        return qp, level
+    
+    def get_depth_arrays(self, levels: int = 5) -> Dict[str, np.ndarray]:
+        """
+        Get L2 market depth as arrays.
+        
+        Returns:
+            Dictionary with 'bid_prices', 'bid_sizes', 'ask_prices' and
+            'ask_sizes' arrays, each ordered from the touch outwards.
+        """
+        result = {}
+        for name, ladder in (('bid', self.bids), ('ask', self.asks)):
+            indices = ladder.top_indices(levels)
+            result[f'{name}_prices'] = ticks_to_price(indices + ladder.origin, self.tick_size)
+            result[f'{name}_sizes'] = ladder.sizes[indices]
+        return result
+    
+    def _compute_side_depth(
+        self,
+        is_bid: bool,
+        levels: int
+    ) -> Tuple[List[Tuple[float, int]], Optional[int]]:
+        """Compute the top `levels` of one side with a vectorized ladder scan."""
+        ladder = self.bids if is_bid else self.asks
+        indices = ladder.top_indices(levels)
+        ticks = indices + ladder.origin
+        prices = ticks_to_price(ticks, self.tick_size)
+        depth = list(zip(prices.tolist(), ladder.sizes[indices].tolist()))
+        return depth, (int(ticks[-1]) if len(ticks) else None)
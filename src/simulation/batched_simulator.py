@@ -0,0 +1,459 @@
+"""
+Lockstep Monte Carlo simulation of many independent markets.
+
+Risk studies need the same market model run under hundreds of seeds. Rather
+than looping over MarketSimulator instances, BatchedMarketSimulator keeps K
+books as (K, band) aggregate size ladders and advances all of them together:
+each market draws a step's variates from its own stream in one call, and
+every regime switch and book update is one NumPy operation over the market
+dimension.
+"""
+
+import numpy as np
+from typing import Dict, Optional, Sequence, Tuple
+
+from .market_simulator import SimulationConfig
+from .order_flow import OrderFlowConfig
+from .order_book import LIMIT_CODE, MARKET_CODE, CANCEL_CODE, ticks_to_price
+from .parallel_runner import spawn_seeds
+
+
+class BatchedMarketSimulator:
+    """
+    K independent markets advanced in lockstep.
+    
+    Each market draws the MarketSimulator order flow: Poisson limit, market
+    and cancel arrivals, truncated-normal sizes, tick offsets from the touch,
+    regime-switching volatility and price drift. Market k draws from its own
+    stream seeded with `seeds[k]` (spawned from `config.seed` as
+    run_parallel_simulations does), so its path does not depend on K or on
+    the other markets. The book model is coarser than MarketSimulator's, so
+    paths are statistically similar rather than equal to
+    `MarketSimulator(seed=seeds[k])`.
+    
+    Books are L2 ladders (aggregate size and resting order count per tick in
+    a band of `band_ticks` around a per-market origin,
+    `config.book_band_ticks` wide by default), so:
+    - market and marketable limit orders sweep levels from the touch
+    - a cancellation removes one order's worth of size from a level chosen
+      in proportion to resting size, where MarketSimulator cancels a
+      uniformly chosen resting order (individual orders and queue priority
+      are not modelled)
+    - `num_trades` counts fills like MarketSimulator: a level of c orders
+      and size S that trades t units contributes ceil(t * c / S) fills,
+      treating its orders as equal-sized
+    - the band recenters when the touch drifts near its edge; size left
+      outside the band is dropped and counted in `dropped_volume`, so keep
+      the band wide relative to price excursions
+    - a limit order priced beyond the band trades against the band up to
+      its edge; any remainder cannot rest and is counted in
+      `dropped_volume` too
+    
+    Within a step, each market's events occupy the first n_k of M shared
+    slots; slot j is processed for all markets at once.
+    """
+    
+    def __init__(
+        self,
+        num_markets: int,
+        config: Optional[SimulationConfig] = None,
+        band_ticks: Optional[int] = None,
+        seeds: Optional[Sequence[int]] = None
+    ):
+        if num_markets <= 0:
+            raise ValueError(f"num_markets must be positive, got {num_markets}")
+        if seeds is not None and len(seeds) != num_markets:
+            raise ValueError(f"Expected {num_markets} seeds, got {len(seeds)}")
+        self.config = config or SimulationConfig()
+        band_ticks = band_ticks or self.config.book_band_ticks
+        if band_ticks < 32:
+            raise ValueError(f"band_ticks must be at least 32, got {band_ticks}")
+        
+        self.num_markets = num_markets
+        self.flow_config = self.config.order_flow_config or OrderFlowConfig()
+        self.band_ticks = band_ticks
+        self.recenter_margin = band_ticks // 8
+        self.sweep_window = 32
+        self.tick_size = self.config.tick_size
+        
+        # One independent stream per market
+        if seeds is None:
+            seeds = spawn_seeds(num_markets, self.config.seed)
+        self.seeds = [int(seed) for seed in seeds]
+        self.rngs = [np.random.default_rng(seed) for seed in self.seeds]
+        self.reset()
+    
+    def reset(self):
+        """Reset every market to the initial book."""
+        K, B = self.num_markets, self.band_ticks
+        mid = self.config.initial_midprice
+        spread = self.config.initial_spread
+        best_bid = int(round((mid - spread / 2) / self.tick_size))
+        best_ask = int(round((mid + spread / 2) / self.tick_size))
+        
+        # Band index i of market k holds tick origin[k] + i
+        self.origin = np.full(K, (best_bid + best_ask) // 2 - B // 2, dtype=np.int64)
+        self.bid_sizes = np.zeros((K, B), dtype=np.int64)
+        self.ask_sizes = np.zeros((K, B), dtype=np.int64)
+        self.bid_orders = np.zeros((K, B), dtype=np.int64)
+        self.ask_orders = np.zeros((K, B), dtype=np.int64)
+        
+        # Same initial liquidity as MarketSimulator._initialize_book
+        levels = np.arange(10)
+        self.bid_sizes[:, best_bid - self.origin[0] - levels] = 100 + levels * 10
+        self.ask_sizes[:, best_ask - self.origin[0] + levels] = 100 + levels * 10
+        self.bid_orders[:, best_bid - self.origin[0] - levels] = 1
+        self.ask_orders[:, best_ask - self.origin[0] + levels] = 1
+        
+        self.high_vol = np.zeros(K, dtype=np.bool_)
+        self.total_volume = np.zeros(K, dtype=np.int64)
+        self.num_trades = np.zeros(K, dtype=np.int64)
+        self.dropped_volume = np.zeros(K, dtype=np.int64)
+        self.current_time = 0.0
+        self.num_recenters = 0
+    
+    def _best_indices(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Band indices of each market's best bid and ask (-1 / B when empty)."""
+        B = self.band_ticks
+        has_bid = self.bid_sizes.any(axis=1)
+        has_ask = self.ask_sizes.any(axis=1)
+        best_bid = np.where(has_bid, B - 1 - np.argmax(self.bid_sizes[:, ::-1] > 0, axis=1), -1)
+        best_ask = np.where(has_ask, np.argmax(self.ask_sizes > 0, axis=1), B)
+        return best_bid, best_ask
+    
+    def _quotes(self, best_bid: np.ndarray, best_ask: np.ndarray) -> Dict[str, np.ndarray]:
+        """Best bid/ask, midprice and spread per market (NaN for a missing side)."""
+        bid = np.where(best_bid >= 0, ticks_to_price(best_bid + self.origin, self.tick_size), np.nan)
+        ask = np.where(best_ask < self.band_ticks,
+                       ticks_to_price(best_ask + self.origin, self.tick_size), np.nan)
+        return {
+            'best_bid': bid,
+            'best_ask': ask,
+            'midprice': (bid + ask) / 2,
+            'spread': ask - bid
+        }
+    
+    def _top_volume(self, ladders: np.ndarray, touch: np.ndarray, step: int, levels: int) -> np.ndarray:
+        """Size in the first `levels` non-empty levels from `touch`, walking by `step`."""
+        B = self.band_ticks
+        index = touch[:, None] + step * np.arange(self.sweep_window)
+        inside = (index >= 0) & (index < B)
+        window = np.where(inside, np.take_along_axis(ladders, np.clip(index, 0, B - 1), axis=1), 0)
+        rank = np.cumsum(window > 0, axis=1)
+        volume = np.where(rank <= levels, window, 0).sum(axis=1)
+        
+        # Rare sparse books: rank the whole side
+        short = np.flatnonzero((rank[:, -1] < levels) & inside[:, -1])
+        if len(short):
+            full = ladders[short] if step > 0 else ladders[short, ::-1]
+            full_rank = np.cumsum(full > 0, axis=1)
+            volume[short] = np.where(full_rank <= levels, full, 0).sum(axis=1)
+        return volume
+    
+    def _imbalance(self, best_bid: np.ndarray, best_ask: np.ndarray, levels: int = 5) -> np.ndarray:
+        """Order book imbalance over the top `levels` non-empty levels per side."""
+        bid_volume = self._top_volume(self.bid_sizes, best_bid, -1, levels)
+        ask_volume = self._top_volume(self.ask_sizes, best_ask, 1, levels)
+        total = bid_volume + ask_volume
+        return np.divide(bid_volume - ask_volume, total, out=np.zeros(len(total)), where=total > 0)
+    
+    def _recenter(self, best_bid: np.ndarray, best_ask: np.ndarray):
+        """Shift the band of every market whose touch is near a band edge."""
+        B = self.band_ticks
+        low, high = self.recenter_margin, B - self.recenter_margin
+        drifted = (((best_bid >= 0) & ((best_bid < low) | (best_bid >= high))) |
+                   ((best_ask < B) & ((best_ask < low) | (best_ask >= high))))
+        rows = np.flatnonzero(drifted)
+        if not len(rows):
+            return
+        
+        bid, ask = best_bid[rows], best_ask[rows]
+        center = np.where((bid >= 0) & (ask < B), (bid + ask) // 2, np.where(bid >= 0, bid, ask))
+        shift = center - B // 2
+        resting = self.bid_sizes[rows].sum(axis=1) + self.ask_sizes[rows].sum(axis=1)
+        source = np.arange(B) + shift[:, None]
+        inside = (source >= 0) & (source < B)
+        source = np.clip(source, 0, B - 1)
+        for ladder in (self.bid_sizes, self.ask_sizes, self.bid_orders, self.ask_orders):
+            ladder[rows] = np.where(inside, np.take_along_axis(ladder[rows], source, axis=1), 0)
+        
+        # Size shifted past either band edge is gone for good
+        kept = self.bid_sizes[rows].sum(axis=1) + self.ask_sizes[rows].sum(axis=1)
+        self.dropped_volume[rows] += resting - kept
+        self.origin[rows] += shift
+        best_bid[rows] = np.where(bid >= 0, bid - shift, -1)
+        best_ask[rows] = np.where(ask < B, ask - shift, B)
+        self.num_recenters += len(rows)
+    
+    def _sweep(
+        self,
+        rows: np.ndarray,
+        is_buy: np.ndarray,
+        size: np.ndarray,
+        limit_index: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Match aggressive orders against the opposite ladders from the touch.
+        
+        Args:
+            rows: Markets receiving an order
+            is_buy: Aggressor side per row
+            size: Order size per row
+            limit_index: Worst band index each order may trade at (None for market)
+        
+        Returns:
+            Unfilled size per row
+        """
+        remaining = size.copy()
+        B = self.band_ticks
+        for side_buy in (True, False):
+            mask = is_buy == side_buy
+            if not mask.any():
+                continue
+            side_rows = rows[mask]
+            ladders = self.ask_sizes if side_buy else self.bid_sizes
+            orders = self.ask_orders if side_buy else self.bid_orders
+            quantity = size[mask]
+            
+            # Touch-first depth d is band index d for asks and B - 1 - d for bids
+            limit = np.full(len(side_rows), B - 1)
+            if limit_index is not None:
+                limit = limit_index[mask] if side_buy else B - 1 - limit_index[mask]
+            if side_buy:
+                lo = int(self._ask_touch[side_rows].min())
+            else:
+                lo = B - 1 - int(self._bid_touch[side_rows].max())
+            
+            # Work on a window from the shallowest touch: orders rarely sweep
+            # more than a few dozen ticks, so widen to the band only if needed
+            end = min(B, int(limit.max()) + 1)
+            if lo >= end:
+                continue
+            hi = min(end, lo + self.sweep_window)
+            while True:
+                book = ladders[side_rows, lo:hi] if side_buy else ladders[side_rows, B - hi:B - lo][:, ::-1]
+                book = np.where(np.arange(lo, hi) <= limit[:, None], book, 0)
+                cumulative = np.cumsum(book, axis=1)
+                if hi == end or (cumulative[:, -1] >= quantity).all():
+                    break
+                hi = end
+            traded = book - np.minimum(book, np.maximum(cumulative - quantity[:, None], 0))
+            
+            # Orders at a level are taken as equal-sized: trading t of size S
+            # fills ceil(t * c / S) of its c orders and removes floor(t * c / S)
+            count = orders[side_rows, lo:hi] if side_buy else orders[side_rows, B - hi:B - lo][:, ::-1]
+            matched = traded * count
+            level_size = np.maximum(book, 1)
+            consumed = matched // level_size
+            
+            if side_buy:
+                ladders[side_rows, lo:hi] -= traded
+                orders[side_rows, lo:hi] -= consumed
+            else:
+                ladders[side_rows, B - hi:B - lo] -= traded[:, ::-1]
+                orders[side_rows, B - hi:B - lo] -= consumed[:, ::-1]
+            volume = traded.sum(axis=1)
+            self.total_volume[side_rows] += volume
+            self.num_trades[side_rows] += (-(-matched // level_size)).sum(axis=1)
+            remaining[mask] = quantity - volume
+        return remaining
+    
+    def _place_limits(self, rows: np.ndarray, is_buy: np.ndarray, index: np.ndarray, size: np.ndarray):
+        """
+        Match limit orders, then rest what is left at their band index.
+        
+        Args:
+            rows: Markets receiving an order
+            is_buy: Side per row
+            index: Limit price per row as a band index (may lie outside the band)
+            size: Order size per row
+        """
+        B = self.band_ticks
+        
+        # A limit beyond the band edge can still take everything in the band
+        limit = np.where(is_buy, np.minimum(index, B - 1), np.maximum(index, 0))
+        remaining = self._sweep(rows, is_buy, size, limit_index=limit)
+        
+        # A remainder priced outside the band has nowhere to rest
+        inside = (index >= 0) & (index < B)
+        lost = ~inside & (remaining > 0)
+        self.dropped_volume[rows[lost]] += remaining[lost]
+        
+        rest = inside & (remaining > 0)
+        bids, asks = rest & is_buy, rest & ~is_buy
+        self.bid_sizes[rows[bids], index[bids]] += remaining[bids]
+        self.ask_sizes[rows[asks], index[asks]] += remaining[asks]
+        self.bid_orders[rows[bids], index[bids]] += 1
+        self.ask_orders[rows[asks], index[asks]] += 1
+        self._bid_touch[rows[bids]] = np.maximum(self._bid_touch[rows[bids]], index[bids])
+        self._ask_touch[rows[asks]] = np.minimum(self._ask_touch[rows[asks]], index[asks])
+    
+    def _cancel(self, rows: np.ndarray, u: np.ndarray, size: np.ndarray):
+        """Remove up to `size` from a level picked in proportion to resting size."""
+        # Only band indices up to the bid touch and from the ask touch can hold size
+        bid_end = int(self._bid_touch[rows].max()) + 1
+        ask_start = int(self._ask_touch[rows].min())
+        book = np.concatenate((self.bid_sizes[rows, :bid_end], self.ask_sizes[rows, ask_start:]), axis=1)
+        if not book.shape[1]:
+            return
+        cumulative = np.cumsum(book, axis=1)
+        total = cumulative[:, -1]
+        nonempty = total > 0
+        rows, book, cumulative = rows[nonempty], book[nonempty], cumulative[nonempty]
+        target = u[nonempty] * total[nonempty]
+        position = np.minimum((cumulative <= target[:, None]).sum(axis=1), book.shape[1] - 1)
+        
+        removed = np.minimum(book[np.arange(len(rows)), position], size[nonempty])
+        is_bid = position < bid_end
+        for sizes, orders, mask, index in (
+            (self.bid_sizes, self.bid_orders, is_bid, position),
+            (self.ask_sizes, self.ask_orders, ~is_bid, position - bid_end + ask_start)
+        ):
+            side_rows, index = rows[mask], index[mask]
+            sizes[side_rows, index] -= removed[mask]
+            # One order leaves; a level keeps at least one while size rests
+            orders[side_rows, index] = np.where(
+                sizes[side_rows, index] > 0, np.maximum(orders[side_rows, index] - 1, 1), 0)
+    
+    def step(self, duration: float) -> Dict[str, np.ndarray]:
+        """
+        Advance every market by `duration`.
+        
+        Returns:
+            Per-market state after the step: 'midprice', 'spread',
+            'best_bid', 'best_ask', 'imbalance', 'volatility',
+            'total_volume' and 'num_trades', each of shape (K,)
+        """
+        cfg = self.flow_config
+        K = self.num_markets
+        
+        rates = np.array([cfg.limit_order_rate, cfg.market_order_rate, cfg.cancellation_rate])
+        total_rate = rates.sum()
+        
+        # Superposed Poisson arrivals: a total count, then i.i.d. types and
+        # times. Market k's count and variates come from its own stream and
+        # fill its first n_k slots, so they do not depend on the other markets
+        num_events = np.array([rng.poisson(total_rate * duration) for rng in self.rngs], dtype=np.int64)
+        M = int(num_events.max()) if K else 0
+        slot = np.arange(M)
+        live = slot[None, :] < num_events[:, None]
+        uniforms = np.zeros((5, K, M))
+        normals = np.zeros((3, K, M))
+        if M:
+            uniforms[:, live] = np.concatenate(
+                [rng.random((5, n)) for rng, n in zip(self.rngs, num_events)], axis=1)
+            normals[:, live] = np.concatenate(
+                [rng.standard_normal((3, n)) for rng, n in zip(self.rngs, num_events)], axis=1)
+        
+        times = np.where(live, uniforms[0] * duration, np.inf)
+        times.sort(axis=1)
+        types = np.searchsorted(np.cumsum(rates)[:-1], uniforms[1] * total_rate, side='right')
+        
+        # Every per-event variate of the step, transformed at once
+        switch = uniforms[2] < cfg.volatility_regime_prob
+        side_u = uniforms[3]
+        cancel_u = uniforms[4]
+        offsets = np.maximum(0, np.trunc(
+            cfg.mean_spread_offset_ticks + cfg.spread_offset_std_ticks * normals[0])).astype(np.int64)
+        sizes = np.maximum(1, np.clip(np.trunc(cfg.mean_order_size + cfg.order_size_std * normals[1]),
+                                      max(1, cfg.min_order_size), cfg.max_order_size)).astype(np.int64)
+        drift_z = normals[2]
+        
+        # Bounds on each touch for the step: sweeps and cancels only move a
+        # touch away from the spread, and resting orders update the bound
+        self._bid_touch, self._ask_touch = self._best_indices()
+        quotes = self._quotes(self._bid_touch, self._ask_touch)
+        mid = np.where(np.isnan(quotes['midprice']), self.config.initial_midprice, quotes['midprice'])
+        spread0 = np.where(np.isnan(quotes['spread']), self.config.initial_spread, quotes['spread'])
+        spread = spread0.copy()
+        last_time = np.zeros(K)
+        
+        base_vol = cfg.base_volatility
+        high_vol_level = base_vol * cfg.high_vol_multiplier
+        
+        for j in range(M):
+            active = live[:, j]
+            self.high_vol ^= active & switch[:, j]
+            vol = np.where(self.high_vol, high_vol_level, base_vol)
+            event_type = types[:, j]
+            
+            rows = np.flatnonzero(active & (event_type == LIMIT_CODE))
+            if len(rows):
+                is_buy = side_u[rows, j] < 0.5
+                half = np.where(is_buy, -spread[rows], spread[rows]) / 2
+                ticks = np.maximum(1, np.round((mid[rows] + half) / self.tick_size).astype(np.int64)
+                                   + np.where(is_buy, -offsets[rows, j], offsets[rows, j]))
+                self._place_limits(rows, is_buy, ticks - self.origin[rows], sizes[rows, j])
+            
+            rows = np.flatnonzero(active & (event_type == MARKET_CODE))
+            if len(rows):
+                self._sweep(rows, side_u[rows, j] < cfg.market_order_prob_buy, sizes[rows, j])
+            
+            rows = np.flatnonzero(active & (event_type == CANCEL_CODE))
+            if len(rows):
+                self._cancel(rows, cancel_u[rows, j], sizes[rows, j])
+            
+            # Drift and spread seen by the next event
+            elapsed = np.where(active, times[:, j] - last_time, 0.0)
+            last_time = np.where(active, times[:, j], last_time)
+            mid += drift_z[:, j] * vol * np.sqrt(elapsed)
+            spread = np.where(active, spread0 * (1 + vol / base_vol), spread)
+        
+        best_bid, best_ask = self._best_indices()
+        self._recenter(best_bid, best_ask)
+        self.current_time += duration
+        
+        state = self._quotes(best_bid, best_ask)
+        state['midprice'] = np.where(np.isnan(state['midprice']), self.config.initial_midprice, state['midprice'])
+        state['spread'] = np.where(np.isnan(state['spread']), self.config.initial_spread, state['spread'])
+        state['imbalance'] = self._imbalance(best_bid, best_ask)
+        state['volatility'] = np.where(self.high_vol, high_vol_level, base_vol)
+        state['total_volume'] = self.total_volume.copy()
+        state['num_trades'] = self.num_trades.copy()
+        return state
+    
+    def run_simulation(self, duration: float, time_step: Optional[float] = None) -> Dict:
+        """
+        Run every market for `duration`.
+        
+        Returns:
+            Dictionary with 'timestamp' (T,), per-step (K, T) arrays for each
+            state field, and per-market (K,) summary statistics matching the
+            keys of MarketSimulator.run_simulation, plus 'dropped_volume' and
+            'seeds' (the seed of each market)
+        """
+        time_step = time_step or self.config.time_step
+        num_steps = int(duration / time_step)
+        K = self.num_markets
+        
+        history = {
+            name: np.empty((K, num_steps), dtype=np.int64 if name in ('total_volume', 'num_trades') else np.float64)
+            for name in ('midprice', 'spread', 'best_bid', 'best_ask', 'imbalance',
+                         'volatility', 'total_volume', 'num_trades')
+        }
+        timestamps = np.empty(num_steps)
+        
+        for t in range(num_steps):
+            state = self.step(time_step)
+            timestamps[t] = self.current_time
+            for name, column in history.items():
+                column[:, t] = state[name]
+        
+        midprices = history['midprice']
+        spreads = history['spread']
+        return {
+            'duration': duration,
+            'num_steps': num_steps,
+            'seeds': list(self.seeds),
+            'timestamp': timestamps,
+            'history': history,
+            'total_trades': self.num_trades.copy(),
+            'total_volume': self.total_volume.copy(),
+            'dropped_volume': self.dropped_volume.copy(),
+            'avg_midprice': midprices.mean(axis=1),
+            'midprice_std': midprices.std(axis=1),
+            'avg_spread': spreads.mean(axis=1),
+            'spread_std': spreads.std(axis=1),
+            'avg_imbalance': history['imbalance'].mean(axis=1),
+            'avg_volatility': history['volatility'].mean(axis=1)
+        }
@@ -0,0 +1,278 @@
+"""
+Bounded event logs for long-running simulations.
+
+The order book records every fill and cancellation. Over long training runs
+an unbounded Python list of event objects grows without limit, so the book
+can instead use one of these retention policies:
+- "list": unbounded list (every event kept as an object)
+- "none": events are only counted
+- "ring": the last N events are kept
+- "columnar": events are packed into NumPy record chunks, optionally
+  flushed to disk as temporary .npy files, and streamed back on iteration
+
+All logs behave like the list they replace as far as reading goes:
+`len(log)` is the number of events the log still holds (what iteration
+yields), and integer indexing and slicing (returning a list) address those
+events oldest first. `log.total` counts every event ever appended; it is
+larger than `len(log)` only for "none" and once a "ring" has wrapped.
+"""
+
+import os
+import tempfile
+import weakref
+from bisect import bisect_right
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+
+
+class NullLog:
+    """Event log that keeps nothing and only counts appended events."""
+    
+    def __init__(self):
+        self.total = 0
+    
+    def append(self, event: Any):
+        self.total += 1
+    
+    def extend(self, events: Iterable[Any]):
+        for _ in events:
+            self.total += 1
+    
+    def extend_records(self, records: np.ndarray):
+        self.total += len(records)
+    
+    def __len__(self) -> int:
+        return 0
+    
+    def __iter__(self) -> Iterator[Any]:
+        return iter(())
+    
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return []
+        raise IndexError("event log index out of range")
+    
+    def clear(self):
+        self.total = 0
+
+
+class RingLog(deque):
+    """Event log that keeps only the most recent `capacity` events."""
+    
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError(f"Ring log capacity must be positive, got {capacity}")
+        super().__init__(maxlen=capacity)
+        self.total = 0
+    
+    def append(self, event: Any):
+        super().append(event)
+        self.total += 1
+    
+    def extend(self, events: Iterable[Any]):
+        events = list(events)
+        super().extend(events)
+        self.total += len(events)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step > 0:
+                return list(islice(self, start, stop, step)) if start < stop else []
+            return list(self)[index]
+        return super().__getitem__(index)
+    
+    def clear(self):
+        super().clear()
+        self.total = 0
+
+
+def _remove_spilled(chunks: List[Union[np.ndarray, str]]):
+    """Delete the files of spilled chunks."""
+    for chunk in chunks:
+        if isinstance(chunk, str) and os.path.exists(chunk):
+            os.remove(chunk)
+
+
+class ColumnarLog:
+    """
+    Event log that packs events into fixed-size NumPy record chunks.
+    
+    Events are converted to rows of `dtype` with `to_row` and written into a
+    preallocated buffer. Full buffers become chunks, which are kept in memory
+    or, if `spill_dir` is set, saved to disk and memory-mapped back when read.
+    `iter_chunks` streams the record arrays for analytics; iterating the log
+    itself rebuilds event objects one at a time with `from_row`. Spilled
+    files belong to the log: `clear()` deletes them, and so does garbage
+    collection of the log.
+    """
+    
+    def __init__(
+        self,
+        dtype: np.dtype,
+        to_row: Callable[[Any], tuple],
+        from_row: Callable[[np.void], Any],
+        chunk_size: int = 65536,
+        spill_dir: Optional[str] = None,
+        name: str = "events"
+    ):
+        if chunk_size <= 0:
+            raise ValueError(f"Chunk size must be positive, got {chunk_size}")
+        
+        self.dtype = np.dtype(dtype)
+        self.to_row = to_row
+        self.from_row = from_row
+        self.chunk_size = chunk_size
+        self.spill_dir = spill_dir
+        self.name = name
+        
+        self._buffer = np.empty(chunk_size, dtype=self.dtype)
+        self._count = 0
+        self._chunks: List[Union[np.ndarray, str]] = []
+        self._chunk_ends: List[int] = []  # Cumulative row count after each chunk
+        self.total = 0
+        
+        if spill_dir is not None:
+            os.makedirs(spill_dir, exist_ok=True)
+        weakref.finalize(self, _remove_spilled, self._chunks)
+    
+    def append(self, event: Any):
+        self._buffer[self._count] = self.to_row(event)
+        self._count += 1
+        self.total += 1
+        if self._count == self.chunk_size:
+            self.flush()
+    
+    def extend(self, events: Iterable[Any]):
+        for event in events:
+            self.append(event)
+    
+    def extend_records(self, records: np.ndarray):
+        """Bulk-append rows that are already in this log's record layout."""
+        start = 0
+        while start < len(records):
+            take = min(len(records) - start, self.chunk_size - self._count)
+            self._buffer[self._count:self._count + take] = records[start:start + take]
+            self._count += take
+            self.total += take
+            start += take
+            if self._count == self.chunk_size:
+                self.flush()
+    
+    def flush(self):
+        """Move the buffered rows into a chunk (on disk if spilling)."""
+        if self._count == 0:
+            return
+        
+        chunk = self._buffer[:self._count].copy()
+        if self.spill_dir is not None:
+            fd, path = tempfile.mkstemp(
+                prefix=f"{self.name}_{len(self._chunks):06d}_",
+                suffix=".npy",
+                dir=self.spill_dir
+            )
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, chunk)
+            self._chunks.append(path)
+        else:
+            self._chunks.append(chunk)
+        self._chunk_ends.append(self.total)
+        self._count = 0
+    
+    def _load(self, i: int) -> np.ndarray:
+        chunk = self._chunks[i]
+        return np.load(chunk, mmap_mode='r') if isinstance(chunk, str) else chunk
+    
+    def iter_chunks(self) -> Iterator[np.ndarray]:
+        """Stream the log as record arrays, oldest first."""
+        for i in range(len(self._chunks)):
+            yield self._load(i)
+        if self._count:
+            yield self._buffer[:self._count]
+    
+    def records(self, start: int, stop: int) -> np.ndarray:
+        """Record rows [start, stop) as one array, reading only the chunks they span."""
+        start, stop, _ = slice(start, stop).indices(self.total)
+        parts = []
+        i = bisect_right(self._chunk_ends, start)
+        while start < stop:
+            if i < len(self._chunks):
+                offset = self._chunk_ends[i - 1] if i else 0
+                rows, end = self._load(i), self._chunk_ends[i]
+            else:
+                offset = self.total - self._count
+                rows, end = self._buffer, self.total
+            parts.append(rows[start - offset:min(stop, end) - offset])
+            start = min(stop, end)
+            i += 1
+        return np.concatenate(parts) if parts else np.empty(0, dtype=self.dtype)
+    
+    def __len__(self) -> int:
+        # Spilled chunks stay readable, so every appended event is still held
+        return self.total
+    
+    def __iter__(self) -> Iterator[Any]:
+        for chunk in self.iter_chunks():
+            for row in chunk:
+                yield self.from_row(row)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            indices = range(*index.indices(self.total))
+            if not indices:
+                return []
+            low, high = min(indices[0], indices[-1]), max(indices[0], indices[-1]) + 1
+            rows = self.records(low, high)
+            return [self.from_row(rows[i - low]) for i in indices]
+        if index < 0:
+            index += self.total
+        if not 0 <= index < self.total:
+            raise IndexError("event log index out of range")
+        return self.from_row(self.records(index, index + 1)[0])
+    
+    def clear(self):
+        """Drop all events, deleting any spilled chunk files."""
+        _remove_spilled(self._chunks)
+        self._chunks.clear()
+        self._chunk_ends = []
+        self._count = 0
+        self.total = 0
+
+
+def create_event_log(
+    mode: str,
+    dtype: np.dtype,
+    to_row: Callable[[Any], tuple],
+    from_row: Callable[[np.void], Any],
+    capacity: int = 10000,
+    spill_dir: Optional[str] = None,
+    name: str = "events"
+):
+    """
+    Create an event log for the given retention mode.
+    
+    Args:
+        mode: "list", "none", "ring" or "columnar"
+        dtype: Record dtype for columnar logs
+        to_row: Event -> record tuple converter for columnar logs
+        from_row: Record -> event converter for columnar logs
+        capacity: Ring size, or chunk size for columnar logs
+        spill_dir: Directory columnar chunks are flushed to (in memory if None)
+        name: File name prefix for spilled chunks
+    
+    Returns:
+        Event log supporting append/extend/len/iteration
+    """
+    if mode == "list":
+        return []
+    if mode == "none":
+        return NullLog()
+    if mode == "ring":
+        return RingLog(capacity)
+    if mode == "columnar":
+        return ColumnarLog(dtype, to_row, from_row, chunk_size=capacity,
+                           spill_dir=spill_dir, name=name)
+    raise ValueError(f"Unknown event log mode: {mode}")
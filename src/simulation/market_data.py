@@ -0,0 +1,154 @@
+"""
+Consumers of the order book's incremental market data streams.
+
+The LimitOrderBook publishes market-by-price deltas (BookUpdate) and trade
+prints (TradePrint) through `subscribe_depth`/`subscribe_trades`. This module
+provides:
+- L2BookMirror: a downstream L2 book kept in sync from deltas
+- MarketDataRecorder: records both streams columnar for later replay
+"""
+
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .order_book import LimitOrderBook, BookUpdate, TradePrint, OrderSide, ticks_to_price
+
+
+BOOK_UPDATE_DTYPE = np.dtype([
+    ('event_index', np.int64),  # Arrival order across both streams
+    ('seq', np.int64),
+    ('timestamp', np.float64),
+    ('is_bid', np.bool_),
+    ('price_ticks', np.int64),
+    ('price', np.float64),
+    ('size', np.int64),
+])
+
+TRADE_PRINT_DTYPE = np.dtype([
+    ('event_index', np.int64),
+    ('seq', np.int64),
+    ('timestamp', np.float64),
+    ('price', np.float64),
+    ('size', np.int64),
+    ('is_buy', np.bool_),
+])
+
+
+class L2BookMirror:
+    """
+    Aggregated L2 book maintained from market-by-price deltas.
+    
+    Each delta is applied in O(1); depth queries sort the mirrored levels.
+    Sequence gaps (missed updates) are counted so consumers can
+    resynchronise from a full snapshot if needed.
+    """
+    
+    def __init__(self, tick_size: float = 0.01):
+        self.tick_size = tick_size
+        self.bids: Dict[int, int] = {}  # price_ticks -> aggregate size
+        self.asks: Dict[int, int] = {}
+        self.last_seq: Optional[int] = None
+        self.num_gaps = 0
+    
+    def attach(self, lob: LimitOrderBook):
+        """Seed from the book's current levels and subscribe to its deltas."""
+        self.tick_size = lob.tick_size
+        self.bids = {t: lob.bids.size_at(t) for t in lob.bids.top(len(lob.bids))}
+        self.asks = {t: lob.asks.size_at(t) for t in lob.asks.top(len(lob.asks))}
+        self.last_seq = lob.depth_seq
+        lob.subscribe_depth(self.apply)
+    
+    def apply(self, update: BookUpdate):
+        """Apply one delta."""
+        if self.last_seq is not None and update.seq != self.last_seq + 1:
+            self.num_gaps += 1
+        self.last_seq = update.seq
+        
+        side = self.bids if update.is_bid else self.asks
+        if update.size == 0:
+            side.pop(update.price_ticks, None)
+        else:
+            side[update.price_ticks] = update.size
+    
+    def get_book_depth(self, levels: int = 5) -> Dict:
+        """
+        Get L2 market depth in the same format as LimitOrderBook.
+        
+        Returns:
+            Dictionary with 'bids' and 'asks' lists of (price, size) tuples.
+        """
+        bid_ticks = sorted(self.bids, reverse=True)[:levels]
+        ask_ticks = sorted(self.asks)[:levels]
+        
+        return {
+            'bids': [(ticks_to_price(t, self.tick_size), self.bids[t]) for t in bid_ticks],
+            'asks': [(ticks_to_price(t, self.tick_size), self.asks[t]) for t in ask_ticks]
+        }
+
+
+class MarketDataRecorder:
+    """
+    Records a book's L2 deltas and trade prints for replay.
+    
+    Events are buffered as tuples while recording and converted to
+    structured arrays on demand. Each record carries its arrival index
+    across both streams so replay reproduces the original interleaving.
+    """
+    
+    def __init__(self):
+        self._updates: List[Tuple] = []
+        self._trades: List[Tuple] = []
+        self._num_events = 0
+    
+    def attach(self, lob: LimitOrderBook):
+        """Start recording both streams of `lob`."""
+        lob.subscribe_depth(self.on_update)
+        lob.subscribe_trades(self.on_trade)
+    
+    def detach(self, lob: LimitOrderBook):
+        """Stop recording `lob`."""
+        lob.unsubscribe(self.on_update)
+        lob.unsubscribe(self.on_trade)
+    
+    def on_update(self, update: BookUpdate):
+        self._updates.append((self._num_events, update.seq, update.timestamp, update.is_bid,
+                              update.price_ticks, update.price, update.size))
+        self._num_events += 1
+    
+    def on_trade(self, trade: TradePrint):
+        self._trades.append((self._num_events, trade.seq, trade.timestamp, trade.price,
+                             trade.size, trade.aggressor_side == OrderSide.BUY))
+        self._num_events += 1
+    
+    def get_updates(self) -> np.ndarray:
+        """Recorded L2 deltas as BOOK_UPDATE_DTYPE records."""
+        return np.array(self._updates, dtype=BOOK_UPDATE_DTYPE)
+    
+    def get_trades(self) -> np.ndarray:
+        """Recorded trade prints as TRADE_PRINT_DTYPE records."""
+        return np.array(self._trades, dtype=TRADE_PRINT_DTYPE)
+    
+    def save(self, path: str):
+        """Save both streams to a compressed .npz file."""
+        np.savez_compressed(path, updates=self.get_updates(), trades=self.get_trades())
+    
+    @staticmethod
+    def replay(
+        updates: np.ndarray,
+        trades: Optional[np.ndarray] = None,
+        on_update: Optional[Callable[[BookUpdate], None]] = None,
+        on_trade: Optional[Callable[[TradePrint], None]] = None
+    ):
+        """Re-publish recorded streams to callbacks in original arrival order."""
+        events = []
+        if on_update is not None:
+            for index, seq, ts, is_bid, ticks, price, size in updates.tolist():
+                events.append((index, BookUpdate(seq, ts, is_bid, ticks, price, size), on_update))
+        if on_trade is not None and trades is not None:
+            for index, seq, ts, price, size, is_buy in trades.tolist():
+                side = OrderSide.BUY if is_buy else OrderSide.SELL
+                events.append((index, TradePrint(seq, ts, price, size, side), on_trade))
+        
+        events.sort(key=lambda event: event[0])
+        for _, event, callback in events:
+            callback(event)
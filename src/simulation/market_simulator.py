@@ -8,11 +8,17 @@ Simulates realistic market dynamics including:
 - Historical replay capability
 """
 
+import copy
+import operator
 import numpy as np
-from typing import List, Dict, Optional, Tuple
-from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Tuple, Union
+from dataclasses import dataclass, field, replace
 
-from .order_book import LimitOrderBook, Order, OrderType, OrderSide, Fill
+from .order_book import (
+    LimitOrderBook, Order, OrderType, OrderSide, Fill, BatchResult
+)
+from .array_order_book import ArrayLimitOrderBook
+from .event_scheduler import EventScheduler
 from .order_flow import OrderFlowGenerator, OrderFlowConfig
 
 
@@ -30,6 +36,110 @@ class MarketState:
     num_trades: int
 
 
+class MarketStateHistory:
+    """
+    Columnar history of per-step market states.
+    
+    Each MarketState field is a preallocated NumPy column (missing best
+    bid/ask stored as NaN), so a recorded step costs 72 bytes instead of a
+    dataclass instance. Columns grow by doubling; with `capacity` set the
+    history is a ring keeping the latest `capacity` steps. The ring writes
+    every row twice, `capacity` apart, so the retained window is always one
+    contiguous slice and `column` can return views in both modes.
+    
+    Indexing and iteration still yield MarketState objects, and slicing a
+    list of them, as with the list the history used to be.
+    """
+    
+    FIELDS = ('timestamp', 'midprice', 'spread', 'best_bid', 'best_ask',
+              'imbalance', 'volatility', 'total_volume', 'num_trades')
+    INT_FIELDS = ('total_volume', 'num_trades')
+    
+    def __init__(self, capacity: Optional[int] = None, initial_size: int = 1024):
+        if capacity is not None and capacity <= 0:
+            raise ValueError(f"History capacity must be positive, got {capacity}")
+        self.capacity = capacity
+        size = 2 * capacity if capacity is not None else initial_size
+        self._columns = {
+            name: np.empty(size, dtype=np.int64 if name in self.INT_FIELDS else np.float64)
+            for name in self.FIELDS
+        }
+        self.total = 0  # Steps recorded, including any overwritten by the ring
+    
+    def __len__(self) -> int:
+        if self.capacity is None:
+            return self.total
+        return min(self.total, self.capacity)
+    
+    def _window(self) -> slice:
+        """Slice of the backing arrays holding the retained steps, oldest first."""
+        if self.capacity is None or self.total <= self.capacity:
+            return slice(0, self.total)
+        start = self.total % self.capacity
+        return slice(start, start + self.capacity)
+    
+    def append(self, row: Tuple):
+        """Record one step given its values in FIELDS order."""
+        if self.capacity is None:
+            index = self.total
+            if index == len(self._columns['timestamp']):
+                self._columns = {
+                    name: np.concatenate((column, np.empty_like(column)))
+                    for name, column in self._columns.items()
+                }
+            for column, value in zip(self._columns.values(), row):
+                column[index] = value
+        else:
+            index = self.total % self.capacity
+            mirror = index + self.capacity
+            for column, value in zip(self._columns.values(), row):
+                column[index] = value
+                column[mirror] = value
+        self.total += 1
+    
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one field over the retained steps, oldest first."""
+        view = self._columns[name][self._window()]
+        view.flags.writeable = False
+        return view
+    
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Views of every field."""
+        return {name: self.column(name) for name in self.FIELDS}
+    
+    @classmethod
+    def to_state(cls, row: Tuple) -> MarketState:
+        """Build a MarketState from a row in FIELDS order (NaN best bid/ask -> None)."""
+        values = dict(zip(cls.FIELDS, row))
+        for name in ('best_bid', 'best_ask'):
+            if np.isnan(values[name]):
+                values[name] = None
+        return MarketState(**values)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[MarketState, List[MarketState]]:
+        n = len(self)
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(n))]
+        index = operator.index(index)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("state history index out of range")
+        position = self._window().start + index
+        return self.to_state(tuple(column[position].item() for column in self._columns.values()))
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+    
+    def copy(self) -> 'MarketStateHistory':
+        copied = MarketStateHistory.__new__(MarketStateHistory)
+        copied.capacity = self.capacity
+        copied._columns = {name: column.copy() for name, column in self._columns.items()}
+        copied.total = self.total
+        return copied
+
+
 @dataclass
 class SimulationConfig:
     """Configuration for market simulation."""
@@ -37,6 +147,17 @@ class SimulationConfig:
     initial_spread: float = 0.02
     tick_size: float = 0.01
     
+    # Order book backend: "dict" (sparse LimitOrderBook) or "array" (ArrayLimitOrderBook)
+    book_type: str = "dict"
+    book_band_ticks: int = 512  # Width of the dense ladder for the array backend
+    
+    # Fill/cancellation log retention: "list", "none", "ring" or "columnar".
+    # The default keeps every event; long runs can bound memory with "ring"
+    # (the last `fill_log_capacity` events) or spill with "columnar".
+    fill_log: str = "list"
+    fill_log_capacity: int = 10000
+    fill_log_dir: Optional[str] = None  # Spill directory for columnar logs
+    
     # Order flow configuration
     order_flow_config: Optional[OrderFlowConfig] = None
     
@@ -44,8 +165,13 @@ class SimulationConfig:
     enable_impact: bool = True
     impact_decay_rate: float = 0.5
     
+    # Latency: deliver orders to the book at send time + latency, in arrival order
+    enable_latency: bool = False
+    mm_latency: float = 0.0  # Latency of market maker orders and cancels
+    
     # Simulation parameters
     time_step: float = 0.1  # seconds
+    history_capacity: Optional[int] = None  # Keep only the last N market states if set
     seed: Optional[int] = None
 
 
@@ -64,15 +190,23 @@ class MarketSimulator:
         self.config = config or SimulationConfig()
         
         # Initialize components
-        self.lob = LimitOrderBook(tick_size=self.config.tick_size)
+        self.lob = self._create_book()
+        self.scheduler = EventScheduler(self.lob)
+        
+        # Generated orders carry tick indices, so the generator must share the book's tick
+        flow_config = self.config.order_flow_config or OrderFlowConfig()
+        if flow_config.tick_size != self.config.tick_size:
+            flow_config = replace(flow_config, tick_size=self.config.tick_size)
+        # Generated, initial and MM orders all draw ids from the book's allocator
         self.order_flow = OrderFlowGenerator(
-            config=self.config.order_flow_config,
-            seed=self.config.seed
+            config=flow_config,
+            seed=self.config.seed,
+            id_allocator=self.lob.id_allocator
         )
         
         # State tracking
         self.current_time = 0.0
-        self.market_states: List[MarketState] = []
+        self.market_states = MarketStateHistory(self.config.history_capacity)
         
         # Initialize book with liquidity
         self._initialize_book()
@@ -83,37 +217,60 @@ class MarketSimulator:
         self.mm_cash: Dict[str, float] = {}  # mm_id -> cash
         self.mm_pnl: Dict[str, List[float]] = {}  # mm_id -> pnl history
     
+    def _create_book(self) -> LimitOrderBook:
+        """Create an empty order book of the configured type."""
+        log_kwargs = dict(
+            fill_log=self.config.fill_log,
+            fill_log_capacity=self.config.fill_log_capacity,
+            fill_log_dir=self.config.fill_log_dir
+        )
+        if self.config.book_type == "array":
+            return ArrayLimitOrderBook(
+                tick_size=self.config.tick_size,
+                band_ticks=self.config.book_band_ticks,
+                center_price=self.config.initial_midprice,
+                **log_kwargs
+            )
+        if self.config.book_type == "dict":
+            return LimitOrderBook(tick_size=self.config.tick_size, **log_kwargs)
+        raise ValueError(f"Unknown book type: {self.config.book_type}")
+    
     def _initialize_book(self):
         """Initialize the order book with initial liquidity."""
         mid = self.config.initial_midprice
         spread = self.config.initial_spread
-        tick = self.config.tick_size
+        
+        # Touch prices in the integer tick domain
+        best_bid_ticks = self.lob.to_ticks(mid - spread/2)
+        best_ask_ticks = self.lob.to_ticks(mid + spread/2)
         
         # Add initial liquidity on both sides
         for i in range(10):
             # Bid side
-            bid_price = mid - spread/2 - i * tick
-            bid_order = Order(
-                order_id=self.lob.get_next_order_id(),
+            bid_ticks = best_bid_ticks - i
+            bid_order = Order.trusted(
+                order_id=self.lob.get_next_order_id("liquidity_provider"),
                 side=OrderSide.BUY,
                 order_type=OrderType.LIMIT,
-                price=bid_price,
+                price=self.lob.to_price(bid_ticks),
                 size=100 + i * 10,
                 timestamp=0.0,
-                trader_id="liquidity_provider"
+                trader_id="liquidity_provider",
+                price_ticks=bid_ticks
             )
             self.lob.submit_order(bid_order)
             
             # Ask side
-            ask_price = mid + spread/2 + i * tick
-            ask_order = Order(
-                order_id=self.lob.get_next_order_id(),
+            ask_ticks = best_ask_ticks + i
+            ask_order = Order.trusted(
+                order_id=self.lob.get_next_order_id("liquidity_provider"),
                 side=OrderSide.SELL,
                 order_type=OrderType.LIMIT,
-                price=ask_price,
+                price=self.lob.to_price(ask_ticks),
                 size=100 + i * 10,
                 timestamp=0.0,
-                trader_id="liquidity_provider"
+                trader_id="liquidity_provider",
+                price_ticks=ask_ticks
             )
             self.lob.submit_order(ask_order)
     
@@ -127,31 +284,36 @@ class MarketSimulator:
         Returns:
             List of fills that occurred during this step
         """
-        # Generate orders for this time step
-        orders, volatilities = self.order_flow.generate_order_flow_sequence(
-            duration=duration,
-            initial_midprice=self.lob.get_midprice() or self.config.initial_midprice,
-            initial_spread=self.lob.get_spread() or self.config.initial_spread
+        return self.step_batch(duration).to_fills()
+    
+    def step_batch(self, duration: float) -> BatchResult:
+        """Simulate a time step, returning the fills columnar (no Fill objects)."""
+        # Pull the orders arriving during this step from the persistent flow
+        batch, volatilities = self.order_flow.generate_batch(
+            self.current_time + duration,
+            midprice=self.lob.get_midprice() or self.config.initial_midprice,
+            spread=self.lob.get_spread() or self.config.initial_spread
         )
         
-        # Process all orders
-        all_fills = []
-        for order in orders:
-            order.timestamp += self.current_time
-            fills = self.lob.submit_order(order)
-            all_fills.extend(fills)
+        if self.config.enable_latency:
+            # Orders reach the book after their latency, possibly in a later step
+            self.scheduler.schedule_batch(batch)
+            _, result = self.scheduler.run_until(self.current_time + duration)
+        else:
+            # Process the whole window columnar (timestamps are absolute)
+            result = self.lob.submit_batch(batch)
+        self._sync_active_orders(result)
         
         # Update time
         self.current_time += duration
         self.lob.current_time = self.current_time
         
         # Record state
-        state = self._get_current_state(
+        self.market_states.append(self._state_row(
             volatility=self.order_flow.get_current_volatility()
-        )
-        self.market_states.append(state)
+        ))
         
-        return all_fills
+        return result
     
     def register_market_maker(self, mm_id: str, initial_cash: float = 100000.0):
         """Register a market maker agent."""
@@ -159,11 +321,23 @@ class MarketSimulator:
         self.mm_inventory[mm_id] = 0
         self.mm_cash[mm_id] = initial_cash
         self.mm_pnl[mm_id] = [0.0]
+        
+        # Keep the MM's queue positions current so per-step queries are O(1)
+        self.lob.track_queue(mm_id)
+        
+        # Every fill of the MM's orders, including background flow hitting its
+        # quotes, is routed straight to its ledger
+        self.lob.subscribe_fills(mm_id, self._mm_ledger(mm_id))
     
     def submit_mm_order(self, mm_id: str, side: OrderSide, price: float, size: int) -> int:
         """
         Submit a market maker order.
         
+        With `enable_latency` the order is scheduled to arrive after
+        `mm_latency` and is matched during a later `step`; otherwise it is
+        matched immediately. Fills reach the MM's ledger through the book's
+        fill routing either way.
+        
         Returns:
             Order ID
         """
@@ -171,22 +345,24 @@ class MarketSimulator:
             self.register_market_maker(mm_id)
         
         order = Order(
-            order_id=self.lob.get_next_order_id(),
+            order_id=self.lob.get_next_order_id(mm_id),
             side=side,
             order_type=OrderType.LIMIT,
             price=price,
             size=size,
             timestamp=self.current_time,
-            trader_id=mm_id
+            trader_id=mm_id,
+            latency=self.config.mm_latency
         )
         
-        fills = self.lob.submit_order(order)
-        
         # Track order
         self.mm_orders[mm_id].append(order.order_id)
         
-        # Update inventory and cash from fills
-        self._update_mm_positions(mm_id, fills)
+        if self.config.enable_latency:
+            self.scheduler.schedule(order)
+            return order.order_id
+        
+        self.lob.submit_order(order)
         
         return order.order_id
     
@@ -195,27 +371,90 @@ class MarketSimulator:
         if order_id not in self.mm_orders.get(mm_id, []):
             return False
         
+        if self.config.enable_latency:
+            # The cancel races any fills that arrive before it does
+            self.scheduler.schedule(Order.trusted(
+                order_id=order_id,
+                side=OrderSide.BUY,  # Not used for cancellations
+                order_type=OrderType.CANCEL,
+                price=0,
+                size=1,
+                timestamp=self.current_time,
+                trader_id=mm_id,
+                latency=self.config.mm_latency
+            ))
+            self.mm_orders[mm_id].remove(order_id)
+            return True
+        
         success = self.lob.cancel_order(order_id)
         if success:
             self.mm_orders[mm_id].remove(order_id)
         
         return success
     
-    def _update_mm_positions(self, mm_id: str, fills: List[Fill]):
-        """Update market maker positions based on fills."""
-        for fill in fills:
-            # Check if this MM was involved
-            passive_order = self.lob.orders.get(fill.passive_order_id)
-            if passive_order and passive_order.trader_id == mm_id:
-                # MM provided liquidity
-                if fill.side == OrderSide.BUY:
-                    # MM sold (short)
-                    self.mm_inventory[mm_id] -= fill.size
-                    self.mm_cash[mm_id] += fill.price * fill.size
-                else:
-                    # MM bought (long)
-                    self.mm_inventory[mm_id] += fill.size
-                    self.mm_cash[mm_id] -= fill.price * fill.size
+    def modify_mm_order(
+        self,
+        mm_id: str,
+        order_id: int,
+        new_size: Optional[int] = None,
+        new_price: Optional[float] = None
+    ) -> Optional[int]:
+        """
+        Amend a resting market maker order (see LimitOrderBook.modify_order).
+        
+        A size decrease keeps queue priority; a price change or size increase
+        requeues. With `enable_latency` amends are not modelled and the order
+        is cancelled and resubmitted instead.
+        
+        Returns:
+            ID of the amended (or replacement) order, or None if the order
+            isn't resting
+        """
+        if order_id not in self.mm_orders.get(mm_id, []):
+            return None
+        order = self.lob.orders.get(order_id)
+        if order is None:
+            return None
+        
+        if self.config.enable_latency:
+            side, price, size = order.side, order.price, order.size
+            self.cancel_mm_order(mm_id, order_id)
+            return self.submit_mm_order(
+                mm_id, side,
+                price if new_price is None else new_price,
+                size if new_size is None else new_size
+            )
+        
+        self.lob.modify_order(order_id, new_size=new_size, new_price=new_price)
+        if order_id not in self.lob.orders:
+            # Repriced through the book and filled completely
+            self.mm_orders[mm_id].remove(order_id)
+        return order_id
+    
+    def _sync_active_orders(self, result):
+        """Stop the flow from cancelling orders that fills took off the book."""
+        if not len(result):
+            return
+        filled = np.unique(np.concatenate((result.fills['passive_order_id'],
+                                           result.fills['aggressive_order_id'])))
+        orders = self.lob.orders
+        self.order_flow.remove_inactive(
+            order_id for order_id in filled.tolist() if order_id not in orders
+        )
+    
+    def _mm_ledger(self, mm_id: str):
+        """Fill route callback updating `mm_id`'s ledger."""
+        def ledger(records: np.ndarray, as_passive: bool):
+            self._apply_mm_fills(mm_id, records, as_passive)
+        return ledger
+    
+    def _apply_mm_fills(self, mm_id: str, records: np.ndarray, as_passive: bool):
+        """Update a market maker's inventory and cash from a batch of its fills."""
+        # is_buy is the aggressor's side; a resting MM trades the other way
+        mm_bought = records['is_buy'] != as_passive
+        signed_size = np.where(mm_bought, records['size'], -records['size'])
+        self.mm_inventory[mm_id] += int(signed_size.sum())
+        self.mm_cash[mm_id] -= float(np.dot(signed_size, records['price']))
     
     def get_mm_pnl(self, mm_id: str, mark_to_market: bool = True) -> float:
         """
@@ -256,43 +495,121 @@ class MarketSimulator:
             'order_ids': self.mm_orders[mm_id].copy()
         }
     
-    def _get_current_state(self, volatility: float = 0.0) -> MarketState:
-        """Get current market state snapshot."""
+    def _state_row(self, volatility: float = 0.0) -> Tuple:
+        """Current market state as a MarketStateHistory row."""
         midprice = self.lob.get_midprice()
         spread = self.lob.get_spread()
-        
-        return MarketState(
-            timestamp=self.current_time,
-            midprice=midprice or self.config.initial_midprice,
-            spread=spread or self.config.initial_spread,
-            best_bid=self.lob.get_best_bid(),
-            best_ask=self.lob.get_best_ask(),
-            imbalance=self.lob.get_order_book_imbalance(),
-            volatility=volatility,
-            total_volume=self.lob.total_volume,
-            num_trades=self.lob.total_trades
+        best_bid = self.lob.get_best_bid()
+        best_ask = self.lob.get_best_ask()
+        
+        return (
+            self.current_time,
+            midprice or self.config.initial_midprice,
+            spread or self.config.initial_spread,
+            np.nan if best_bid is None else best_bid,
+            np.nan if best_ask is None else best_ask,
+            self.lob.get_order_book_imbalance(),
+            volatility,
+            self.lob.total_volume,
+            self.lob.total_trades
         )
     
+    def _get_current_state(self, volatility: float = 0.0) -> MarketState:
+        """Get current market state snapshot."""
+        return MarketStateHistory.to_state(self._state_row(volatility))
+    
     def get_market_state(self) -> MarketState:
         """Get current market state."""
         return self._get_current_state(
             volatility=self.order_flow.get_current_volatility()
         )
     
-    def get_state_history(self) -> List[MarketState]:
-        """Get historical market states."""
+    def get_state_history(self) -> MarketStateHistory:
+        """
+        Get historical market states.
+        
+        Use `column`/`arrays` for per-field array views; indexing and
+        iteration yield MarketState objects.
+        """
         return self.market_states
     
     def get_book_snapshot(self) -> Dict:
         """Get current order book snapshot."""
         return self.lob.get_state_snapshot()
     
-    def reset(self):
-        """Reset the simulator."""
-        self.lob = LimitOrderBook(tick_size=self.config.tick_size)
+    def set_market_params(
+        self,
+        base_volatility: Optional[float] = None,
+        high_vol_multiplier: Optional[float] = None
+    ):
+        """
+        Update order flow parameters mid-run (e.g. for curriculum learning).
+        
+        Volatilities are applied when each window's prices are computed, so
+        changes take effect from the next step and persist across `reset`.
+        """
+        regime = self.order_flow.vol_regime
+        if base_volatility is not None:
+            regime.base_vol = base_volatility
+        if high_vol_multiplier is not None:
+            regime.high_vol_multiplier = high_vol_multiplier
+    
+    def fork(self) -> 'MarketSimulator':
+        """
+        Branch the simulator so both copies can continue independently.
+        
+        The book is forked copy-on-write (price levels and their orders are
+        shared until one side modifies them); the order flow RNG, volatility
+        regime and MM ledgers are copied. Recorded market states are shared
+        up to the fork point. The fork records fills in logs of its own;
+        `close()` a fork that is no longer needed to delete any chunks they
+        spilled to disk.
+        """
+        forked = copy.copy(self)
+        forked.lob = self.lob.fork()
+        forked.scheduler = self.scheduler.fork(forked.lob)
+        forked.order_flow = self.order_flow.fork()
+        forked.order_flow.id_allocator = forked.lob.id_allocator
+        forked.market_states = self.market_states.copy()
+        forked.mm_orders = {mm_id: list(ids) for mm_id, ids in self.mm_orders.items()}
+        forked.mm_inventory = dict(self.mm_inventory)
+        forked.mm_cash = dict(self.mm_cash)
+        forked.mm_pnl = {mm_id: list(pnl) for mm_id, pnl in self.mm_pnl.items()}
+        for mm_id in forked.mm_inventory:
+            forked.lob.subscribe_fills(mm_id, forked._mm_ledger(mm_id))
+        return forked
+    
+    def snapshot(self) -> 'MarketSimulator':
+        """
+        Capture the current state for what-if analysis.
+        
+        The snapshot is a fork that should not be stepped itself; call
+        `fork()` on it for each branch to run from this point.
+        """
+        return self.fork()
+    
+    def close(self):
+        """Release the book's fill and cancellation logs, deleting spilled chunk files."""
+        self.lob.close()
+    
+    def reset(self, seed: Optional[int] = None):
+        """
+        Reset the simulator.
+        
+        Args:
+            seed: If given, reseed the order flow as if the simulator had been
+                built with `SimulationConfig(seed=seed)`
+        """
+        if seed is not None:
+            self.config = replace(self.config, seed=seed)
+            self.order_flow.rng = np.random.default_rng(seed)
+        self.close()
+        self.lob = self._create_book()
+        self.scheduler = EventScheduler(self.lob)
         self.order_flow.reset()
+        self.order_flow.id_allocator = self.lob.id_allocator
         self.current_time = 0.0
-        self.market_states = []
+        self.market_states = MarketStateHistory(self.config.history_capacity)
         self.mm_orders = {}
         self.mm_inventory = {}
         self.mm_cash = {}
@@ -313,26 +630,25 @@ class MarketSimulator:
         time_step = time_step or self.config.time_step
         num_steps = int(duration / time_step)
         
-        all_fills = []
+        num_fills = 0
         
         for _ in range(num_steps):
-            fills = self.step(time_step)
-            all_fills.extend(fills)
+            num_fills += len(self.step_batch(time_step))
         
-        # Compute statistics
+        # Compute statistics on the history columns (the retained window in ring mode)
         states = self.get_state_history()
         
-        midprices = [s.midprice for s in states]
-        spreads = [s.spread for s in states]
-        imbalances = [s.imbalance for s in states]
-        volatilities = [s.volatility for s in states]
+        midprices = states.column('midprice')
+        spreads = states.column('spread')
+        imbalances = states.column('imbalance')
+        volatilities = states.column('volatility')
         
         return {
             'duration': duration,
             'num_steps': num_steps,
             'total_trades': self.lob.total_trades,
             'total_volume': self.lob.total_volume,
-            'num_fills': len(all_fills),
+            'num_fills': num_fills,
             'avg_midprice': np.mean(midprices),
             'midprice_std': np.std(midprices),
             'avg_spread': np.mean(spreads),
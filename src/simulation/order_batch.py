@@ -0,0 +1,124 @@
+"""
+Struct-of-arrays container for windows of orders.
+
+A window of generated order flow is held as one NumPy array per field
+instead of a list of Order objects, so it can be generated, shifted and
+handed to the book without creating a Python object per order.
+"""
+
+import numpy as np
+from dataclasses import dataclass, replace
+from typing import Dict, List, Sequence
+
+from .order_book import Order, OrderType, OrderSide, ORDER_TYPE_CODES, ticks_to_price
+
+
+UNKNOWN_TRADER = -1  # Trader code of orders without an owner (e.g. cancellations)
+
+_trader_names = np.array([], dtype=object)
+
+
+def trader_names(codes: np.ndarray) -> np.ndarray:
+    """Map trader codes to 'trader_<code>' ids ('unknown' for UNKNOWN_TRADER)."""
+    global _trader_names
+    needed = int(codes.max()) + 1 if len(codes) else 0
+    if needed > len(_trader_names):
+        # Names are built once per code and then gathered
+        _trader_names = np.array([f"trader_{i}" for i in range(max(needed, 128))], dtype=object)
+    names = _trader_names[np.maximum(codes, 0)]
+    names[codes == UNKNOWN_TRADER] = "unknown"
+    return names
+
+
+@dataclass
+class OrderBatch:
+    """
+    Time-sorted orders as parallel arrays.
+    
+    Order types use ORDER_TYPE_CODES; price_ticks is only meaningful for
+    limit orders and trader holds integer trader codes.
+    """
+    order_id: np.ndarray  # int64
+    is_buy: np.ndarray  # bool
+    order_type: np.ndarray  # int8
+    price_ticks: np.ndarray  # int64
+    size: np.ndarray  # int64
+    timestamp: np.ndarray  # float64
+    latency: np.ndarray  # float64
+    trader: np.ndarray  # int64
+    
+    _fields = ('order_id', 'is_buy', 'order_type', 'price_ticks', 'size',
+               'timestamp', 'latency', 'trader')
+    
+    def __len__(self) -> int:
+        return len(self.order_id)
+    
+    def __getitem__(self, index) -> 'OrderBatch':
+        """Select rows by slice, integer array or boolean mask."""
+        if isinstance(index, (int, np.integer)):
+            index = slice(index, index + 1 if index != -1 else None)
+        return OrderBatch(**{name: getattr(self, name)[index] for name in self._fields})
+    
+    @classmethod
+    def concat(cls, batches: Sequence['OrderBatch']) -> 'OrderBatch':
+        """Concatenate batches in the order given (callers keep them time-sorted)."""
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        return cls(**{
+            name: np.concatenate([getattr(batch, name) for batch in batches])
+            for name in cls._fields
+        })
+    
+    def shift(self, offset: float) -> 'OrderBatch':
+        """Batch with every timestamp moved by `offset`; other columns are shared."""
+        return replace(self, timestamp=self.timestamp + offset)
+    
+    def arrival_times(self) -> np.ndarray:
+        """Times the orders reach the book (timestamp + latency)."""
+        return self.timestamp + self.latency
+    
+    @classmethod
+    def empty(cls) -> 'OrderBatch':
+        """Batch with no orders."""
+        return cls(
+            order_id=np.empty(0, dtype=np.int64),
+            is_buy=np.empty(0, dtype=np.bool_),
+            order_type=np.empty(0, dtype=np.int8),
+            price_ticks=np.empty(0, dtype=np.int64),
+            size=np.empty(0, dtype=np.int64),
+            timestamp=np.empty(0, dtype=np.float64),
+            latency=np.empty(0, dtype=np.float64),
+            trader=np.empty(0, dtype=np.int64)
+        )
+    
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Columns in the layout accepted by `LimitOrderBook.submit_batch`."""
+        return {
+            'order_id': self.order_id,
+            'is_buy': self.is_buy,
+            'order_type': self.order_type,
+            'price_ticks': self.price_ticks,
+            'size': self.size,
+            'timestamp': self.timestamp,
+            'trader_id': trader_names(self.trader)
+        }
+    
+    def to_orders(self, tick_size: float = 0.01) -> List[Order]:
+        """Materialize the batch as Order objects."""
+        order_types = {code: order_type for order_type, code in ORDER_TYPE_CODES.items()}
+        orders = []
+        for order_id, is_buy, type_code, ticks, size, timestamp, latency, trader_id in zip(
+                self.order_id.tolist(), self.is_buy.tolist(), self.order_type.tolist(),
+                self.price_ticks.tolist(), self.size.tolist(), self.timestamp.tolist(),
+                self.latency.tolist(), trader_names(self.trader).tolist()):
+            order_type = order_types[type_code]
+            is_limit = order_type == OrderType.LIMIT
+            orders.append(Order.trusted(
+                order_id, OrderSide.BUY if is_buy else OrderSide.SELL, order_type,
+                ticks_to_price(ticks, tick_size) if is_limit else 0, size, timestamp,
+                trader_id, latency, ticks if is_limit else None
+            ))
+        return orders
@@ -8,12 +8,42 @@ This module implements a realistic order book with:
 - Order lifecycle management
 """
 
+import copy
 from enum import Enum
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
-from collections import defaultdict, deque
+from functools import lru_cache
+from dataclasses import dataclass, field, replace
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple, Union
+from bisect import bisect_left, insort
+from decimal import Decimal
 import numpy as np
 
+from .event_log import create_event_log
+
+
+@lru_cache(maxsize=None)
+def price_decimals(tick_size: float) -> int:
+    """Decimal places needed to print prices on a `tick_size` grid exactly."""
+    return max(0, -Decimal(repr(tick_size)).normalize().as_tuple().exponent)
+
+
+def ticks_to_price(ticks, tick_size: float):
+    """
+    Convert integer tick indices back to prices on the `tick_size` grid.
+    
+    The product is rounded to the grid's decimal places, so 10007 ticks of
+    0.01 come back as 100.07 rather than 100.07000000000001.
+    
+    Args:
+        ticks: Tick index, or array of tick indices
+        tick_size: Minimum price increment
+    
+    Returns:
+        Price as a float, or an array of prices for an array input
+    """
+    if isinstance(ticks, np.ndarray):
+        return np.round(ticks * tick_size, price_decimals(tick_size))
+    return round(ticks * tick_size, price_decimals(tick_size))
+
 
 class OrderType(Enum):
     """Order types supported by the LOB."""
@@ -28,9 +58,15 @@ class OrderSide(Enum):
     SELL = "sell"
 
 
-@dataclass
+@dataclass(slots=True)
 class Order:
-    """Represents a single order in the book."""
+    """
+    Represents a single order in the book.
+    
+    Orders are slotted to keep resting orders compact. The regular
+    constructor validates its arguments; internal producers that already
+    guarantee valid values use `Order.trusted` to skip validation.
+    """
     order_id: int
     side: OrderSide
     order_type: OrderType
@@ -39,6 +75,13 @@ class Order:
     timestamp: float
     trader_id: str = "unknown"
     latency: float = 0.0  # Simulated network latency
+    price_ticks: Optional[int] = None  # Integer tick index, set by the book/generator
+    
+    # Intrusive links for the price level's FIFO queue (owned by OrderQueue)
+    _prev: Optional['Order'] = field(default=None, init=False, repr=False, compare=False)
+    _next: Optional['Order'] = field(default=None, init=False, repr=False, compare=False)
+    # Arrival stamp within the price level, used to tell which orders are ahead
+    _seq: int = field(default=0, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Validate order parameters with comprehensive edge case handling."""
@@ -57,9 +100,38 @@ class Order:
         # Latency must be non-negative
         if self.latency < 0:
             raise ValueError(f"Latency must be non-negative, got {self.latency}")
+    
+    @classmethod
+    def trusted(
+        cls,
+        order_id: int,
+        side: OrderSide,
+        order_type: OrderType,
+        price: float,
+        size: int,
+        timestamp: float,
+        trader_id: str = "unknown",
+        latency: float = 0.0,
+        price_ticks: Optional[int] = None
+    ) -> 'Order':
+        """Construct an order without validation, for internal producers only."""
+        order = object.__new__(cls)
+        order.order_id = order_id
+        order.side = side
+        order.order_type = order_type
+        order.price = price
+        order.size = size
+        order.timestamp = timestamp
+        order.trader_id = trader_id
+        order.latency = latency
+        order.price_ticks = price_ticks
+        order._prev = None
+        order._next = None
+        order._seq = 0
+        return order
 
 
-@dataclass
+@dataclass(slots=True)
 class Fill:
     """Represents an order fill event."""
     order_id: int
@@ -71,36 +143,432 @@ class Fill:
     side: OrderSide
 
 
+@dataclass(slots=True)
+class BookUpdate:
+    """Market-by-price delta: the new aggregate size at one price level."""
+    seq: int
+    timestamp: float
+    is_bid: bool
+    price_ticks: int
+    price: float
+    size: int  # New aggregate size; 0 means the level was removed
+
+
+@dataclass(slots=True)
+class TradePrint:
+    """Public trade print derived from a fill."""
+    seq: int
+    timestamp: float
+    price: float
+    size: int
+    aggressor_side: OrderSide
+
+
+# Record layouts for columnar fill/cancellation logs
+FILL_DTYPE = np.dtype([
+    ('order_id', np.int64),
+    ('price', np.float64),
+    ('size', np.int64),
+    ('timestamp', np.float64),
+    ('aggressive_order_id', np.int64),
+    ('passive_order_id', np.int64),
+    ('is_buy', np.bool_),
+])
+
+CANCEL_DTYPE = np.dtype([
+    ('order_id', np.int64),
+    ('timestamp', np.float64),
+])
+
+
+def _fill_to_row(fill: Fill) -> tuple:
+    return (fill.order_id, fill.price, fill.size, fill.timestamp,
+            fill.aggressive_order_id, fill.passive_order_id, fill.side == OrderSide.BUY)
+
+
+def _row_to_fill(row: np.void) -> Fill:
+    return Fill(
+        order_id=int(row['order_id']),
+        price=float(row['price']),
+        size=int(row['size']),
+        timestamp=float(row['timestamp']),
+        aggressive_order_id=int(row['aggressive_order_id']),
+        passive_order_id=int(row['passive_order_id']),
+        side=OrderSide.BUY if row['is_buy'] else OrderSide.SELL
+    )
+
+
+def _row_to_cancellation(row: np.void) -> Tuple[int, float]:
+    return (int(row['order_id']), float(row['timestamp']))
+
+
+# Integer order type codes used by columnar (struct-of-arrays) order batches
+ORDER_TYPE_CODES = {OrderType.LIMIT: 0, OrderType.MARKET: 1, OrderType.CANCEL: 2}
+LIMIT_CODE, MARKET_CODE, CANCEL_CODE = 0, 1, 2
+
+
+class OrderIdAllocator:
+    """
+    Single source of order ids, with the owner of every id in a compact array.
+    
+    Owners (trader ids) are interned to small integer codes, and the code of
+    each allocated id is stored at `owners[order_id]`, so attributing a fill
+    to its participants is an array read that works even after the orders
+    have left the book.
+    """
+    
+    def __init__(self, capacity: int = 4096):
+        self.next_id = 1
+        self._owners = np.full(capacity, -1, dtype=np.int32)
+        self._owner_codes: Dict[str, int] = {}
+        self.owner_names: List[str] = []
+    
+    def owner_code(self, owner: str) -> int:
+        """Code of `owner`, registering it on first use."""
+        code = self._owner_codes.get(owner)
+        if code is None:
+            code = len(self.owner_names)
+            self._owner_codes[owner] = code
+            self.owner_names.append(owner)
+        return code
+    
+    def _reserve(self, count: int):
+        needed = self.next_id + count
+        if needed > len(self._owners):
+            grown = np.full(max(needed, 2 * len(self._owners)), -1, dtype=np.int32)
+            grown[:len(self._owners)] = self._owners
+            self._owners = grown
+    
+    def allocate(self, owner: str = "unknown") -> int:
+        """Allocate one id owned by `owner`."""
+        self._reserve(1)
+        order_id = self.next_id
+        self._owners[order_id] = self.owner_code(owner)
+        self.next_id += 1
+        return order_id
+    
+    def allocate_block(self, owner_codes: np.ndarray) -> np.ndarray:
+        """Allocate consecutive ids, one per entry of `owner_codes`."""
+        count = len(owner_codes)
+        self._reserve(count)
+        start = self.next_id
+        self._owners[start:start + count] = owner_codes
+        self.next_id += count
+        return np.arange(start, start + count, dtype=np.int64)
+    
+    def owner_codes_of(self, order_ids: np.ndarray) -> np.ndarray:
+        """Owner codes of many ids (-1 for ids never allocated here)."""
+        codes = np.full(len(order_ids), -1, dtype=np.int32)
+        known = (order_ids > 0) & (order_ids < self.next_id)
+        codes[known] = self._owners[order_ids[known]]
+        return codes
+    
+    def owner_of(self, order_id: int) -> Optional[str]:
+        """Owner of an id, or None if it was not allocated here."""
+        if not 0 < order_id < self.next_id:
+            return None
+        code = self._owners[order_id]
+        return self.owner_names[code] if code >= 0 else None
+    
+    def copy(self) -> 'OrderIdAllocator':
+        copied = OrderIdAllocator(capacity=1)
+        copied.next_id = self.next_id
+        copied._owners = self._owners.copy()
+        copied._owner_codes = dict(self._owner_codes)
+        copied.owner_names = list(self.owner_names)
+        return copied
+
+
+class FillBuffer:
+    """Preallocated, growable columnar buffer of FILL_DTYPE records."""
+    
+    __slots__ = ('records', 'count')
+    
+    def __init__(self, capacity: int = 1024):
+        self.records = np.empty(capacity, dtype=FILL_DTYPE)
+        self.count = 0
+    
+    def append(self, row: tuple):
+        """Write one fill record, doubling capacity when full."""
+        if self.count == len(self.records):
+            grown = np.empty(2 * len(self.records), dtype=FILL_DTYPE)
+            grown[:self.count] = self.records
+            self.records = grown
+        self.records[self.count] = row
+        self.count += 1
+    
+    def view(self) -> np.ndarray:
+        """Records written since the last clear (a view, not a copy)."""
+        return self.records[:self.count]
+    
+    def clear(self):
+        self.count = 0
+
+
+def fills_from_records(records: np.ndarray) -> List[Fill]:
+    """Materialize Fill objects from FILL_DTYPE records."""
+    return [
+        Fill(order_id, price, size, timestamp, aggressive_id, passive_id,
+             OrderSide.BUY if is_buy else OrderSide.SELL)
+        for order_id, price, size, timestamp, aggressive_id, passive_id, is_buy
+        in records.tolist()
+    ]
+
+
+@dataclass
+class BatchResult:
+    """Fills produced by `LimitOrderBook.submit_batch`, with per-order ranges."""
+    fills: np.ndarray  # FILL_DTYPE records in execution order
+    fill_start: np.ndarray  # fills[fill_start[i]:fill_end[i]] belong to order i
+    fill_end: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.fills)
+    
+    def fills_for(self, index: int) -> np.ndarray:
+        """Fill records generated by the order at position `index` in the batch."""
+        return self.fills[self.fill_start[index]:self.fill_end[index]]
+    
+    def to_fills(self) -> List[Fill]:
+        """Materialize all fills as Fill objects."""
+        return fills_from_records(self.fills)
+
+
+class OrderQueue:
+    """
+    Intrusive doubly-linked FIFO of resting orders.
+    
+    Orders carry their own prev/next links, so appending, popping the head
+    and unlinking an arbitrary order are all O(1) while iteration still
+    yields strict arrival (time-priority) order. An id index finds the node
+    of any queued order in O(1) as well.
+    """
+    
+    __slots__ = ('head', 'tail', '_index')
+    
+    def __init__(self):
+        self.head: Optional[Order] = None
+        self.tail: Optional[Order] = None
+        self._index: Dict[int, Order] = {}
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    def get(self, order_id: int) -> Optional[Order]:
+        """The queued order with `order_id`, or None."""
+        return self._index.get(order_id)
+    
+    def __bool__(self) -> bool:
+        return self.head is not None
+    
+    def __iter__(self):
+        node = self.head
+        while node is not None:
+            # Read the link first so the current node may be unlinked mid-iteration
+            next_node = node._next
+            yield node
+            node = next_node
+    
+    def append(self, order: Order):
+        """Link order at the tail of the queue."""
+        order._prev = self.tail
+        order._next = None
+        if self.tail is None:
+            self.head = order
+        else:
+            self.tail._next = order
+        self.tail = order
+        self._index[order.order_id] = order
+    
+    def remove(self, order: Order):
+        """Unlink an order that is known to be in this queue."""
+        prev_order, next_order = order._prev, order._next
+        if prev_order is None:
+            self.head = next_order
+        else:
+            prev_order._next = next_order
+        if next_order is None:
+            self.tail = prev_order
+        else:
+            next_order._prev = prev_order
+        order._prev = order._next = None
+        del self._index[order.order_id]
+    
+    def popleft(self) -> Order:
+        """Unlink and return the order at the front of the queue."""
+        order = self.head
+        if order is None:
+            raise IndexError("pop from an empty OrderQueue")
+        self.remove(order)
+        return order
+
+
+@dataclass
+class QueuePosition:
+    """Incrementally maintained queue standing of a tracked resting order."""
+    order_id: int
+    trader_id: str
+    seq: int
+    position: int  # Orders ahead in the FIFO queue
+    shares_ahead: int  # Volume ahead in the FIFO queue
+
+
 @dataclass
 class PriceLevel:
     """Represents a price level in the order book."""
     price: float
-    orders: deque = field(default_factory=deque)  # FIFO queue
+    orders: OrderQueue = field(default_factory=OrderQueue)  # FIFO queue
     total_size: int = 0
+    price_ticks: int = 0
+    
+    # Queue standing of tracked orders, kept current on every fill and cancel ahead
+    tracked: Dict[int, QueuePosition] = field(default_factory=dict, repr=False)
+    next_seq: int = 0
+    
+    # Copy-on-write token of the book allowed to mutate this level in place
+    owner: Optional[object] = field(default=None, repr=False, compare=False)
     
-    def add_order(self, order: Order):
+    def add_order(self, order: Order, track: bool = False):
         """Add order to this price level."""
+        order._seq = self.next_seq
+        self.next_seq += 1
+        if track:
+            self.tracked[order.order_id] = QueuePosition(
+                order.order_id, order.trader_id, order._seq,
+                len(self.orders), self.total_size
+            )
         self.orders.append(order)
         self.total_size += order.size
     
+    def unlink_order(self, order: Order) -> List[QueuePosition]:
+        """
+        Remove a resting order from this level in O(1).
+        
+        Returns:
+            Tracked queue positions that moved up as a result.
+        """
+        self.orders.remove(order)
+        self.total_size -= order.size
+        if not self.tracked:
+            return []
+        self.tracked.pop(order.order_id, None)
+        return self._advance_tracked(order._seq, 1, order.size)
+    
+    def fill_head(self, fill_size: int) -> List[QueuePosition]:
+        """
+        Execute `fill_size` against the front order, unlinking it when exhausted.
+        
+        Returns:
+            Tracked queue positions that moved up as a result.
+        """
+        head = self.orders.head
+        head.size -= fill_size
+        self.total_size -= fill_size
+        exhausted = head.size == 0
+        if exhausted:
+            self.orders.remove(head)
+        if not self.tracked:
+            return []
+        if exhausted:
+            self.tracked.pop(head.order_id, None)
+        return self._advance_tracked(head._seq, 1 if exhausted else 0, fill_size)
+    
+    def _advance_tracked(self, seq: int, count: int, size: int) -> List[QueuePosition]:
+        """Move tracked orders behind arrival stamp `seq` up the queue."""
+        changed = []
+        for qp in self.tracked.values():
+            if qp.seq > seq:
+                qp.position -= count
+                qp.shares_ahead -= size
+                changed.append(qp)
+        return changed
+    
+    def track(self, order: Order) -> QueuePosition:
+        """Start tracking a resting order, walking the queue once to seed its counters."""
+        qp = self.tracked.get(order.order_id)
+        if qp is not None:
+            return qp
+        position = 0
+        shares_ahead = 0
+        for resting in self.orders:
+            if resting is order:
+                break
+            position += 1
+            shares_ahead += resting.size
+        qp = QueuePosition(order.order_id, order.trader_id, order._seq, position, shares_ahead)
+        self.tracked[order.order_id] = qp
+        return qp
+    
     def remove_order(self, order_id: int) -> Optional[Order]:
-        """Remove order by ID from this level."""
-        for i, order in enumerate(self.orders):
-            if order.order_id == order_id:
-                removed = self.orders[i]
-                del self.orders[i]
-                self.total_size -= removed.size
-                return removed
-        return None
+        """Remove order by ID from this level in O(1)."""
+        order = self.orders.get(order_id)
+        if order is not None:
+            self.unlink_order(order)
+        return order
     
     def get_queue_position(self, order_id: int) -> Optional[int]:
         """Get the queue position of an order (0-indexed)."""
+        qp = self.tracked.get(order_id)
+        if qp is not None:
+            return qp.position
+        if self.orders.get(order_id) is None:
+            return None
         for i, order in enumerate(self.orders):
             if order.order_id == order_id:
                 return i
         return None
 
 
+class BookSide(dict):
+    """
+    One side of the book: {price_ticks: PriceLevel} with a sorted price index.
+    
+    Tick indices are mirrored in an ascending list maintained with bisect, so
+    the touch is an O(1) read and top-N depth is an O(N) slice instead of a
+    max()/sorted() over every key.
+    """
+    
+    __slots__ = ('is_bid', '_prices')
+    
+    def __init__(self, is_bid: bool):
+        super().__init__()
+        self.is_bid = is_bid
+        self._prices: List[int] = []
+    
+    def __setitem__(self, ticks: int, level: PriceLevel):
+        if ticks not in self:
+            insort(self._prices, ticks)
+        super().__setitem__(ticks, level)
+    
+    def __delitem__(self, ticks: int):
+        super().__delitem__(ticks)
+        del self._prices[bisect_left(self._prices, ticks)]
+    
+    def best(self) -> Optional[int]:
+        """Best tick on this side (highest bid / lowest ask)."""
+        if not self._prices:
+            return None
+        return self._prices[-1] if self.is_bid else self._prices[0]
+    
+    def top(self, levels: int) -> List[int]:
+        """Up to `levels` ticks ordered from the touch outwards."""
+        if self.is_bid:
+            return self._prices[:-levels - 1:-1] if levels > 0 else []
+        return self._prices[:levels]
+    
+    def size_at(self, ticks: int) -> int:
+        """Aggregate size resting at `ticks` (0 if no level)."""
+        level = self.get(ticks)
+        return 0 if level is None else level.total_size
+    
+    def fork(self) -> 'BookSide':
+        """Copy the index, sharing the PriceLevel objects themselves."""
+        forked = BookSide(self.is_bid)
+        dict.update(forked, self)
+        forked._prices = self._prices[:]
+        return forked
+
+
 class LimitOrderBook:
     """
     Event-driven Limit Order Book with realistic microstructure.
@@ -110,39 +578,104 @@ class LimitOrderBook:
     - Queue position tracking
     - Market impact
     - Latency simulation
+    
+    Prices are held internally as integer tick indices (price / tick_size);
+    floats only appear at the API boundary (order prices, fills, queries).
+    
+    Books can be forked cheaply (`fork`): price levels are shared between
+    the parent and the fork and copied lazily by whichever book first
+    mutates them, so orders are only copied level by level as they change.
+    
+    Fills and cancellations are recorded according to `fill_log`: "list"
+    (unbounded), "none", "ring" (last `fill_log_capacity` events) or
+    "columnar" (NumPy chunks of `fill_log_capacity` rows, flushed to
+    `fill_log_dir` if given). See `event_log` for details.
     """
     
-    def __init__(self, tick_size: float = 0.01):
+    def __init__(
+        self,
+        tick_size: float = 0.01,
+        fill_log: str = "list",
+        fill_log_capacity: int = 10000,
+        fill_log_dir: Optional[str] = None,
+        id_allocator: Optional[OrderIdAllocator] = None
+    ):
         self.tick_size = tick_size
+        # Decimal places of the tick, used to emit clean floats from ticks
+        self._price_decimals = price_decimals(tick_size)
         
-        # Price levels: {price: PriceLevel}
-        self.bids: Dict[float, PriceLevel] = {}
-        self.asks: Dict[float, PriceLevel] = {}
+        # Price levels: {price_ticks: PriceLevel}, each side with a sorted price index
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
         
         # Order tracking: {order_id: Order}
         self.orders: Dict[int, Order] = {}
         
+        # Queue-position tracking: owners whose orders are tracked from entry,
+        # and optional per-owner callbacks pushed a QueuePosition on each change
+        self._tracked_owners: Set[str] = set()
+        self._queue_listeners: Dict[str, Callable[[QueuePosition], None]] = {}
+        
+        # Copy-on-write token; levels owned by another token are shared with a fork
+        self._cow_token = object()
+        
         # Event log
-        self.fills: List[Fill] = []
-        self.cancellations: List[Tuple[int, float]] = []
+        self._log_config = dict(fill_log=fill_log, fill_log_capacity=fill_log_capacity,
+                                fill_log_dir=fill_log_dir)
+        self.fills = create_event_log(
+            fill_log, FILL_DTYPE, _fill_to_row, _row_to_fill,
+            capacity=fill_log_capacity, spill_dir=fill_log_dir, name="fills"
+        )
+        self.cancellations = create_event_log(
+            fill_log, CANCEL_DTYPE, tuple, _row_to_cancellation,
+            capacity=fill_log_capacity, spill_dir=fill_log_dir, name="cancellations"
+        )
         
         # Statistics
         self.total_volume = 0
         self.total_trades = 0
         self.current_time = 0.0
         
-        # Order ID counter
-        self._next_order_id = 1
+        # Order ids, shared with the rest of the simulation when one is passed in
+        self.id_allocator = id_allocator or OrderIdAllocator()
+        
+        # Reused columnar fill buffer for batch submission
+        self._batch_fills = FillBuffer()
+        
+        # Read caches, invalidated from the level-change hook:
+        # per side (levels, [(price, size)], deepest_ticks) for the touched side only,
+        # imbalance per depth, and the full snapshot keyed on the book version
+        self._book_version = 0
+        self._depth_cache: Dict[bool, Optional[Tuple[int, List[Tuple[float, int]], Optional[int]]]] = {
+            True: None, False: None
+        }
+        self._imbalance_cache: Dict[int, float] = {}
+        self._snapshot_cache: Optional[Tuple[int, Dict]] = None
+        
+        # Fill routing bus: owner code -> ledger callback for that owner's fills
+        self._fill_routes: Dict[int, Callable[[np.ndarray, bool], None]] = {}
+        
+        # Market data streams, each with its own gap-free sequence number
+        self._depth_listeners: List[Callable[[BookUpdate], None]] = []
+        self._trade_listeners: List[Callable[[TradePrint], None]] = []
+        self.depth_seq = 0
+        self.trade_seq = 0
     
-    def get_next_order_id(self) -> int:
-        """Generate unique order ID."""
-        order_id = self._next_order_id
-        self._next_order_id += 1
-        return order_id
+    def get_next_order_id(self, trader_id: str = "unknown") -> int:
+        """Allocate a unique order ID owned by `trader_id`."""
+        return self.id_allocator.allocate(trader_id)
+    
+    def to_ticks(self, price: float) -> int:
+        """Convert a float price to its nearest integer tick index."""
+        return int(round(price / self.tick_size))
+    
+    def to_price(self, ticks: int) -> float:
+        """Convert an integer tick index back to a float price."""
+        return ticks_to_price(ticks, self.tick_size)
     
     def round_price(self, price: float) -> float:
         """Round price to tick size."""
-        return round(price / self.tick_size) * self.tick_size
+        return self.to_price(self.to_ticks(price))
     
     def submit_order(self, order: Order) -> List[Fill]:
         """
@@ -158,109 +691,209 @@ class LimitOrderBook:
         elif order.order_type == OrderType.LIMIT:
             return self._process_limit_order(order)
         elif order.order_type == OrderType.CANCEL:
-            self._process_cancellation(order)
+            self._cancel_by_id(order.order_id)
             return []
         else:
             raise ValueError(f"Unknown order type: {order.order_type}")
     
+    def submit_batch(
+        self,
+        orders: Union[Sequence[Order], Mapping[str, np.ndarray]],
+        time_offset: float = 0.0
+    ) -> BatchResult:
+        """
+        Submit a time-sorted batch of orders in one tight loop.
+        
+        Args:
+            orders: An OrderBatch, a sequence of Order objects or columnar
+                arrays with keys 'order_id', 'is_buy', 'order_type'
+                (ORDER_TYPE_CODES), 'price_ticks', 'size', 'timestamp' and
+                optionally 'trader_id'.
+            time_offset: Added to every order timestamp (batches are often
+                generated relative to the start of a window).
+        
+        Fills are written into a preallocated columnar buffer rather than
+        Fill objects; resting Order objects are only created for columnar
+        limit orders that leave a remainder on the book.
+        
+        Returns:
+            BatchResult with fill records and per-order fill ranges.
+        """
+        if not isinstance(orders, (Mapping, Sequence)):
+            orders = orders.columns()  # OrderBatch
+        if isinstance(orders, Mapping):
+            n = len(orders['order_id'])
+            trader_ids = orders.get('trader_id')
+            rows = zip(
+                orders['order_id'].tolist(),
+                orders['is_buy'].tolist(),
+                orders['order_type'].tolist(),
+                orders['price_ticks'].tolist(),
+                orders['size'].tolist(),
+                orders['timestamp'].tolist(),
+                trader_ids.tolist() if trader_ids is not None else ["unknown"] * n,
+                [None] * n
+            )
+        else:
+            n = len(orders)
+            rows = (
+                (o.order_id, o.side == OrderSide.BUY, ORDER_TYPE_CODES[o.order_type],
+                 o.price_ticks, o.size, o.timestamp, o.trader_id, o)
+                for o in orders
+            )
+        
+        buffer = self._batch_fills
+        buffer.clear()
+        fill_start = [0] * n
+        fill_end = [0] * n
+        
+        for i, (order_id, is_buy, type_code, ticks, size, timestamp, trader_id, order) in enumerate(rows):
+            timestamp += time_offset
+            self.current_time = timestamp
+            fill_start[i] = buffer.count
+            
+            if type_code == LIMIT_CODE:
+                if ticks is None:
+                    ticks = self.to_ticks(order.price)
+                _, remaining = self._match(order_id, is_buy, size, ticks, buffer)
+                if remaining > 0:
+                    if order is None:
+                        order = Order.trusted(
+                            order_id, OrderSide.BUY if is_buy else OrderSide.SELL,
+                            OrderType.LIMIT, self.to_price(ticks), remaining,
+                            timestamp, trader_id=trader_id, price_ticks=ticks
+                        )
+                    else:
+                        order.price_ticks = ticks
+                        order.price = self.to_price(ticks)
+                        order.size = remaining
+                        order.timestamp = timestamp
+                    self._add_to_book(order)
+                elif order is not None:
+                    order.size = 0
+            elif type_code == MARKET_CODE:
+                self._match(order_id, is_buy, size, None, buffer)
+            elif type_code == CANCEL_CODE:
+                self._cancel_by_id(order_id)
+            else:
+                raise ValueError(f"Unknown order type code: {type_code}")
+            
+            fill_end[i] = buffer.count
+        
+        records = buffer.view().copy()
+        self._log_fill_records(records)
+        if self._fill_routes:
+            self._route_fills(records)
+        
+        return BatchResult(
+            fills=records,
+            fill_start=np.array(fill_start, dtype=np.int64),
+            fill_end=np.array(fill_end, dtype=np.int64)
+        )
+    
+    def _log_fill_records(self, records: np.ndarray):
+        """Append columnar fill records to the fill log."""
+        if hasattr(self.fills, 'extend_records'):
+            self.fills.extend_records(records)
+        else:
+            self.fills.extend(fills_from_records(records))
+    
     def _process_market_order(self, order: Order) -> List[Fill]:
         """Process a market order (takes liquidity)."""
-        fills = []
-        remaining_size = order.size
+        fills, _ = self._match(order.order_id, order.side == OrderSide.BUY, order.size, None)
+        return fills
+    
+    def _match(
+        self,
+        order_id: int,
+        is_buy: bool,
+        size: int,
+        limit_ticks: Optional[int],
+        fill_buffer: Optional[FillBuffer] = None
+    ) -> Tuple[List[Fill], int]:
+        """
+        Match an aggressive order against the opposite side of the book.
         
-        # Select appropriate side of book
-        book_side = self.asks if order.side == OrderSide.BUY else self.bids
+        Walks the opposite side from the touch outwards in price-time
+        priority, stopping once the order is filled, liquidity runs out or
+        the next level is beyond `limit_ticks` (None means no limit).
+        
+        Fills become Fill objects recorded in the fill log, or, if
+        `fill_buffer` is given, columnar records written to it instead.
         
-        if not book_side:
-            return fills  # No liquidity available
+        Returns:
+            (fills, remaining_size)
+        """
+        fills = []
+        remaining_size = size
+        side = OrderSide.BUY if is_buy else OrderSide.SELL
         
-        # Get sorted prices
-        prices = sorted(book_side.keys()) if order.side == OrderSide.BUY else sorted(book_side.keys(), reverse=True)
+        # Select appropriate side of book
+        book_side = self.asks if is_buy else self.bids
         
-        for price in prices:
-            if remaining_size <= 0:
+        # Walk the opposite side from the touch outwards
+        while remaining_size > 0 and book_side:
+            ticks = book_side.best()
+            if limit_ticks is not None and (ticks > limit_ticks if is_buy else ticks < limit_ticks):
                 break
             
-            level = book_side[price]
+            level = self._writable_level(book_side, ticks)
+            price = level.price
             
             while level.orders and remaining_size > 0:
-                passive_order = level.orders[0]
+                passive_order = level.orders.head
                 fill_size = min(remaining_size, passive_order.size)
                 
                 # Create fill
-                fill = Fill(
-                    order_id=order.order_id,
-                    price=price,
-                    size=fill_size,
-                    timestamp=self.current_time,
-                    aggressive_order_id=order.order_id,
-                    passive_order_id=passive_order.order_id,
-                    side=order.side
-                )
-                fills.append(fill)
+                if fill_buffer is None:
+                    fills.append(Fill(
+                        order_id=order_id,
+                        price=price,
+                        size=fill_size,
+                        timestamp=self.current_time,
+                        aggressive_order_id=order_id,
+                        passive_order_id=passive_order.order_id,
+                        side=side
+                    ))
+                else:
+                    fill_buffer.append((order_id, price, fill_size, self.current_time,
+                                        order_id, passive_order.order_id, is_buy))
+                if self._trade_listeners:
+                    self._print_trade(price, fill_size, side)
                 
-                # Update order
-                passive_order.size -= fill_size
-                level.total_size -= fill_size
+                # Update order (unlinked from the level if fully filled)
+                moved = level.fill_head(fill_size)
+                if moved:
+                    self._push_queue_updates(moved)
                 remaining_size -= fill_size
                 self.total_volume += fill_size
                 self.total_trades += 1
                 
                 # Remove if fully filled
                 if passive_order.size == 0:
-                    level.orders.popleft()
-                    # Safe deletion - check if exists first
-                    if passive_order.order_id in self.orders:
-                        del self.orders[passive_order.order_id]
+                    self.orders.pop(passive_order.order_id, None)
             
             # Clean up empty levels
             if level.total_size == 0:
-                del book_side[price]
+                del book_side[ticks]
+            self._on_level_change(book_side.is_bid, ticks, level.total_size)
         
-        self.fills.extend(fills)
-        return fills
+        if fills:
+            self.fills.extend(fills)
+            if self._fill_routes and fill_buffer is None:
+                self._route_fills(np.array([_fill_to_row(f) for f in fills], dtype=FILL_DTYPE))
+        return fills, remaining_size
     
     def _process_limit_order(self, order: Order) -> List[Fill]:
         """Process a limit order (can take and/or provide liquidity)."""
-        fills = []
-        order.price = self.round_price(order.price)
-        
-        # Check if order crosses the spread (aggressive)
-        if order.side == OrderSide.BUY:
-            best_ask = self.get_best_ask()
-            if best_ask is not None and order.price >= best_ask:
-                # Create temporary market order for crossing part
-                crossing_order = Order(
-                    order_id=order.order_id,
-                    side=order.side,
-                    order_type=OrderType.MARKET,
-                    price=0,
-                    size=order.size,
-                    timestamp=order.timestamp,
-                    trader_id=order.trader_id,
-                    latency=order.latency
-                )
-                fills = self._process_market_order(crossing_order)
-                
-                # Update remaining size
-                filled_size = sum(f.size for f in fills)
-                order.size -= filled_size
-        else:
-            best_bid = self.get_best_bid()
-            if best_bid is not None and order.price <= best_bid:
-                crossing_order = Order(
-                    order_id=order.order_id,
-                    side=order.side,
-                    order_type=OrderType.MARKET,
-                    price=0,
-                    size=order.size,
-                    timestamp=order.timestamp,
-                    trader_id=order.trader_id,
-                    latency=order.latency
-                )
-                fills = self._process_market_order(crossing_order)
-                filled_size = sum(f.size for f in fills)
-                order.size -= filled_size
+        if order.price_ticks is None:
+            order.price_ticks = self.to_ticks(order.price)
+        order.price = self.to_price(order.price_ticks)
+        
+        # Take liquidity up to the limit price; the remainder is updated in place
+        fills, order.size = self._match(
+            order.order_id, order.side == OrderSide.BUY, order.size, order.price_ticks
+        )
         
         # Add remaining to book if any
         if order.size > 0:
@@ -272,93 +905,379 @@ class LimitOrderBook:
         """Add order to the appropriate side of the book."""
         book_side = self.bids if order.side == OrderSide.BUY else self.asks
         
-        if order.price not in book_side:
-            book_side[order.price] = PriceLevel(price=order.price)
+        if order.price_ticks in book_side:
+            level = self._writable_level(book_side, order.price_ticks)
+        else:
+            level = PriceLevel(price=order.price, price_ticks=order.price_ticks,
+                               owner=self._cow_token)
+            book_side[order.price_ticks] = level
         
-        book_side[order.price].add_order(order)
+        level.add_order(order, track=order.trader_id in self._tracked_owners)
         self.orders[order.order_id] = order
+        self._on_level_change(book_side.is_bid, order.price_ticks, level.total_size)
     
     def _process_cancellation(self, cancel_order: Order):
         """Process order cancellation."""
-        if cancel_order.order_id not in self.orders:
-            return  # Order doesn't exist
+        self._cancel_by_id(cancel_order.order_id)
+    
+    def _cancel_by_id(self, order_id: int) -> bool:
+        """Remove a resting order by ID; returns False if it isn't resting."""
+        if self._remove_resting(order_id) is None:
+            return False  # Order doesn't exist
+        self.cancellations.append((order_id, self.current_time))
+        return True
+    
+    def _remove_resting(self, order_id: int) -> Optional[Order]:
+        """
+        Take a resting order off the book without logging a cancellation.
+        
+        Returns:
+            The book's copy of the order, or None if it isn't resting.
+        """
+        # The order is its own queue node, so unlinking it is O(1)
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
         
-        order = self.orders[cancel_order.order_id]
         book_side = self.bids if order.side == OrderSide.BUY else self.asks
         
-        if order.price in book_side:
-            level = book_side[order.price]
-            removed = level.remove_order(cancel_order.order_id)
-            
-            if removed:
-                # Safe deletion - check if exists first
-                if cancel_order.order_id in self.orders:
-                    del self.orders[cancel_order.order_id]
-                self.cancellations.append((cancel_order.order_id, self.current_time))
-                
-                # Clean up empty levels
-                if level.total_size == 0:
-                    del book_side[order.price]
+        # Copying a shared level replaces its orders, so look the order up again
+        level = self._writable_level(book_side, order.price_ticks)
+        order = self.orders.pop(order_id)
+        moved = level.unlink_order(order)
+        if moved:
+            self._push_queue_updates(moved)
+        
+        # Clean up empty levels
+        if level.total_size == 0:
+            del book_side[order.price_ticks]
+        self._on_level_change(book_side.is_bid, order.price_ticks, level.total_size)
+        return order
+    
+    def _reduce_order(self, order_id: int, reduction: int):
+        """Shrink a resting order in place, keeping its queue priority."""
+        order = self.orders[order_id]
+        book_side = self.bids if order.side == OrderSide.BUY else self.asks
+        level = self._writable_level(book_side, order.price_ticks)
+        order = self.orders[order_id]
+        
+        order.size -= reduction
+        level.total_size -= reduction
+        if level.tracked:
+            moved = level._advance_tracked(order._seq, 0, reduction)
+            if moved:
+                self._push_queue_updates(moved)
+        self._on_level_change(book_side.is_bid, order.price_ticks, level.total_size)
+    
+    def _writable_level(self, book_side: BookSide, ticks: int) -> PriceLevel:
+        """Get a level for mutation, copying it first if it is shared with a fork."""
+        level = book_side[ticks]
+        if level.owner is self._cow_token:
+            return level
+        
+        clone = PriceLevel(
+            price=level.price,
+            total_size=level.total_size,
+            price_ticks=level.price_ticks,
+            next_seq=level.next_seq,
+            owner=self._cow_token
+        )
+        self._copy_queue(level.orders, clone.orders)
+        clone.tracked = {oid: replace(qp) for oid, qp in level.tracked.items()}
+        
+        book_side[ticks] = clone
+        return clone
+    
+    def _copy_queue(self, source: OrderQueue, target: OrderQueue):
+        """Append copies of `source`'s orders to `target` and index the copies."""
+        for order in source:
+            order_copy = Order.trusted(
+                order.order_id, order.side, order.order_type, order.price, order.size,
+                order.timestamp, order.trader_id, order.latency, order.price_ticks
+            )
+            order_copy._seq = order._seq
+            target.append(order_copy)
+            self.orders[order.order_id] = order_copy
+    
+    def fork(self) -> 'LimitOrderBook':
+        """
+        Fork the book so both copies can evolve independently.
+        
+        Costs O(levels + orders) pointer copies for the indexes; PriceLevels
+        and their orders are shared until either book mutates one. The fork
+        starts with empty fill/cancellation logs and no subscribers.
+        """
+        forked = copy.copy(self)
+        
+        # New tokens for both books: every existing level becomes copy-on-write
+        self._cow_token = object()
+        forked._cow_token = object()
+        
+        forked.bids = self.bids.fork()
+        forked.asks = self.asks.fork()
+        forked.orders = dict(self.orders)
+        forked.id_allocator = self.id_allocator.copy()
+        forked._tracked_owners = set(self._tracked_owners)
+        forked._queue_listeners = {}
+        
+        forked.fills = create_event_log(
+            self._log_config['fill_log'], FILL_DTYPE, _fill_to_row, _row_to_fill,
+            capacity=self._log_config['fill_log_capacity'],
+            spill_dir=self._log_config['fill_log_dir'], name="fills"
+        )
+        forked.cancellations = create_event_log(
+            self._log_config['fill_log'], CANCEL_DTYPE, tuple, _row_to_cancellation,
+            capacity=self._log_config['fill_log_capacity'],
+            spill_dir=self._log_config['fill_log_dir'], name="cancellations"
+        )
+        forked._batch_fills = FillBuffer()
+        
+        forked._depth_cache = {True: None, False: None}
+        forked._imbalance_cache = {}
+        forked._snapshot_cache = None
+        forked._depth_listeners = []
+        forked._trade_listeners = []
+        forked._fill_routes = {}
+        
+        return forked
+    
+    def close(self):
+        """Drop the fill and cancellation logs, deleting any spilled chunk files."""
+        self.fills.clear()
+        self.cancellations.clear()
+    
+    def _on_level_change(self, is_bid: bool, ticks: int, total_size: int):
+        """
+        Hook called after the aggregate size at a price level changes.
+        
+        `total_size` is the level's new aggregate (0 once the level is gone).
+        Invalidates read caches and publishes depth updates to subscribers.
+        """
+        self._book_version += 1
+        
+        cache = self._depth_cache[is_bid]
+        if cache is not None:
+            levels, depth, deepest = cache
+            # A change strictly behind a full cached top-N cannot alter it
+            if len(depth) < levels or (ticks >= deepest if is_bid else ticks <= deepest):
+                self._depth_cache[is_bid] = None
+                self._imbalance_cache.clear()
+        
+        if self._depth_listeners:
+            self.depth_seq += 1
+            update = BookUpdate(self.depth_seq, self.current_time, is_bid, ticks,
+                                self.to_price(ticks), total_size)
+            for callback in self._depth_listeners:
+                callback(update)
+    
+    def subscribe_depth(self, callback: Callable[[BookUpdate], None]):
+        """
+        Subscribe to market-by-price deltas.
+        
+        `callback` receives a BookUpdate after every change to a level's
+        aggregate size, so downstream L2 state can be kept in sync in
+        O(changes) instead of polling full snapshots.
+        """
+        self._depth_listeners.append(callback)
+    
+    def subscribe_trades(self, callback: Callable[[TradePrint], None]):
+        """Subscribe to trade prints, one per fill, in execution order."""
+        self._trade_listeners.append(callback)
+    
+    def unsubscribe(self, callback: Callable):
+        """Remove a depth or trade subscription."""
+        for listeners in (self._depth_listeners, self._trade_listeners):
+            if callback in listeners:
+                listeners.remove(callback)
+    
+    def subscribe_fills(self, owner: str, callback: Callable[[np.ndarray, bool], None]):
+        """
+        Route every fill involving `owner`'s orders to `callback`.
+        
+        Owners are resolved through the id allocator's owner array, so each
+        fill is attributed with an array read even after its orders have
+        left the book. Fills are delivered in bulk once per submitted order
+        or batch, as `callback(records, as_passive)`: FILL_DTYPE records in
+        which the owner was the resting side (as_passive=True) or the
+        aggressor (as_passive=False).
+        """
+        self._fill_routes[self.id_allocator.owner_code(owner)] = callback
+    
+    def unsubscribe_fills(self, owner: str):
+        """Stop routing fills of `owner`."""
+        self._fill_routes.pop(self.id_allocator.owner_code(owner), None)
+    
+    def _route_fills(self, records: np.ndarray):
+        """Dispatch fill records to the ledgers of the owners involved."""
+        passive = self.id_allocator.owner_codes_of(records['passive_order_id'])
+        aggressive = self.id_allocator.owner_codes_of(records['aggressive_order_id'])
+        for code, callback in self._fill_routes.items():
+            for owners, as_passive in ((passive, True), (aggressive, False)):
+                mine = owners == code
+                if mine.any():
+                    callback(records[mine], as_passive)
+    
+    def _print_trade(self, price: float, size: int, side: OrderSide):
+        """Publish a trade print to subscribers."""
+        self.trade_seq += 1
+        trade = TradePrint(self.trade_seq, self.current_time, price, size, side)
+        for callback in self._trade_listeners:
+            callback(trade)
     
     def cancel_order(self, order_id: int) -> bool:
         """Cancel an order by ID."""
-        if order_id not in self.orders:
-            return False
-        
-        cancel = Order(
-            order_id=order_id,
-            side=OrderSide.BUY,  # Dummy value, not used
-            order_type=OrderType.CANCEL,
-            price=0,  # Not used for cancellations
-            size=1,  # Placeholder (passes validation, ignored by LOB)
-            timestamp=self.current_time
-        )
-        self._process_cancellation(cancel)
-        return True
+        return self._cancel_by_id(order_id)
+    
+    def modify_order(
+        self,
+        order_id: int,
+        new_size: Optional[int] = None,
+        new_price: Optional[float] = None
+    ) -> Optional[List[Fill]]:
+        """
+        Amend a resting limit order with exchange-style priority rules.
+        
+        - A size decrease at the same price keeps the order's place in its
+          queue; orders behind it see fewer shares ahead.
+        - A size increase or a price change loses priority: the order is
+          re-entered at the back of the queue, at a new price as a fresh
+          limit order that may trade if it crosses.
+        
+        The order keeps its ID either way, and amending is not logged as a
+        cancellation.
+        
+        Args:
+            order_id: Resting order to amend
+            new_size: New remaining size (unchanged if None)
+            new_price: New limit price (unchanged if None)
+        
+        Returns:
+            Fills generated by a repriced order that crossed (usually
+            empty), or None if the order isn't resting.
+        """
+        order = self.orders.get(order_id)
+        if order is None:
+            return None
+        if new_size is not None and new_size <= 0:
+            raise ValueError(f"new_size must be positive, got {new_size}; use cancel_order to remove")
+        
+        new_ticks = order.price_ticks if new_price is None else self.to_ticks(new_price)
+        if new_ticks <= 0:
+            raise ValueError(f"new_price must be positive, got {new_price}")
+        size = order.size if new_size is None else int(new_size)
+        if new_ticks == order.price_ticks and size == order.size:
+            return []
+        
+        if new_ticks == order.price_ticks and size < order.size:
+            # Shrink in place: priority is kept and everyone behind moves closer
+            self._reduce_order(order_id, order.size - size)
+            return []
+        
+        # Requeue: take the order off its level and re-enter it as a new arrival
+        order = self._remove_resting(order_id)
+        order.price_ticks = new_ticks
+        order.size = size
+        order.timestamp = self.current_time
+        return self._process_limit_order(order)
     
     def get_best_bid(self) -> Optional[float]:
         """Get best bid price."""
-        return max(self.bids.keys()) if self.bids else None
+        best_bid = self.bids.best()
+        return None if best_bid is None else self.to_price(best_bid)
     
     def get_best_ask(self) -> Optional[float]:
         """Get best ask price."""
-        return min(self.asks.keys()) if self.asks else None
+        best_ask = self.asks.best()
+        return None if best_ask is None else self.to_price(best_ask)
     
     def get_midprice(self) -> Optional[float]:
         """Get mid-price."""
-        best_bid = self.get_best_bid()
-        best_ask = self.get_best_ask()
+        best_bid = self.bids.best()
+        best_ask = self.asks.best()
         
         if best_bid is None or best_ask is None:
             return None
         
-        return (best_bid + best_ask) / 2
+        # Half-tick resolution needs one extra decimal place
+        return round((best_bid + best_ask) * self.tick_size / 2, self._price_decimals + 1)
+    
+    def get_midprice_excluding(self, order_ids: Iterable[Optional[int]]) -> Optional[float]:
+        """
+        Mid-price of the book as if the given resting orders were absent.
+        
+        Lets a quoting agent price off the market rather than its own quotes.
+        IDs that aren't resting (or None) are ignored.
+        """
+        own: Dict[Tuple[bool, int], int] = {}
+        for order_id in order_ids:
+            order = self.orders.get(order_id)
+            if order is not None:
+                key = (order.side == OrderSide.BUY, order.price_ticks)
+                own[key] = own.get(key, 0) + order.size
+        
+        touch = []
+        for book_side in (self.bids, self.asks):
+            # Each excluded order can empty at most one level
+            for ticks in book_side.top(len(own) + 1):
+                if book_side.size_at(ticks) > own.get((book_side.is_bid, ticks), 0):
+                    touch.append(ticks)
+                    break
+            else:
+                return None
+        
+        return round((touch[0] + touch[1]) * self.tick_size / 2, self._price_decimals + 1)
     
     def get_spread(self) -> Optional[float]:
         """Get bid-ask spread."""
-        best_bid = self.get_best_bid()
-        best_ask = self.get_best_ask()
+        best_bid = self.bids.best()
+        best_ask = self.asks.best()
         
         if best_bid is None or best_ask is None:
             return None
         
-        return best_ask - best_bid
+        return self.to_price(best_ask - best_bid)
     
     def get_book_depth(self, levels: int = 5) -> Dict:
         """
         Get L2 market depth.
         
+        Each side is served from a cache that is only rebuilt after a change
+        at or inside its cached top levels.
+        
         Returns:
             Dictionary with 'bids' and 'asks' lists of (price, size) tuples.
         """
-        bid_prices = sorted(self.bids.keys(), reverse=True)[:levels]
-        ask_prices = sorted(self.asks.keys())[:levels]
-        
         return {
-            'bids': [(p, self.bids[p].total_size) for p in bid_prices],
-            'asks': [(p, self.asks[p].total_size) for p in ask_prices]
+            'bids': self._side_depth(True, levels),
+            'asks': self._side_depth(False, levels)
         }
     
+    def _side_depth(self, is_bid: bool, levels: int) -> List[Tuple[float, int]]:
+        """Top `levels` (price, size) pairs of one side, from the cache when valid."""
+        cache = self._depth_cache[is_bid]
+        if cache is not None and cache[0] >= levels:
+            return cache[1][:levels]
+        
+        depth, deepest = self._compute_side_depth(is_bid, levels)
+        self._depth_cache[is_bid] = (levels, depth, deepest)
+        return depth[:]
+    
+    def _compute_side_depth(
+        self,
+        is_bid: bool,
+        levels: int
+    ) -> Tuple[List[Tuple[float, int]], Optional[int]]:
+        """
+        Compute the top `levels` of one side from the sorted price index.
+        
+        Returns:
+            ([(price, size), ...] from the touch outwards, deepest tick or None)
+        """
+        book_side = self.bids if is_bid else self.asks
+        ticks = book_side.top(levels)
+        depth = [(book_side[t].price, book_side[t].total_size) for t in ticks]
+        return depth, (ticks[-1] if ticks else None)
+    
     def get_order_book_imbalance(self, levels: int = 5) -> float:
         """
         Calculate order book imbalance.
@@ -366,44 +1285,110 @@ class LimitOrderBook:
         Returns:
             Imbalance in [-1, 1] where positive means more buying pressure.
         """
-        depth = self.get_book_depth(levels)
+        imbalance = self._imbalance_cache.get(levels)
+        if imbalance is not None:
+            return imbalance
         
-        bid_volume = sum(size for _, size in depth['bids'])
-        ask_volume = sum(size for _, size in depth['asks'])
+        bid_volume = sum(size for _, size in self._side_depth(True, levels))
+        ask_volume = sum(size for _, size in self._side_depth(False, levels))
         
         total = bid_volume + ask_volume
-        if total == 0:
-            return 0.0
+        imbalance = 0.0 if total == 0 else (bid_volume - ask_volume) / total
         
-        return (bid_volume - ask_volume) / total
+        self._imbalance_cache[levels] = imbalance
+        return imbalance
     
-    def get_queue_position(self, order_id: int) -> Optional[Tuple[int, int]]:
+    def track_queue(
+        self,
+        trader_id: str,
+        callback: Optional[Callable[[QueuePosition], None]] = None
+    ):
         """
-        Get queue position for an order.
+        Track queue position for every order `trader_id` rests from now on.
         
-        Returns:
-            (position, total_size_at_level) or None if order not found.
+        Tracked orders answer queue queries in O(1). If `callback` is given it
+        is pushed the updated QueuePosition whenever a fill or cancel ahead
+        moves one of the owner's orders up its queue.
         """
-        if order_id not in self.orders:
+        self._tracked_owners.add(trader_id)
+        if callback is not None:
+            self._queue_listeners[trader_id] = callback
+    
+    def untrack_queue(self, trader_id: str):
+        """Stop tracking new orders and pushing updates for `trader_id`."""
+        self._tracked_owners.discard(trader_id)
+        self._queue_listeners.pop(trader_id, None)
+    
+    def _push_queue_updates(self, moved: List[QueuePosition]):
+        """Notify subscribed owners of queue positions that changed."""
+        if not self._queue_listeners:
+            return
+        for qp in moved:
+            callback = self._queue_listeners.get(qp.trader_id)
+            if callback is not None:
+                callback(qp)
+    
+    def _queue_standing(self, order_id: int) -> Optional[Tuple[QueuePosition, PriceLevel]]:
+        """Tracked queue standing of a resting order, seeding it on first use."""
+        order = self.orders.get(order_id)
+        if order is None:
             return None
         
-        order = self.orders[order_id]
         book_side = self.bids if order.side == OrderSide.BUY else self.asks
-        
-        if order.price not in book_side:
+        level = book_side.get(order.price_ticks)
+        if level is None:
             return None
         
-        level = book_side[order.price]
-        position = level.get_queue_position(order_id)
+        qp = level.tracked.get(order_id)
+        if qp is None:
+            # Seeding tracking mutates the level
+            level = self._writable_level(book_side, order.price_ticks)
+            qp = level.track(self.orders[order_id])
+        return qp, level
+    
+    def get_queue_position(self, order_id: int) -> Optional[Tuple[int, int]]:
+        """
+        Get queue position for an order.
+        
+        The first query for an untracked order walks its level once; from then
+        on the position is maintained incrementally and read in O(1).
         
-        if position is None:
+        Returns:
+            (position, total_size_at_level) or None if order not found.
+        """
+        standing = self._queue_standing(order_id)
+        if standing is None:
             return None
         
-        return (position, level.total_size)
+        qp, level = standing
+        return (qp.position, level.total_size)
+    
+    def get_shares_ahead(self, order_id: int) -> Optional[int]:
+        """Get the resting volume ahead of an order in its queue."""
+        standing = self._queue_standing(order_id)
+        if standing is None:
+            return None
+        
+        return standing[0].shares_ahead
+    
+    def iter_fills(self):
+        """Stream recorded fills oldest first without materializing the log."""
+        return iter(self.fills)
     
     def get_state_snapshot(self) -> Dict:
-        """Get current state of the order book."""
-        return {
+        """
+        Get current state of the order book.
+        
+        The snapshot is cached until the book next changes; callers get a
+        shallow copy, and the nested depth lists should be treated as read-only.
+        """
+        cache = self._snapshot_cache
+        if cache is not None and cache[0] == self._book_version:
+            snapshot = dict(cache[1])
+            snapshot['timestamp'] = self.current_time
+            return snapshot
+        
+        snapshot = {
             'timestamp': self.current_time,
             'best_bid': self.get_best_bid(),
             'best_ask': self.get_best_ask(),
@@ -416,6 +1401,8 @@ class LimitOrderBook:
             'num_bid_levels': len(self.bids),
             'num_ask_levels': len(self.asks)
         }
+        self._snapshot_cache = (self._book_version, snapshot)
+        return dict(snapshot)
     
     def __repr__(self) -> str:
         """String representation of the order book."""
@@ -8,11 +8,16 @@ Implements realistic order arrival patterns including:
 - Volatility-dependent cancellation rates
 """
 
+import copy
 import numpy as np
-from typing import Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from dataclasses import dataclass
 
-from .order_book import Order, OrderType, OrderSide
+from .order_book import (
+    Order, OrderType, OrderSide, OrderIdAllocator, LIMIT_CODE, MARKET_CODE, CANCEL_CODE,
+    ticks_to_price
+)
+from .order_batch import OrderBatch, UNKNOWN_TRADER
 
 
 @dataclass
@@ -45,6 +50,9 @@ class OrderFlowConfig:
     # Latency parameters
     mean_latency: float = 0.001  # seconds
     latency_std: float = 0.0005
+    
+    # Time covered by each vectorized draw in generate_batch
+    batch_horizon: float = 10.0
 
 
 class VolatilityRegime:
@@ -71,6 +79,68 @@ class VolatilityRegime:
         return self.current_vol
 
 
+class ActiveOrderSet:
+    """
+    Set of live order ids with O(1) add, remove and uniform random choice.
+    
+    Ids are kept densely packed in a list with an id -> slot map; removal
+    moves the last id into the freed slot (swap-remove), so picking a
+    random element is a single index.
+    """
+    
+    __slots__ = ('_ids', '_slots')
+    
+    def __init__(self, order_ids: Iterable[int] = ()):
+        self._ids: List[int] = []
+        self._slots: Dict[int, int] = {}
+        self.extend(order_ids)
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __contains__(self, order_id: int) -> bool:
+        return order_id in self._slots
+    
+    def __iter__(self):
+        return iter(self._ids)
+    
+    def add(self, order_id: int):
+        if order_id not in self._slots:
+            self._slots[order_id] = len(self._ids)
+            self._ids.append(order_id)
+    
+    def extend(self, order_ids: Iterable[int]):
+        for order_id in order_ids:
+            self.add(order_id)
+    
+    def discard(self, order_id: int) -> bool:
+        """Remove an id if present; returns whether it was."""
+        slot = self._slots.pop(order_id, None)
+        if slot is None:
+            return False
+        last = self._ids.pop()
+        if slot < len(self._ids):
+            self._ids[slot] = last
+            self._slots[last] = slot
+        return True
+    
+    def pop_at(self, slot: int) -> int:
+        """Remove and return the id stored at `slot`."""
+        order_id = self._ids[slot]
+        self.discard(order_id)
+        return order_id
+    
+    def pop_random(self, u: float) -> int:
+        """Remove and return a uniformly chosen id given a uniform draw u in [0, 1)."""
+        return self.pop_at(int(u * len(self._ids)))
+    
+    def copy(self) -> 'ActiveOrderSet':
+        copied = ActiveOrderSet()
+        copied._ids = self._ids[:]
+        copied._slots = dict(self._slots)
+        return copied
+
+
 class OrderFlowGenerator:
     """
     Generates realistic order flow with stochastic arrivals.
@@ -83,7 +153,12 @@ class OrderFlowGenerator:
     - Realistic latency simulation
     """
     
-    def __init__(self, config: Optional[OrderFlowConfig] = None, seed: Optional[int] = None):
+    def __init__(
+        self,
+        config: Optional[OrderFlowConfig] = None,
+        seed: Optional[int] = None,
+        id_allocator: Optional[OrderIdAllocator] = None
+    ):
         self.config = config or OrderFlowConfig()
         self.rng = np.random.default_rng(seed)
         
@@ -94,11 +169,82 @@ class OrderFlowGenerator:
             switch_prob=self.config.volatility_regime_prob
         )
         
-        # Order ID tracking
+        # Order ID tracking: a local counter, or ids (and owners) from a
+        # simulation-wide allocator shared with the book
         self.next_order_id = 1
+        self.id_allocator = id_allocator
         
-        # Active orders for cancellation
-        self.active_orders = []
+        # Live orders cancellations are drawn from; kept in sync with the book
+        # through `remove_inactive`
+        self.active_orders = ActiveOrderSet()
+        
+        # Persistent arrival clocks: simulation time and the next arrival per event type
+        self.clock = 0.0
+        self._next_arrival: Optional[List[float]] = None
+        
+        # Variates drawn ahead by generate_batch, consumed from _drawn_pos
+        self._drawn: Optional[Dict[str, np.ndarray]] = None
+        self._drawn_pos = 0
+        self._drawn_until = 0.0
+    
+    def fork(self) -> 'OrderFlowGenerator':
+        """
+        Copy the generator, including its RNG and volatility regime state.
+        
+        The fork draws the same random stream as this generator would, but
+        independently of it.
+        """
+        forked = copy.copy(self)
+        forked.rng = np.random.Generator(type(self.rng.bit_generator)())
+        forked.rng.bit_generator.state = self.rng.bit_generator.state
+        forked.vol_regime = copy.copy(self.vol_regime)
+        forked.active_orders = self.active_orders.copy()
+        if self._next_arrival is not None:
+            forked._next_arrival = list(self._next_arrival)
+        return forked
+    
+    @property
+    def active_orders(self) -> ActiveOrderSet:
+        return self._active_orders
+    
+    @active_orders.setter
+    def active_orders(self, order_ids: Iterable[int]):
+        if not isinstance(order_ids, ActiveOrderSet):
+            order_ids = ActiveOrderSet(order_ids)
+        self._active_orders = order_ids
+    
+    @property
+    def id_allocator(self) -> Optional[OrderIdAllocator]:
+        return self._id_allocator
+    
+    @id_allocator.setter
+    def id_allocator(self, allocator: Optional[OrderIdAllocator]):
+        self._id_allocator = allocator
+        # Owner code of each background trader number
+        self._trader_owners = None if allocator is None else np.array(
+            [allocator.owner_code(f"trader_{i}") for i in range(100)], dtype=np.int32)
+    
+    def _new_order_ids(self, traders: np.ndarray) -> np.ndarray:
+        """Allocate ids for new orders from the given background trader numbers."""
+        if self._id_allocator is None:
+            order_ids = self.next_order_id + np.arange(len(traders), dtype=np.int64)
+            self.next_order_id += len(traders)
+            return order_ids
+        return self._id_allocator.allocate_block(self._trader_owners[traders])
+    
+    def _new_order_id(self, trader: int) -> int:
+        """Allocate the id of one new order from background trader `trader`."""
+        if self._id_allocator is None:
+            order_id = self.next_order_id
+            self.next_order_id += 1
+            return order_id
+        return self._id_allocator.allocate(f"trader_{trader}")
+    
+    def remove_inactive(self, order_ids: Iterable[int]):
+        """Drop orders that have left the book (fully filled) from cancellation candidates."""
+        discard = self._active_orders.discard
+        for order_id in order_ids:
+            discard(order_id)
     
     def generate_arrival_times(self, duration: float, rate: float) -> np.ndarray:
         """
@@ -153,18 +299,15 @@ class OrderFlowGenerator:
             self.config.spread_offset_std_ticks
         )))
         
-        offset = offset_ticks * self.config.tick_size
-        
-        # Set price based on side
+        # Set price in the integer tick domain based on side
+        tick_size = self.config.tick_size
         if side == OrderSide.BUY:
             # Place below midprice
-            price = midprice - spread/2 - offset
+            price_ticks = int(round((midprice - spread/2) / tick_size)) - offset_ticks
         else:
             # Place above midprice
-            price = midprice + spread/2 + offset
-        
-        # Round to tick size
-        price = round(price / self.config.tick_size) * self.config.tick_size
+            price_ticks = int(round((midprice + spread/2) / tick_size)) + offset_ticks
+        price_ticks = max(1, price_ticks)
         
         # Generate latency
         latency = max(0, self.rng.normal(
@@ -176,19 +319,20 @@ class OrderFlowGenerator:
         order_size = self.generate_order_size()
         assert order_size > 0, f"Generated invalid order size: {order_size}"
         
-        order = Order(
-            order_id=self.next_order_id,
+        trader = int(self.rng.integers(1, 100))
+        order = Order.trusted(
+            order_id=self._new_order_id(trader),
             side=side,
             order_type=OrderType.LIMIT,
-            price=price,
+            price=ticks_to_price(price_ticks, tick_size),
             size=order_size,
             timestamp=timestamp,
-            trader_id=f"trader_{self.rng.integers(1, 100)}",
-            latency=latency
+            trader_id=f"trader_{trader}",
+            latency=latency,
+            price_ticks=price_ticks
         )
         
-        self.next_order_id += 1
-        self.active_orders.append(order.order_id)
+        self.active_orders.add(order.order_id)
         
         return order
     
@@ -210,19 +354,18 @@ class OrderFlowGenerator:
             self.config.latency_std
         ))
         
-        order = Order(
-            order_id=self.next_order_id,
+        size = self.generate_order_size()
+        trader = int(self.rng.integers(1, 100))
+        return Order.trusted(
+            order_id=self._new_order_id(trader),
             side=side,
             order_type=OrderType.MARKET,
             price=0,  # Market orders don't have a limit price
-            size=self.generate_order_size(),
+            size=size,
             timestamp=timestamp,
-            trader_id=f"trader_{self.rng.integers(1, 100)}",
+            trader_id=f"trader_{trader}",
             latency=latency
         )
-        
-        self.next_order_id += 1
-        return order
     
     def generate_cancellation(self, timestamp: float) -> Optional[Order]:
         """
@@ -238,12 +381,10 @@ class OrderFlowGenerator:
             return None
         
         # Select random order to cancel
-        order_id = self.rng.choice(self.active_orders)
-        self.active_orders.remove(order_id)
+        order_id = self.active_orders.pop_random(self.rng.random())
         
         # Cancellation orders use size=1 as placeholder (will be ignored by LOB)
-        # This avoids validation errors while maintaining clarity
-        return Order(
+        return Order.trusted(
             order_id=order_id,
             side=OrderSide.BUY,  # Dummy value, not used for cancellations
             order_type=OrderType.CANCEL,
@@ -324,6 +465,248 @@ class OrderFlowGenerator:
         
         return orders, np.array(volatilities)
     
+    def _draw_interarrival(self, rate: float) -> float:
+        """Exponential waiting time until the next event of a Poisson process."""
+        return self.rng.exponential(1.0 / rate) if rate > 0 else np.inf
+    
+    def _batch_arrivals(self, end_time: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Draw every arrival up to `end_time` from the per-type clocks at once.
+        
+        Given a type's pending next arrival t0 <= end_time, the remaining
+        arrivals in (t0, end_time] are a Poisson count placed uniformly, and by
+        memorylessness the following arrival is end_time plus an exponential
+        wait, so the stream matches the event-by-event clocks in distribution.
+        
+        Returns:
+            (times, type_codes) sorted by time
+        """
+        rates = (
+            self.config.limit_order_rate,
+            self.config.market_order_rate,
+            self.config.cancellation_rate
+        )
+        if self._next_arrival is None:
+            self._next_arrival = [self.clock + self._draw_interarrival(rate) for rate in rates]
+        
+        times = []
+        codes = []
+        for code, rate in zip((LIMIT_CODE, MARKET_CODE, CANCEL_CODE), rates):
+            first = self._next_arrival[code]
+            if first > end_time:
+                continue
+            n = self.rng.poisson(rate * (end_time - first))
+            type_times = np.empty(n + 1)
+            type_times[0] = first
+            type_times[1:] = np.sort(self.rng.uniform(first, end_time, n))
+            times.append(type_times)
+            codes.append(np.full(n + 1, code, dtype=np.int8))
+            self._next_arrival[code] = end_time + self._draw_interarrival(rate)
+        
+        if not times:
+            return np.empty(0), np.empty(0, dtype=np.int8)
+        times = np.concatenate(times)
+        codes = np.concatenate(codes)
+        order = np.argsort(times, kind='stable')
+        return times[order], codes[order]
+    
+    def _draw_batch(self, end_time: float):
+        """
+        Draw every mid-independent random component of the arrivals up to
+        `end_time` in single vectorized calls and append them to the buffer.
+        
+        Prices depend on the midprice and spread at pull time, so only their
+        tick offsets are drawn here; `generate_batch` finishes them. Order ids
+        and cancellation targets depend on the book at pull time as well, so
+        only the uniform picking each target is drawn ahead.
+        """
+        cfg = self.config
+        rng = self.rng
+        previous_time = self.clock
+        if self._drawn is not None and len(self._drawn['timestamp']):
+            previous_time = float(self._drawn['timestamp'][-1])
+        times, codes = self._batch_arrivals(end_time)
+        n = len(times)
+        
+        # Regime after each event's switch draw, continuing from the last drawn event
+        high_vol_before = (bool(self._drawn['high_vol'][-1])
+                           if self._drawn is not None and len(self._drawn['high_vol'])
+                           else self.vol_regime.is_high_vol)
+        high_vol = (np.cumsum(rng.random(n) < self.vol_regime.switch_prob) % 2 == 1) ^ high_vol_before
+        drift_z = rng.normal(0.0, 1.0, n)
+        elapsed = np.diff(times, prepend=previous_time)
+        
+        is_limit = codes == LIMIT_CODE
+        is_market = codes == MARKET_CODE
+        is_cancel = codes == CANCEL_CODE
+        is_new = ~is_cancel
+        num_limit = int(is_limit.sum())
+        num_new = n - int(is_cancel.sum())
+        
+        is_buy = np.zeros(n, dtype=np.bool_)
+        is_buy[is_limit] = rng.random(num_limit) < 0.5
+        is_buy[is_market] = rng.random(num_new - num_limit) < cfg.market_order_prob_buy
+        
+        # Signed tick offset from the touch: below for bids, above for asks
+        offsets = np.zeros(n, dtype=np.int64)
+        offsets[is_limit] = np.maximum(0, np.trunc(rng.normal(
+            cfg.mean_spread_offset_ticks, cfg.spread_offset_std_ticks, num_limit))).astype(np.int64)
+        offsets[is_limit & is_buy] *= -1
+        
+        size = np.ones(n, dtype=np.int64)
+        raw_sizes = np.trunc(rng.normal(cfg.mean_order_size, cfg.order_size_std, num_new))
+        size[is_new] = np.maximum(1, np.clip(raw_sizes, max(1, cfg.min_order_size),
+                                             cfg.max_order_size)).astype(np.int64)
+        
+        latency = np.zeros(n)
+        latency[is_new] = np.maximum(0.0, rng.normal(cfg.mean_latency, cfg.latency_std, num_new))
+        
+        trader = np.full(n, UNKNOWN_TRADER, dtype=np.int64)
+        trader[is_new] = rng.integers(1, 100, num_new)
+        
+        cancel_u = np.zeros(n)
+        cancel_u[is_cancel] = rng.random(n - num_new)
+        
+        drawn = dict(
+            is_buy=is_buy, order_type=codes, offset=offsets, size=size,
+            timestamp=times, latency=latency, trader=trader, cancel_u=cancel_u,
+            high_vol=high_vol, drift_z=drift_z, elapsed=elapsed
+        )
+        if self._drawn is not None:
+            start = self._drawn_pos
+            drawn = {name: np.concatenate((self._drawn[name][start:], column))
+                     for name, column in drawn.items()}
+        self._drawn = drawn
+        self._drawn_pos = 0
+        self._drawn_until = end_time
+    
+    def _resolve_orders(self, rows: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Allocate ids for a pulled window's new orders and pick the order each
+        cancellation removes.
+        
+        Cancellations target a uniformly random active order, including limit
+        orders that arrived earlier in the window. Resolving them when the
+        window is pulled, rather than when it is drawn, means fills synced
+        through `remove_inactive` since the last pull are already excluded.
+        
+        Returns:
+            (order_id, keep): ids per row, and which rows are real orders
+            (False for cancellations that found no active order)
+        """
+        codes = rows['order_type']
+        is_cancel = codes == CANCEL_CODE
+        is_new = ~is_cancel
+        order_id = np.zeros(len(codes), dtype=np.int64)
+        order_id[is_new] = self._new_order_ids(rows['trader'][is_new])
+        keep = np.ones(len(codes), dtype=np.bool_)
+        
+        active = self.active_orders
+        is_limit = codes == LIMIT_CODE
+        limit_ids = order_id[is_limit].tolist()
+        cancel_pos = np.flatnonzero(is_cancel)
+        limits_before = np.searchsorted(np.flatnonzero(is_limit), cancel_pos).tolist()
+        added = 0
+        for pos, num_before, u in zip(cancel_pos.tolist(), limits_before,
+                                      rows['cancel_u'][cancel_pos].tolist()):
+            if num_before > added:
+                active.extend(limit_ids[added:num_before])
+                added = num_before
+            if not active:
+                keep[pos] = False
+                continue
+            order_id[pos] = active.pop_random(u)
+        active.extend(limit_ids[added:])
+        return order_id, keep
+    
+    def generate_batch(
+        self,
+        end_time: float,
+        midprice: float = 100.0,
+        spread: float = 0.02
+    ) -> Tuple[OrderBatch, np.ndarray]:
+        """
+        Stream the orders arriving between the current clock and `end_time`
+        as one OrderBatch.
+        
+        Each order type keeps its own next-arrival clock, so the merged stream
+        is the same superposition of independent Poisson processes as
+        `generate_order_flow_sequence`, but continues across calls:
+        consecutive windows need no regeneration, and the price drift
+        advances over true elapsed time.
+        
+        Sides, offsets, sizes, latencies, trader ids, regime switches and
+        drift shocks are drawn one `config.batch_horizon` at a time in
+        single NumPy calls, so pulling a short window is a handful of array
+        slices. Everything that depends on the book is settled at pull time:
+        prices and volatilities from the supplied midprice and spread and the
+        current regime parameters, and order ids and cancellation targets
+        from the active orders (a sequential pass over the cancellations).
+        
+        The same seed and horizon always yield the same orders, however the
+        run is split into windows, as long as the same orders are removed
+        through `remove_inactive` between pulls. The stream consumes the RNG
+        differently from the per-order `generate_*` methods, so mixing the
+        two on one generator changes the orders either one produces.
+        
+        Args:
+            end_time: Absolute time to generate up to (inclusive)
+            midprice: Current mid-price the drift model starts from
+            spread: Current spread
+        
+        Returns:
+            (batch, volatilities) with absolute timestamps and one volatility
+            value per arrival
+        """
+        # Draw whole horizons on a fixed time grid, so how a run is split into
+        # windows never changes which variates each order gets
+        horizon = self.config.batch_horizon
+        while self._drawn is None or self._drawn_until < end_time:
+            drawn_until = self._drawn_until if self._drawn is not None else self.clock
+            self._draw_batch((np.floor(drawn_until / horizon) + 1) * horizon)
+        
+        start = self._drawn_pos
+        stop = int(np.searchsorted(self._drawn['timestamp'], end_time, side='right'))
+        rows = {name: column[start:stop] for name, column in self._drawn.items()}
+        self._drawn_pos = stop
+        self.clock = max(self.clock, end_time)
+        
+        regime = self.vol_regime
+        volatilities = np.where(rows['high_vol'], regime.base_vol * regime.high_vol_multiplier,
+                                regime.base_vol)
+        if stop > start:
+            regime.is_high_vol = bool(rows['high_vol'][-1])
+            regime.current_vol = float(volatilities[-1])
+        
+        # Drift and spread seen by each event (updated after the previous one)
+        drift = rows['drift_z'] * volatilities * np.sqrt(rows['elapsed'])
+        mids = midprice + np.cumsum(drift) - drift
+        spreads = spread * (1 + volatilities / self.config.base_volatility)
+        spreads = np.concatenate(([spread], spreads[:-1]))[:len(spreads)]
+        
+        # Limit prices in the integer tick domain
+        is_limit = rows['order_type'] == LIMIT_CODE
+        half_spread = np.where(rows['is_buy'], -spreads, spreads) / 2
+        price_ticks = np.where(
+            is_limit,
+            np.maximum(1, np.round((mids + half_spread) / self.config.tick_size).astype(np.int64)
+                       + rows['offset']),
+            0
+        )
+        
+        order_id, keep = self._resolve_orders(rows)
+        batch = OrderBatch(
+            order_id=order_id[keep],
+            is_buy=rows['is_buy'][keep],
+            order_type=rows['order_type'][keep],
+            price_ticks=price_ticks[keep],
+            size=rows['size'][keep],
+            timestamp=rows['timestamp'][keep],
+            latency=rows['latency'][keep],
+            trader=rows['trader'][keep]
+        )
+        return batch, volatilities
+    
     def get_current_volatility(self) -> float:
         """Get current volatility level."""
         return self.vol_regime.get_current()
@@ -334,7 +717,11 @@ class OrderFlowGenerator:
     
     def reset(self):
         """Reset the generator state."""
-        self.active_orders = []
+        self.active_orders = ActiveOrderSet()
         self.next_order_id = 1
+        self.clock = 0.0
+        self._next_arrival = None
+        self._drawn = None
+        self._drawn_pos = 0
         self.vol_regime.is_high_vol = False
         self.vol_regime.current_vol = self.vol_regime.base_vol
@@ -0,0 +1,126 @@
+"""
+Parallel Monte Carlo runs of MarketSimulator across processes.
+
+Runs are seeded from child streams of one root SeedSequence, sharded across a
+ProcessPoolExecutor, and returned as columnar state histories. Each run's seed
+depends only on its index, so results are identical for any worker count.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .market_simulator import MarketSimulator, SimulationConfig, MarketStateHistory
+
+
+def spawn_seeds(num_runs: int, root_seed: Optional[int] = None) -> List[int]:
+    """
+    Derive independent per-run seeds from a root seed.
+    
+    Each seed is drawn from its own `SeedSequence.spawn` child, so streams do
+    not overlap. Passing a seed to `SimulationConfig(seed=...)` reproduces
+    that single run.
+    """
+    children = np.random.SeedSequence(root_seed).spawn(num_runs)
+    return [int(child.generate_state(1, np.uint64)[0]) for child in children]
+
+
+def _run_shard(
+    config: SimulationConfig,
+    seeds: List[int],
+    duration: float,
+    time_step: Optional[float]
+) -> List[Tuple[Dict, Dict[str, np.ndarray]]]:
+    """Run one shard of seeds in a worker; return (summary, history columns) per run."""
+    results = []
+    for seed in seeds:
+        simulator = MarketSimulator(replace(config, seed=seed))
+        summary = simulator.run_simulation(duration, time_step)
+        columns = {name: np.ascontiguousarray(column)
+                   for name, column in simulator.get_state_history().arrays().items()}
+        results.append((summary, columns))
+    return results
+
+
+def run_parallel_simulations(
+    num_runs: int,
+    duration: float,
+    config: Optional[SimulationConfig] = None,
+    time_step: Optional[float] = None,
+    max_workers: Optional[int] = None,
+    shards_per_worker: int = 4
+) -> Dict:
+    """
+    Run `num_runs` independent simulations in parallel and merge the results.
+    
+    Args:
+        num_runs: Number of simulations
+        duration: Simulated time per run
+        config: Shared configuration; its seed is the root of every run's seed
+        time_step: Time step size (uses config default if None)
+        max_workers: Worker processes (all cores if None; 1 runs in-process)
+        shards_per_worker: Shards per worker, for load balancing
+    
+    Returns:
+        Dictionary with:
+        - 'seeds': seed of each run
+        - 'runs': each run's run_simulation summary
+        - 'per_seed': numeric summary fields as (num_runs,) arrays
+        - 'history': state history fields as (num_runs, T) arrays
+        - 'pooled': statistics over every step of every run
+    """
+    if num_runs <= 0:
+        raise ValueError(f"num_runs must be positive, got {num_runs}")
+    config = config or SimulationConfig()
+    max_workers = max_workers or os.cpu_count() or 1
+    seeds = spawn_seeds(num_runs, config.seed)
+    
+    # Contiguous shards, gathered in submission order
+    num_shards = min(num_runs, max_workers * shards_per_worker)
+    shards = [[seeds[i] for i in shard] for shard in np.array_split(np.arange(num_runs), num_shards)]
+    if max_workers == 1:
+        shard_results = [_run_shard(config, shard, duration, time_step) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, num_shards)) as executor:
+            futures = [executor.submit(_run_shard, config, shard, duration, time_step)
+                       for shard in shards]
+            shard_results = [future.result() for future in futures]
+    results = [result for shard in shard_results for result in shard]
+    
+    runs = [summary for summary, _ in results]
+    history = {name: np.stack([columns[name] for _, columns in results])
+               for name in MarketStateHistory.FIELDS}
+    per_seed = {
+        key: np.array([run[key] for run in runs])
+        for key in ('total_trades', 'total_volume', 'num_fills', 'avg_midprice', 'midprice_std',
+                    'avg_spread', 'spread_std', 'avg_imbalance', 'avg_volatility')
+    }
+    
+    midprices = history['midprice']
+    # Per-run log returns, pooled, so runs' different price levels don't mix
+    returns = np.diff(np.log(midprices), axis=1)
+    pooled = {
+        'num_runs': num_runs,
+        'total_trades': int(per_seed['total_trades'].sum()),
+        'total_volume': int(per_seed['total_volume'].sum()),
+        'num_fills': int(per_seed['num_fills'].sum()),
+        'avg_midprice': float(midprices.mean()),
+        'midprice_std': float(midprices.std()),
+        'final_midprice_std': float(midprices[:, -1].std()) if midprices.shape[1] else 0.0,
+        'return_std': float(returns.std()) if returns.size else 0.0,
+        'avg_spread': float(history['spread'].mean()),
+        'spread_std': float(history['spread'].std()),
+        'avg_imbalance': float(history['imbalance'].mean()),
+        'avg_volatility': float(history['volatility'].mean())
+    }
+    
+    return {
+        'seeds': seeds,
+        'runs': runs,
+        'per_seed': per_seed,
+        'history': history,
+        'pooled': pooled
+    }
@@ -0,0 +1,85 @@
+"""
+Unit tests for the array-backed Limit Order Book.
+"""
+
+import pytest
+import numpy as np
+from src.simulation.order_book import LimitOrderBook, Order, OrderType, OrderSide
+from src.simulation.array_order_book import ArrayLimitOrderBook
+
+
+class TestArrayLimitOrderBook:
+    """Test the dense array-backed book against the dict-backed one."""
+    
+    def _fill_books(self, books):
+        rng = np.random.default_rng(7)
+        for i in range(300):
+            side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+            offset = int(rng.integers(0, 30)) * 0.01
+            price = 99.99 - offset if side == OrderSide.BUY else 100.01 + offset
+            kind = OrderType.MARKET if rng.random() < 0.1 else OrderType.LIMIT
+            size = int(rng.integers(1, 200))
+            for book in books:
+                book.submit_order(Order(i, side, kind, price, size, float(i)))
+            if i % 7 == 0:
+                cancel_id = int(rng.integers(0, i + 1))
+                for book in books:
+                    book.cancel_order(cancel_id)
+    
+    def test_matches_dict_book(self):
+        """Test depth and imbalance agree with LimitOrderBook."""
+        lob = LimitOrderBook(tick_size=0.01)
+        alob = ArrayLimitOrderBook(tick_size=0.01, band_ticks=64, center_price=100.0)
+        self._fill_books([lob, alob])
+        
+        for levels in (1, 5, 10, 40):
+            assert alob.get_book_depth(levels) == lob.get_book_depth(levels)
+            assert alob.get_order_book_imbalance(levels) == pytest.approx(
+                lob.get_order_book_imbalance(levels))
+        assert list(alob.fills) == list(lob.fills)
+        for order_id in lob.orders:
+            assert alob.get_queue_position(order_id) == lob.get_queue_position(order_id)
+    
+    def test_only_tracked_levels_keep_price_levels(self):
+        """Test untracked ticks live in the ladder while tracked ones keep queue standing."""
+        alob = ArrayLimitOrderBook(tick_size=0.01, band_ticks=64, center_price=100.0)
+        alob.track_queue("mm")
+        alob.submit_order(Order(1, OrderSide.BUY, OrderType.LIMIT, 99.98, 40, 0.0))
+        alob.submit_order(Order(2, OrderSide.BUY, OrderType.LIMIT, 99.99, 30, 0.0))
+        alob.submit_order(Order(3, OrderSide.BUY, OrderType.LIMIT, 99.99, 20, 0.0, "mm"))
+        assert list(alob.bids.levels) == [9999]
+        assert alob.bids.size_at(9999) == 50
+        
+        alob.submit_order(Order(4, OrderSide.SELL, OrderType.MARKET, 0, 10, 1.0))
+        assert alob.get_queue_position(3) == (1, 40)
+        assert alob.get_shares_ahead(3) == 20
+        
+        alob.submit_order(Order(5, OrderSide.SELL, OrderType.MARKET, 0, 60, 2.0))
+        assert alob.bids.levels == {}
+        assert alob.get_book_depth()['bids'] == [(99.98, 20)]
+    
+    def test_widens_band_instead_of_dropping_levels(self):
+        """Test a book wider than the band grows it and keeps every level."""
+        alob = ArrayLimitOrderBook(tick_size=0.01, band_ticks=16, center_price=100.0)
+        alob.submit_order(Order(1, OrderSide.BUY, OrderType.LIMIT, 99.95, 10, 0.0))
+        alob.submit_order(Order(2, OrderSide.SELL, OrderType.LIMIT, 100.40, 20, 0.0))
+        
+        assert alob.band_ticks == 64 and alob.num_recenters == 1
+        assert alob.get_book_depth() == {'bids': [(99.95, 10)], 'asks': [(100.40, 20)]}
+        with pytest.raises(ValueError):
+            alob.recenter(10015, band_ticks=16)
+    
+    def test_recenters_on_drift(self):
+        """Test the band follows the touch when price drifts out of it."""
+        alob = ArrayLimitOrderBook(tick_size=0.01, band_ticks=32, center_price=100.0)
+        alob.submit_order(Order(1, OrderSide.BUY, OrderType.LIMIT, 100.50, 10, 0.0))
+        alob.submit_order(Order(2, OrderSide.SELL, OrderType.LIMIT, 100.52, 20, 0.0))
+        
+        depth = alob.get_depth_arrays(1)
+        assert alob.num_recenters == 1
+        assert depth['bid_prices'].tolist() == [100.50]
+        assert depth['ask_sizes'].tolist() == [20]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,147 @@
+"""
+Unit tests for the batched market simulator.
+"""
+
+import pytest
+import numpy as np
+from src.simulation.market_simulator import SimulationConfig
+from src.simulation.order_flow import OrderFlowConfig
+from src.simulation.batched_simulator import BatchedMarketSimulator
+from src.simulation.parallel_runner import spawn_seeds
+
+
+class TestBatchedMarketSimulator:
+    """Test lockstep simulation of many markets."""
+    
+    def test_output_shapes(self):
+        """Test per-step histories come out as (K, T) arrays."""
+        sim = BatchedMarketSimulator(8, SimulationConfig(seed=1))
+        stats = sim.run_simulation(5.0)
+        
+        assert stats['history']['midprice'].shape == (8, 50)
+        assert stats['timestamp'].shape == (50,)
+        assert stats['avg_spread'].shape == (8,)
+        assert (stats['history']['spread'] > 0).all()
+        assert (stats['total_volume'] > 0).all()
+        assert np.abs(stats['history']['imbalance']).max() <= 1.0
+    
+    def test_reproducible(self):
+        """Test the same seed gives the same paths."""
+        first = BatchedMarketSimulator(4, SimulationConfig(seed=3)).run_simulation(2.0)
+        second = BatchedMarketSimulator(4, SimulationConfig(seed=3)).run_simulation(2.0)
+        np.testing.assert_array_equal(first['history']['midprice'], second['history']['midprice'])
+    
+    def test_markets_reproduce_alone(self):
+        """Test each market's path depends only on its own seed."""
+        batch = BatchedMarketSimulator(4, SimulationConfig(seed=3))
+        stats = batch.run_simulation(2.0)
+        assert stats['seeds'] == spawn_seeds(4, 3)
+        
+        alone = BatchedMarketSimulator(1, SimulationConfig(seed=3), seeds=[stats['seeds'][2]])
+        single = alone.run_simulation(2.0)
+        for name, column in stats['history'].items():
+            np.testing.assert_array_equal(column[2], single['history'][name][0])
+        
+        with pytest.raises(ValueError):
+            BatchedMarketSimulator(2, seeds=[1])
+    
+    def test_books_stay_consistent(self):
+        """Test ladders never go negative or cross, including across recenters."""
+        sim = BatchedMarketSimulator(16, SimulationConfig(seed=4), band_ticks=32)
+        for _ in range(300):
+            state = sim.step(0.1)
+            assert (sim.bid_sizes >= 0).all() and (sim.ask_sizes >= 0).all()
+            assert ((sim.bid_orders > 0) == (sim.bid_sizes > 0)).all()
+            assert ((sim.ask_orders > 0) == (sim.ask_sizes > 0)).all()
+            both = ~np.isnan(state['best_bid']) & ~np.isnan(state['best_ask'])
+            assert (state['best_bid'][both] < state['best_ask'][both]).all()
+        assert sim.num_recenters > 0
+    
+    def test_market_order_sweeps_levels(self):
+        """Test an aggressive order consumes levels from the touch."""
+        sim = BatchedMarketSimulator(2, SimulationConfig(seed=0))
+        sim._bid_touch, sim._ask_touch = sim._best_indices()
+        best_ask = sim._ask_touch.copy()
+        
+        remaining = sim._sweep(np.array([0, 1]), np.array([True, False]), np.array([250, 50]))
+        
+        assert remaining.tolist() == [0, 0]
+        assert sim.ask_sizes[0, best_ask[0]] == 0
+        assert sim.ask_sizes[0, best_ask[0] + 1] == 0
+        assert sim.ask_sizes[0, best_ask[0] + 2] == 120 - 40
+        assert sim.total_volume.tolist() == [250, 50]
+        assert sim.num_trades.tolist() == [3, 1]
+    
+    def test_trades_count_fills(self):
+        """Test sweeping a level of several orders counts one fill per order matched."""
+        sim = BatchedMarketSimulator(2, SimulationConfig(seed=0))
+        sim._bid_touch, sim._ask_touch = sim._best_indices()
+        best_ask = sim._ask_touch.copy()
+        sim.ask_orders[:, best_ask[0]] = 4  # Four orders of 25
+        
+        sim._sweep(np.array([0, 1]), np.array([True, True]), np.array([100, 60]))
+        
+        assert sim.num_trades.tolist() == [4, 3]
+        assert sim.ask_orders[:, best_ask[0]].tolist() == [0, 2]
+        assert sim.ask_sizes[1, best_ask[0]] == 40
+    
+    def test_recenter_reports_dropped_volume(self):
+        """Test size shifted out of the band on a recenter is counted."""
+        sim = BatchedMarketSimulator(2, SimulationConfig(seed=0), band_ticks=64)
+        best_bid, best_ask = sim._best_indices()
+        sim.bid_sizes[0, 0] = 30
+        sim.bid_orders[0, 0] = 1
+        sim.ask_sizes[0, best_ask[0]:] = 0
+        sim.ask_orders[0, best_ask[0]:] = 0
+        sim.ask_sizes[0, 60] = 50  # Ask touch near the top edge
+        sim.ask_orders[0, 60] = 1
+        
+        best_bid, best_ask = sim._best_indices()
+        sim._recenter(best_bid, best_ask)
+        
+        assert sim.num_recenters == 1
+        assert sim.dropped_volume.tolist() == [30, 0]
+        assert sim.ask_sizes[0].sum() == 50
+    
+    def test_limits_beyond_band_trade_and_count_remainder(self):
+        """Test a limit priced past the band edge sweeps the band and counts what cannot rest."""
+        sim = BatchedMarketSimulator(3, SimulationConfig(seed=0), band_ticks=64)
+        sim._bid_touch, sim._ask_touch = sim._best_indices()
+        asks = sim.ask_sizes.sum(axis=1)
+        bids = sim.bid_sizes.sum(axis=1)
+        
+        # Market 0's mid has run above the band, market 1's below it
+        sim._place_limits(np.array([0, 1, 2]), np.array([True, False, True]),
+                          np.array([200, -50, 10]), np.array([asks[0] + 300, bids[1] + 70, 40]))
+        
+        assert sim.total_volume.tolist() == [asks[0], bids[1], 0]
+        assert sim.dropped_volume.tolist() == [300, 70, 0]
+        assert sim.ask_sizes[0].sum() == 0 and sim.bid_sizes[1].sum() == 0
+        assert sim.bid_sizes[2, 10] == 40
+    
+    def test_drift_past_band_is_accounted(self):
+        """Test volume stays accounted for when prices drift past the band within a step."""
+        config = SimulationConfig(seed=2, order_flow_config=OrderFlowConfig(
+            base_volatility=0.5, cancellation_rate=0.0, market_order_rate=0.0))
+        sim = BatchedMarketSimulator(4, config, band_ticks=32)
+        submitted = np.zeros(4, dtype=np.int64)
+        place_limits = sim._place_limits
+        
+        def counting_place_limits(rows, is_buy, index, size):
+            submitted[rows] += size
+            place_limits(rows, is_buy, index, size)
+        
+        sim._place_limits = counting_place_limits
+        resting = sim.bid_sizes.sum(axis=1) + sim.ask_sizes.sum(axis=1)
+        for _ in range(20):
+            sim.step(1.0)
+        
+        # Each trade removes its size from the aggressor and the resting book
+        now = sim.bid_sizes.sum(axis=1) + sim.ask_sizes.sum(axis=1)
+        assert (sim.dropped_volume > 0).any()
+        np.testing.assert_array_equal(
+            now, resting + submitted - 2 * sim.total_volume - sim.dropped_volume)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -6,7 +6,10 @@ import pytest
 import numpy as np
 import gymnasium as gym
 from src.environments.market_making_env import MarketMakingEnv, MarketMakingConfig
+from src.environments.vector_market_making_env import VectorMarketMakingEnv
+from src.environments.shared_memory_vector_env import SharedMemoryVectorEnv
 from src.simulation.market_simulator import SimulationConfig
+from src.simulation.parallel_runner import spawn_seeds
 
 
 class TestMarketMakingEnv:
@@ -37,6 +40,17 @@ class TestMarketMakingEnv:
         assert 'time' in info
         assert 'pnl' in info
     
+    def test_reset_seed_replays_episode(self, env):
+        """Test resets with the same seed give the same observations."""
+        action = np.array([2.0, 2.0, 100.0, 100.0])
+        runs = []
+        for _ in range(2):
+            obs, _ = env.reset(seed=7)
+            runs.append([obs] + [env.step(action)[0] for _ in range(3)])
+        
+        for first, second in zip(*runs):
+            np.testing.assert_array_equal(first, second)
+    
     def test_step(self, env):
         """Test environment step."""
         env.reset(seed=42)
@@ -129,6 +143,32 @@ class TestMarketMakingEnv:
         
         # Should eventually terminate (either max steps or inventory limit)
         assert terminated or truncated
+    
+    def test_requote_on_change_keeps_resting_quotes(self):
+        """Test unchanged quotes stay on the book under the same ID."""
+        config = MarketMakingConfig(
+            episode_duration=10.0,
+            requote_on_change=True,
+            simulation_config=SimulationConfig(seed=5)
+        )
+        env = MarketMakingEnv(config)
+        env.reset()
+        
+        bid_ids, ask_ids = set(), set()
+        for _ in range(10):
+            env.step(np.array([10.0, 10.0, 50.0, 50.0]))
+            bid_ids.add(env.active_bid_id)
+            ask_ids.add(env.active_ask_id)
+            assert env.bid_target[1] == env.ask_target[1] == 50
+        
+        # Without amends every step would place a new pair of quotes
+        assert len(bid_ids) + len(ask_ids) < 20
+        
+        # A size decrease amends in place
+        bid_id = env.active_bid_id
+        env.step(np.array([10.0, 10.0, 20.0, 50.0]))
+        assert env.active_bid_id == bid_id
+        assert env.simulator.lob.orders[bid_id].size == 20
 
 
 class TestRewardFunction:
@@ -169,5 +209,183 @@ class TestRewardFunction:
         assert isinstance(reward, float)
 
 
+class TestVectorMarketMakingEnv:
+    """Test the vectorized environment."""
+    
+    def _config(self, seed):
+        return MarketMakingConfig(
+            episode_duration=20.0,
+            time_step=1.0,
+            simulation_config=SimulationConfig(seed=seed)
+        )
+    
+    def test_single_spaces_match_single_env(self):
+        """Test the config-only spaces equal MarketMakingEnv's."""
+        config = MarketMakingConfig(max_inventory=500, max_quote_size=200)
+        observation_space, action_space = VectorMarketMakingEnv.single_spaces(config)
+        env = MarketMakingEnv(config)
+        assert observation_space == env.observation_space
+        assert action_space == env.action_space
+    
+    def test_batched_shapes(self):
+        """Test observations and rewards are batched over envs."""
+        venv = VectorMarketMakingEnv(4, self._config(1))
+        assert isinstance(venv, gym.vector.VectorEnv)
+        
+        obs, info = venv.reset()
+        assert obs.shape == (4, 9) and obs.dtype == np.float32
+        assert info['pnl'].shape == (4,)
+        
+        obs, rewards, terminated, truncated, info = venv.step(np.tile([2.0, 2.0, 100.0, 100.0], (4, 1)))
+        assert obs.shape == (4, 9)
+        assert rewards.shape == terminated.shape == truncated.shape == (4,)
+    
+    def test_matches_single_envs(self):
+        """Test each env reproduces MarketMakingEnv on the same seed."""
+        venv = VectorMarketMakingEnv(2, self._config(3))
+        envs = [MarketMakingEnv(self._config(seed)) for seed in spawn_seeds(2, 3)]
+        venv.reset()
+        for env in envs:
+            env.reset()
+        
+        rng = np.random.default_rng(0)
+        for _ in range(5):
+            actions = rng.uniform([0, 0, 10, 10], [10, 10, 500, 500], (2, 4))
+            obs, rewards, _, _, _ = venv.step(actions)
+            for i, env in enumerate(envs):
+                single_obs, single_reward, _, _, _ = env.step(actions[i])
+                np.testing.assert_allclose(obs[i], single_obs)
+                assert rewards[i] == pytest.approx(single_reward)
+    
+    def test_requote_on_change_matches_single_envs(self):
+        """Test the amend-in-place quoting mode also matches MarketMakingEnv."""
+        config = self._config(4)
+        config.requote_on_change = True
+        venv = VectorMarketMakingEnv(2, config)
+        envs = []
+        for seed in spawn_seeds(2, 4):
+            single_config = self._config(seed)
+            single_config.requote_on_change = True
+            envs.append(MarketMakingEnv(single_config))
+        venv.reset()
+        for env in envs:
+            env.reset()
+        
+        rng = np.random.default_rng(1)
+        for _ in range(5):
+            actions = rng.uniform([0, 0, 10, 10], [10, 10, 500, 500], (2, 4)).round()
+            obs, rewards, _, _, _ = venv.step(actions)
+            for i, env in enumerate(envs):
+                single_obs, single_reward, _, _, _ = env.step(actions[i])
+                np.testing.assert_allclose(obs[i], single_obs)
+                assert rewards[i] == pytest.approx(single_reward)
+                assert venv.active_bid_ids[i] == env.active_bid_id
+    
+    def test_autoreset(self):
+        """Test finished envs reset in the same step and report their final observation."""
+        config = self._config(2)
+        config.episode_duration = 3.0
+        venv = VectorMarketMakingEnv(2, config)
+        venv.reset()
+        
+        actions = np.tile([5.0, 5.0, 10.0, 10.0], (2, 1))
+        for _ in range(2):
+            venv.step(actions)
+        obs, _, _, truncated, info = venv.step(actions)
+        
+        assert truncated.all()
+        assert info['_final_obs'].all()
+        assert info['final_obs'][0].shape == (9,)
+        assert (venv.current_step == 0).all()
+        assert (obs[:, 2] == 0).all()  # Fresh inventory
+
+
+class TestSharedMemoryVectorEnv:
+    """Test the subprocess vector environment."""
+    
+    def test_matches_in_process_env(self):
+        """Test workers reproduce VectorMarketMakingEnv, including parameter updates."""
+        config = MarketMakingConfig(
+            episode_duration=5.0,
+            time_step=1.0,
+            simulation_config=SimulationConfig(seed=4)
+        )
+        venv = SharedMemoryVectorEnv(3, config, num_workers=2)
+        reference = VectorMarketMakingEnv(3, config)
+        try:
+            obs, info = venv.reset()
+            reference_obs, _ = reference.reset()
+            np.testing.assert_allclose(obs, reference_obs)
+            assert info['inventory'].dtype == np.int64
+            
+            rng = np.random.default_rng(1)
+            for t in range(6):
+                if t == 2:
+                    venv.set_market_params(base_volatility=0.05)
+                    reference.set_market_params(base_volatility=0.05)
+                actions = rng.uniform([0, 0, 10, 10], [10, 10, 500, 500], (3, 4))
+                obs, rewards, terminated, truncated, info = venv.step(actions)
+                reference_obs, reference_rewards, _, reference_truncated, reference_info = reference.step(actions)
+                
+                np.testing.assert_allclose(obs, reference_obs)
+                np.testing.assert_allclose(rewards, reference_rewards)
+                np.testing.assert_array_equal(truncated, reference_truncated)
+                if truncated.any():
+                    np.testing.assert_allclose(info['final_obs'][0], reference_info['final_obs'][0])
+            assert info['volatility'].min() >= 0.05
+        finally:
+            venv.close()
+    
+    def test_reset_seeds_reach_workers(self):
+        """Test reset seeds reseed the envs in the workers."""
+        config = MarketMakingConfig(episode_duration=5.0, time_step=1.0)
+        venv = SharedMemoryVectorEnv(2, config, num_workers=2)
+        reference = VectorMarketMakingEnv(2, config)
+        try:
+            venv.reset(seed=9)
+            reference.reset(seed=9)
+            actions = np.tile([2.0, 2.0, 100.0, 100.0], (2, 1))
+            for _ in range(3):
+                obs, rewards, _, _, _ = venv.step(actions)
+                reference_obs, reference_rewards, _, _, _ = reference.step(actions)
+                np.testing.assert_allclose(obs, reference_obs)
+                np.testing.assert_allclose(rewards, reference_rewards)
+        finally:
+            venv.close()
+    
+    def test_killed_worker_raises(self):
+        """Test a worker killed outright fails the step instead of hanging."""
+        venv = SharedMemoryVectorEnv(2, MarketMakingConfig(), num_workers=2, timeout=5.0)
+        venv.reset()
+        venv._processes[1].kill()
+        venv._processes[1].join()
+        
+        with pytest.raises(RuntimeError, match="exited with code"):
+            venv.step(np.tile([2.0, 2.0, 100.0, 100.0], (2, 1)))
+        assert venv.closed
+    
+    def test_worker_error_raises(self, monkeypatch):
+        """Test an exception in a worker fails the step with its traceback."""
+        def failing_step(self, actions):
+            raise ValueError("bad actions")
+        
+        monkeypatch.setattr(VectorMarketMakingEnv, 'step', failing_step)
+        venv = SharedMemoryVectorEnv(2, MarketMakingConfig(), num_workers=2, context='fork')
+        venv.reset()
+        
+        with pytest.raises(RuntimeError, match="bad actions"):
+            venv.step(np.tile([2.0, 2.0, 100.0, 100.0], (2, 1)))
+        assert venv.closed
+    
+    def test_rejects_unknown_params(self):
+        """Test only supported parameters cross the process boundary."""
+        venv = SharedMemoryVectorEnv(1, MarketMakingConfig(), num_workers=1)
+        try:
+            with pytest.raises(ValueError):
+                venv.set_market_params(tick_size=0.1)
+        finally:
+            venv.close()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
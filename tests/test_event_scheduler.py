@@ -0,0 +1,72 @@
+"""
+Unit tests for latency-aware order delivery.
+"""
+
+import pytest
+import numpy as np
+from src.simulation.order_book import LimitOrderBook, Order, OrderType, OrderSide
+from src.simulation.order_batch import OrderBatch
+from src.simulation.event_scheduler import EventScheduler
+
+
+class TestEventScheduler:
+    """Test latency-aware delivery of orders to the book."""
+    
+    def test_delivers_in_arrival_order(self):
+        """Test a slow order sent first loses the race to a fast one."""
+        lob = LimitOrderBook(tick_size=0.01)
+        scheduler = EventScheduler(lob)
+        lob.submit_order(Order(1, OrderSide.SELL, OrderType.LIMIT, 100.0, 50, 0.0))
+        
+        scheduler.schedule(Order(2, OrderSide.BUY, OrderType.MARKET, 0, 50, 1.0, "slow", latency=0.5))
+        scheduler.schedule(Order(3, OrderSide.BUY, OrderType.MARKET, 0, 50, 1.2, "fast", latency=0.1))
+        assert scheduler.next_arrival() == pytest.approx(1.3)
+        
+        delivered, result = scheduler.run_until(1.4)
+        assert [o.order_id for o in delivered] == [3]
+        assert result.fills_for(0)['size'].tolist() == [50]
+        assert delivered[0].timestamp == pytest.approx(1.3)
+        
+        delivered, result = scheduler.run_until(2.0)
+        assert [o.order_id for o in delivered] == [2]
+        assert len(result) == 0
+        assert len(scheduler) == 0
+    
+    def test_ties_keep_scheduling_order(self):
+        """Test simultaneous arrivals are delivered first-scheduled first."""
+        lob = LimitOrderBook(tick_size=0.01)
+        scheduler = EventScheduler(lob)
+        scheduler.schedule_many([
+            Order(i, OrderSide.BUY, OrderType.LIMIT, 99.0, 10, 0.0) for i in range(5)
+        ], time_offset=1.0)
+        
+        delivered, _ = scheduler.run_until(1.0)
+        assert [o.order_id for o in delivered] == list(range(5))
+        assert lob.get_queue_position(4) == (4, 50)
+    
+    def test_batches_interleave_with_single_orders(self):
+        """Test batch rows and individually scheduled orders merge by arrival."""
+        lob = LimitOrderBook(tick_size=0.01)
+        scheduler = EventScheduler(lob)
+        batch = OrderBatch(
+            order_id=np.array([1, 2]), is_buy=np.array([True, False]),
+            order_type=np.array([0, 0], dtype=np.int8), price_ticks=np.array([9900, 10100]),
+            size=np.array([10, 20]), timestamp=np.array([0.0, 0.0]),
+            latency=np.array([0.3, 0.1]), trader=np.array([5, 6])
+        )
+        scheduler.schedule_batch(batch)
+        scheduler.schedule(Order(3, OrderSide.BUY, OrderType.LIMIT, 99.0, 30, 0.0, "mm", latency=0.2))
+        assert len(scheduler) == 3
+        
+        delivered, _ = scheduler.run_until(0.25)
+        assert [o.order_id for o in delivered] == [2, 3]
+        delivered, _ = scheduler.run_until(1.0)
+        assert isinstance(delivered, OrderBatch)
+        assert delivered.order_id.tolist() == [1]
+        assert delivered.timestamp.tolist() == [0.3]
+        assert lob.get_queue_position(1) == (1, 40)
+        assert lob.orders[1].trader_id == "trader_5"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
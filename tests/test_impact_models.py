@@ -171,6 +171,20 @@ class TestImpactTracker:
         
         assert perm_immediate == perm_later
     
+    def test_repeated_queries_decay_once(self, tracker):
+        """Test querying impact twice at the same time gives the same result."""
+        tracker.add_trade(1.0, 100, 100.0)
+        
+        first = tracker.get_total_impact(3.0)
+        second = tracker.get_total_impact(3.0)
+        assert second == first
+        
+        # Decay over [1, 3] then [3, 5] equals decay over [1, 5]
+        split = tracker.get_temporary_impact(5.0)
+        single = ImpactTracker(tracker.impact_model, decay_rate=0.5)
+        single.add_trade(1.0, 100, 100.0)
+        assert split == pytest.approx(single.get_temporary_impact(5.0))
+    
     def test_reset(self, tracker):
         """Test tracker reset."""
         tracker.add_trade(1.0, 100, 100.0)
@@ -0,0 +1,56 @@
+"""
+Unit tests for market data streams.
+"""
+
+import pytest
+import numpy as np
+from src.simulation.order_book import LimitOrderBook, Order, OrderType, OrderSide
+from src.simulation.market_data import L2BookMirror, MarketDataRecorder
+
+
+class TestMarketDataStreams:
+    """Test incremental L2 deltas and trade prints."""
+    
+    def _random_flow(self, lob, n=300, seed=11):
+        rng = np.random.default_rng(seed)
+        for i in range(n):
+            side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+            kind = OrderType.MARKET if rng.random() < 0.15 else OrderType.LIMIT
+            price = 100.0 + int(rng.integers(-8, 9)) * 0.01
+            lob.submit_order(Order(i, side, kind, price, int(rng.integers(1, 80)), float(i)))
+            if i % 5 == 0:
+                lob.cancel_order(int(rng.integers(0, i + 1)))
+    
+    def test_mirror_tracks_book(self):
+        """Test a delta-fed mirror reproduces the book's depth."""
+        lob = LimitOrderBook(tick_size=0.01)
+        lob.submit_order(Order(1000, OrderSide.BUY, OrderType.LIMIT, 99.5, 10, 0.0))
+        mirror = L2BookMirror()
+        mirror.attach(lob)
+        
+        self._random_flow(lob)
+        
+        assert mirror.get_book_depth(50) == lob.get_book_depth(50)
+        assert mirror.num_gaps == 0
+    
+    def test_recorder_replay(self):
+        """Test recorded streams replay into an equivalent mirror and trade tape."""
+        lob = LimitOrderBook(tick_size=0.01)
+        recorder = MarketDataRecorder()
+        recorder.attach(lob)
+        self._random_flow(lob)
+        
+        trades = recorder.get_trades()
+        assert trades['size'].sum() == lob.total_volume
+        
+        mirror = L2BookMirror(tick_size=0.01)
+        replayed_trades = []
+        MarketDataRecorder.replay(recorder.get_updates(), trades,
+                                  on_update=mirror.apply, on_trade=replayed_trades.append)
+        
+        assert mirror.get_book_depth(50) == lob.get_book_depth(50)
+        assert len(replayed_trades) == lob.total_trades
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
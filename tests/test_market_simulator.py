@@ -0,0 +1,212 @@
+"""
+Unit tests for the market simulator.
+"""
+
+import gc
+import pytest
+import numpy as np
+from src.simulation.order_book import Order, OrderType, OrderSide, CANCEL_CODE
+from src.simulation.market_simulator import MarketSimulator, SimulationConfig, MarketStateHistory
+
+
+class TestMarketStateHistory:
+    """Test the columnar market state history."""
+    
+    def _row(self, i):
+        return (i * 0.1, 100.0 + i, 0.02, None if i == 0 else 99.99, 100.01, 0.0, 0.02, 10 * i, i)
+    
+    def test_growable_history(self):
+        """Test columns grow and round-trip to MarketState."""
+        history = MarketStateHistory(initial_size=2)
+        for i in range(5):
+            row = self._row(i)
+            history.append(row[:3] + (np.nan if row[3] is None else row[3],) + row[4:])
+        
+        assert len(history) == 5
+        assert history.column('midprice').tolist() == [100.0, 101.0, 102.0, 103.0, 104.0]
+        assert history[0].best_bid is None
+        assert history[-1].num_trades == 4
+        assert [state.total_volume for state in history] == [0, 10, 20, 30, 40]
+        with pytest.raises(ValueError):
+            history.column('midprice')[0] = 1.0
+    
+    def test_ring_history(self):
+        """Test ring mode keeps the latest steps as a contiguous view."""
+        history = MarketStateHistory(capacity=3)
+        for i in range(1, 8):
+            history.append(self._row(i))
+        
+        midprices = history.column('midprice')
+        assert midprices.tolist() == [105.0, 106.0, 107.0]
+        assert midprices.base is not None  # A view, not a copy
+        assert len(history) == 3 and history.total == 7
+        assert history[0].timestamp == pytest.approx(0.5)
+        
+        # Slices return MarketState lists, as the old list history did
+        assert [state.midprice for state in history[-2:]] == [106.0, 107.0]
+        assert [state.num_trades for state in history[::2]] == [5, 7]
+        assert history[5:] == []
+    
+    def test_simulation_statistics(self):
+        """Test run_simulation summarizes the recorded columns."""
+        sim = MarketSimulator(SimulationConfig(seed=5, history_capacity=50))
+        stats = sim.run_simulation(10.0)
+        
+        states = sim.get_state_history()
+        assert len(states) == 50 and states.total == 100
+        assert stats['avg_spread'] == pytest.approx(states.column('spread').mean())
+        assert stats['final_state'] == sim.get_market_state()
+
+
+class TestSimulatorFork:
+    """Test copy-on-write forks of the simulator."""
+    
+    def test_simulator_branches_replay_identically(self):
+        """Test forks of one simulator state evolve identically and independently."""
+        sim = MarketSimulator(SimulationConfig(seed=11))
+        sim.register_market_maker("mm")
+        for _ in range(5):
+            sim.step(0.1)
+        
+        snapshot = sim.snapshot()
+        branch_a = snapshot.fork()
+        branch_b = snapshot.fork()
+        sim.step(0.1)
+        branch_a.step(0.1)
+        branch_b.submit_mm_order("mm", OrderSide.BUY, 99.0, 10)
+        branch_b.step(0.1)
+        
+        assert branch_a.get_market_state() == sim.get_market_state()
+        assert branch_a.get_book_snapshot() == sim.get_book_snapshot()
+        assert len(snapshot.get_state_history()) == 5
+        assert snapshot.get_mm_state("mm")['num_orders'] == 0
+        assert branch_b.get_mm_state("mm")['num_orders'] == 1
+    
+    def test_spilled_logs_are_removed(self, tmp_path):
+        """Test reset, close and discarding a fork delete spilled log chunks."""
+        sim = MarketSimulator(SimulationConfig(seed=12, fill_log="columnar",
+                                               fill_log_capacity=4, fill_log_dir=str(tmp_path)))
+        for _ in range(20):
+            sim.step(0.1)
+        spilled = set(tmp_path.iterdir())
+        assert spilled
+        
+        branch = sim.fork()
+        for _ in range(20):
+            branch.step(0.1)
+        assert set(tmp_path.iterdir()) > spilled
+        del branch
+        gc.collect()
+        assert set(tmp_path.iterdir()) == spilled
+        
+        sim.reset()
+        assert not set(tmp_path.iterdir()) & spilled
+        sim.step(2.0)
+        sim.close()
+        assert not list(tmp_path.iterdir())
+
+
+class TestLatencyMode:
+    """Test latency-aware delivery of MM orders."""
+    
+    def test_simulator_latency_mode(self):
+        """Test the simulator delivers MM orders after their latency."""
+        config = SimulationConfig(seed=3, enable_latency=True, mm_latency=0.15)
+        sim = MarketSimulator(config)
+        sim.step(0.1)
+        
+        order_id = sim.submit_mm_order("mm", OrderSide.BUY, 99.5, 10)
+        assert order_id not in sim.lob.orders
+        sim.step(0.1)
+        assert order_id not in sim.lob.orders
+        sim.step(0.1)
+        assert sim.lob.orders[order_id].timestamp == pytest.approx(0.25)
+        assert sim.scheduler.num_delivered > 0
+
+
+class TestCancellationCandidates:
+    """Test the simulator keeps cancellation candidates in sync with the book."""
+    
+    def test_synced_with_book_fills(self):
+        """Test fully filled orders stop being cancellation candidates."""
+        sim = MarketSimulator(SimulationConfig(seed=8, fill_log="list"))
+        sim.run_simulation(50.0)
+        
+        filled_out = {fill.passive_order_id for fill in sim.lob.fills} - set(sim.lob.orders)
+        active = set(sim.order_flow.active_orders)
+        assert filled_out
+        assert not filled_out & active
+    
+    def test_cancels_target_resting_orders(self):
+        """Test cancellations only pick orders still resting after earlier windows' fills."""
+        sim = MarketSimulator(SimulationConfig(seed=1))
+        submit_batch = sim.lob.submit_batch
+        stale = []
+        
+        def checked_submit(batch, *args, **kwargs):
+            cancel = batch.order_type == CANCEL_CODE
+            in_window = set(batch.order_id[~cancel].tolist())
+            stale.extend(order_id for order_id in batch.order_id[cancel].tolist()
+                         if order_id not in sim.lob.orders and order_id not in in_window)
+            return submit_batch(batch, *args, **kwargs)
+        
+        sim.lob.submit_batch = checked_submit
+        sim.run_simulation(200.0)
+        assert stale == []
+
+
+class TestOrderIds:
+    """Test the simulation-wide order id space."""
+    
+    def test_simulator_ids_do_not_collide(self):
+        """Test generated, initial and MM orders share one id space."""
+        sim = MarketSimulator(SimulationConfig(seed=12))
+        sim.step(1.0)
+        mm_order = sim.submit_mm_order("mm", OrderSide.BUY, 99.0, 10)
+        sim.step(1.0)
+        
+        allocator = sim.lob.id_allocator
+        assert allocator.owner_of(mm_order) == "mm"
+        assert allocator.owner_of(1) == "liquidity_provider"
+        for order in sim.lob.orders.values():
+            assert allocator.owner_of(order.order_id) == order.trader_id
+    
+    def test_mm_credited_after_order_leaves_book(self):
+        """Test fills are attributed even once the passive order is gone."""
+        sim = MarketSimulator(SimulationConfig(seed=12))
+        sim.register_market_maker("mm")
+        ask_id = sim.submit_mm_order("mm", OrderSide.SELL, 100.0, 30)
+        
+        sim.lob.submit_order(Order(
+            sim.lob.get_next_order_id(), OrderSide.BUY, OrderType.MARKET, 0, 30, 0.0))
+        assert ask_id not in sim.lob.orders
+        assert sim.mm_inventory["mm"] == -30
+        
+        # Aggressive MM fills are credited too
+        sim.submit_mm_order("mm", OrderSide.BUY, 100.01, 50)
+        assert sim.mm_inventory["mm"] == 20
+
+
+class TestFillRouting:
+    """Test fills are credited to market maker ledgers."""
+    
+    def test_background_flow_credits_mm(self):
+        """Test the MM ledger matches its fills from background flow."""
+        sim = MarketSimulator(SimulationConfig(seed=21, fill_log="list"))
+        sim.register_market_maker("mm", initial_cash=0.0)
+        bid = sim.submit_mm_order("mm", OrderSide.BUY, 99.99, 200)
+        ask = sim.submit_mm_order("mm", OrderSide.SELL, 100.01, 200)
+        for _ in range(50):
+            sim.step(0.1)
+        
+        mm_fills = [f for f in sim.lob.fills if f.passive_order_id in (bid, ask)]
+        assert mm_fills
+        inventory = sum(f.size if f.passive_order_id == bid else -f.size for f in mm_fills)
+        cash = sum(-f.price * f.size if f.passive_order_id == bid else f.price * f.size
+                   for f in mm_fills)
+        assert sim.mm_inventory["mm"] == inventory
+        assert sim.mm_cash["mm"] == pytest.approx(cash)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,47 @@
+"""
+Unit tests for the columnar order batch.
+"""
+
+import pytest
+import numpy as np
+from src.simulation.order_book import LimitOrderBook
+from src.simulation.order_batch import OrderBatch
+from src.simulation.order_flow import OrderFlowGenerator
+
+
+class TestOrderBatch:
+    """Test the struct-of-arrays order interchange format."""
+    
+    def _batch(self):
+        generator = OrderFlowGenerator(seed=4)
+        return generator.generate_batch(20.0)[0]
+    
+    def test_slice_shift_concat(self):
+        """Test slicing, time shifting and concatenation round-trip."""
+        batch = self._batch()
+        half = len(batch) // 2
+        
+        joined = OrderBatch.concat([batch[:half], batch[half:], OrderBatch.empty()])
+        np.testing.assert_array_equal(joined.order_id, batch.order_id)
+        assert len(batch[batch.order_type == 1]) == int((batch.order_type == 1).sum())
+        assert batch[-1].order_id.tolist() == batch.order_id[-1:].tolist()
+        
+        shifted = batch.shift(5.0)
+        np.testing.assert_allclose(shifted.timestamp, batch.timestamp + 5.0)
+        assert shifted.size is batch.size
+    
+    def test_book_accepts_batches(self):
+        """Test submitting an OrderBatch matches submitting its Orders."""
+        batch = self._batch()
+        lob_batch = LimitOrderBook(tick_size=0.01)
+        lob_orders = LimitOrderBook(tick_size=0.01)
+        
+        result = lob_batch.submit_batch(batch.shift(1.0))
+        expected = lob_orders.submit_batch(batch.to_orders(0.01), time_offset=1.0)
+        
+        np.testing.assert_array_equal(result.fills, expected.fills)
+        assert lob_batch.get_state_snapshot() == lob_orders.get_state_snapshot()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -4,9 +4,11 @@ Unit tests for Limit Order Book implementation.
 
 import pytest
 import numpy as np
+from dataclasses import fields
 from src.simulation.order_book import (
-    LimitOrderBook, Order, OrderType, OrderSide, PriceLevel
+    LimitOrderBook, Order, OrderIdAllocator, OrderType, OrderSide, PriceLevel, ticks_to_price
 )
+from src.simulation.array_order_book import ArrayLimitOrderBook
 
 
 class TestPriceLevel:
@@ -39,6 +41,21 @@ class TestPriceLevel:
         assert removed.order_id == 1
         assert level.total_size == 50
         assert len(level.orders) == 1
+        assert level.remove_order(1) is None
+        assert level.orders.get(2) is order2 and level.orders.head is order2
+    
+    def test_unlink_preserves_fifo(self):
+        level = PriceLevel(price=100.0)
+        orders = [Order(i, OrderSide.BUY, OrderType.LIMIT, 100.0, 10, float(i)) for i in range(4)]
+        for order in orders:
+            level.add_order(order)
+        
+        level.unlink_order(orders[1])
+        level.unlink_order(orders[3])
+        
+        assert [o.order_id for o in level.orders] == [0, 2]
+        assert level.orders.tail is orders[2]
+        assert level.total_size == 20
     
     def test_queue_position(self):
         level = PriceLevel(price=100.0)
@@ -53,6 +70,27 @@ class TestPriceLevel:
         assert level.get_queue_position(99) is None
 
 
+class TestOrder:
+    """Test Order construction paths."""
+    
+    def test_validation_on_public_constructor(self):
+        with pytest.raises(ValueError):
+            Order(1, OrderSide.BUY, OrderType.LIMIT, 100.0, 0, 0.0)
+    
+    def test_trusted_constructor_is_slotted(self):
+        order = Order.trusted(1, OrderSide.SELL, OrderType.LIMIT, 100.0, 5, 0.0, price_ticks=10000)
+        
+        assert not hasattr(order, '__dict__')
+        assert order == Order(1, OrderSide.SELL, OrderType.LIMIT, 100.0, 5, 0.0, price_ticks=10000)
+    
+    def test_trusted_constructor_sets_every_field(self):
+        order = Order.trusted(1, OrderSide.SELL, OrderType.LIMIT, 100.0, 5, 0.0)
+        
+        for f in fields(Order):
+            getattr(order, f.name)  # An unassigned slot raises AttributeError
+        assert order._seq == 0 and order._prev is None
+
+
 class TestLimitOrderBook:
     """Test LimitOrderBook functionality."""
     
@@ -68,6 +106,14 @@ class TestLimitOrderBook:
         assert len(lob.asks) == 0
         assert lob.get_midprice() is None
     
+    def test_ticks_to_price_lands_on_grid(self, lob):
+        """Test prices rebuilt from ticks carry no float residue."""
+        assert 10007 * 0.01 != 100.07
+        assert ticks_to_price(10007, 0.01) == 100.07
+        assert lob.to_price(10007) == 100.07
+        np.testing.assert_array_equal(ticks_to_price(np.array([10007, 10029]), 0.01),
+                                      [100.07, 100.29])
+    
     def test_submit_limit_order_bid(self, lob):
         """Test submitting a bid limit order."""
         order = Order(
@@ -158,6 +204,65 @@ class TestLimitOrderBook:
         assert fills[0].size == 50
         assert fills[0].price == 100.0
     
+    def test_crossing_limit_order_respects_limit(self, lob):
+        """Test a crossing limit order only trades up to its limit and rests the rest."""
+        lob.submit_order(Order(1, OrderSide.SELL, OrderType.LIMIT, 100.00, 30, 0.0))
+        lob.submit_order(Order(2, OrderSide.SELL, OrderType.LIMIT, 100.01, 30, 0.0))
+        lob.submit_order(Order(3, OrderSide.SELL, OrderType.LIMIT, 100.05, 30, 0.0))
+        
+        bid_order = Order(4, OrderSide.BUY, OrderType.LIMIT, 100.01, 100, 1.0)
+        fills = lob.submit_order(bid_order)
+        
+        assert [(f.price, f.size) for f in fills] == [(100.00, 30), (100.01, 30)]
+        assert bid_order.size == 40
+        assert lob.get_best_bid() == 100.01
+        assert lob.get_best_ask() == 100.05
+    
+    def test_submit_batch_columnar(self, lob):
+        """Test columnar batch submission and per-order fill ranges."""
+        lob.submit_order(Order(1, OrderSide.SELL, OrderType.LIMIT, 100.00, 50, 0.0))
+        lob.submit_order(Order(2, OrderSide.SELL, OrderType.LIMIT, 100.02, 50, 0.0))
+        
+        batch = {
+            'order_id': np.array([10, 11, 12, 2]),
+            'is_buy': np.array([True, True, False, False]),
+            'order_type': np.array([1, 0, 0, 2]),  # market, limit, limit, cancel
+            'price_ticks': np.array([0, 10001, 10003, 0]),
+            'size': np.array([60, 30, 20, 1]),
+            'timestamp': np.array([0.1, 0.2, 0.3, 0.4]),
+        }
+        result = lob.submit_batch(batch, time_offset=1.0)
+        
+        assert result.fills['size'].tolist() == [50, 10]
+        assert result.fills_for(0)['passive_order_id'].tolist() == [1, 2]
+        assert len(result.fills_for(1)) == 0
+        assert lob.get_best_bid() == 100.01
+        assert lob.orders[11].timestamp == pytest.approx(1.2)
+        assert lob.get_best_ask() == 100.03
+        assert 2 not in lob.orders
+        assert [f.size for f in lob.fills] == [50, 10]
+    
+    def test_submit_batch_matches_submit_order(self):
+        """Test batching Order objects gives the same book as one-by-one submission."""
+        def make_orders():
+            rng = np.random.default_rng(3)
+            orders = []
+            for i in range(200):
+                side = OrderSide.BUY if rng.random() < 0.5 else OrderSide.SELL
+                kind = [OrderType.LIMIT, OrderType.MARKET, OrderType.CANCEL][int(rng.integers(0, 3))]
+                price = 100.0 + (int(rng.integers(-5, 6)) * 0.01)
+                oid = int(rng.integers(0, i + 1)) if kind == OrderType.CANCEL else i
+                orders.append(Order(oid, side, kind, price, int(rng.integers(1, 100)), i * 0.01))
+            return orders
+        
+        one_by_one = LimitOrderBook()
+        fills = [f for order in make_orders() for f in one_by_one.submit_order(order)]
+        batched = LimitOrderBook()
+        result = batched.submit_batch(make_orders())
+        
+        assert result.to_fills() == fills
+        assert batched.get_book_depth(20) == one_by_one.get_book_depth(20)
+    
     def test_cancel_order(self, lob):
         """Test order cancellation."""
         order = Order(1, OrderSide.BUY, OrderType.LIMIT, 100.0, 100, 0.0)
@@ -210,6 +315,77 @@ class TestLimitOrderBook:
         assert pos1 == (1, 300)
         assert pos2 == (2, 300)
     
+    def test_incremental_queue_tracking(self, lob):
+        """Test tracked positions follow fills and cancels ahead."""
+        updates = []
+        lob.track_queue("mm", callback=lambda qp: updates.append((qp.position, qp.shares_ahead)))
+        
+        for i in range(3):
+            lob.submit_order(Order(i, OrderSide.SELL, OrderType.LIMIT, 100.0, 100, 0.0))
+        lob.submit_order(Order(3, OrderSide.SELL, OrderType.LIMIT, 100.0, 40, 0.0, trader_id="mm"))
+        lob.submit_order(Order(4, OrderSide.SELL, OrderType.LIMIT, 100.0, 100, 0.0))
+        
+        assert lob.get_queue_position(3) == (3, 440)
+        assert lob.get_shares_ahead(3) == 300
+        
+        lob.cancel_order(1)
+        lob.cancel_order(4)  # Behind the tracked order, no update
+        assert lob.get_queue_position(3) == (2, 240)
+        
+        lob.submit_order(Order(10, OrderSide.BUY, OrderType.MARKET, 0, 150, 1.0))
+        assert lob.get_queue_position(3) == (1, 90)
+        assert lob.get_shares_ahead(3) == 50
+        assert updates == [(2, 200), (1, 100), (1, 50)]
+    
+    def test_modify_size_decrease_keeps_priority(self, lob):
+        """Test shrinking an order keeps its place and moves tracked orders up."""
+        lob.track_queue("mm")
+        lob.submit_order(Order(1, OrderSide.BUY, OrderType.LIMIT, 100.0, 100, 0.0))
+        lob.submit_order(Order(2, OrderSide.BUY, OrderType.LIMIT, 100.0, 100, 0.0))
+        lob.submit_order(Order(3, OrderSide.BUY, OrderType.LIMIT, 100.0, 50, 0.0, trader_id="mm"))
+        
+        assert lob.modify_order(1, new_size=30) == []
+        assert lob.get_queue_position(1) == (0, 180)
+        assert lob.get_shares_ahead(3) == 130
+        assert lob.bids[10000].total_size == 180
+        assert lob.cancellations == []
+        
+        # A size increase requeues behind everyone
+        lob.modify_order(2, new_size=150)
+        assert lob.get_queue_position(2) == (2, 230)
+        assert lob.get_shares_ahead(3) == 30
+        
+        with pytest.raises(ValueError):
+            lob.modify_order(1, new_size=0)
+    
+    def test_modify_price_requeues(self, lob):
+        """Test repricing moves the order to the back of its new level and can trade."""
+        lob.submit_order(Order(1, OrderSide.BUY, OrderType.LIMIT, 99.0, 100, 0.0))
+        lob.submit_order(Order(2, OrderSide.BUY, OrderType.LIMIT, 100.0, 100, 0.0))
+        lob.submit_order(Order(3, OrderSide.SELL, OrderType.LIMIT, 101.0, 60, 0.0))
+        
+        assert lob.modify_order(1, new_price=100.0) == []
+        assert 9900 not in lob.bids
+        assert lob.get_queue_position(1) == (1, 200)
+        
+        fills = lob.modify_order(2, new_price=101.0)
+        assert [(f.passive_order_id, f.size) for f in fills] == [(3, 60)]
+        assert lob.orders[2].size == 40
+        assert lob.get_best_bid() == 101.0
+        
+        assert lob.modify_order(99, new_size=10) is None
+    
+    def test_midprice_excluding_own_orders(self, lob):
+        """Test the midprice ignores the given orders."""
+        lob.submit_order(Order(1, OrderSide.BUY, OrderType.LIMIT, 99.0, 100, 0.0))
+        lob.submit_order(Order(2, OrderSide.SELL, OrderType.LIMIT, 101.0, 100, 0.0))
+        lob.submit_order(Order(3, OrderSide.BUY, OrderType.LIMIT, 99.5, 50, 0.0))
+        lob.submit_order(Order(4, OrderSide.SELL, OrderType.LIMIT, 101.0, 50, 0.0))
+        
+        assert lob.get_midprice() == 100.25
+        assert lob.get_midprice_excluding([3, 4, None]) == 100.0
+        assert lob.get_midprice_excluding([1, 3]) is None
+    
     def test_price_rounding(self, lob):
         """Test prices are rounded to tick size."""
         order = Order(1, OrderSide.BUY, OrderType.LIMIT, 100.005, 100, 0.0)
@@ -217,6 +393,16 @@ class TestLimitOrderBook:
         
         assert lob.get_best_bid() == 100.0  # Rounded to nearest tick
     
+    def test_tick_domain_merges_float_drift(self, lob):
+        """Test prices differing only by float noise share one level."""
+        lob.submit_order(Order(1, OrderSide.BUY, OrderType.LIMIT, 100.01, 100, 0.0))
+        lob.submit_order(Order(2, OrderSide.BUY, OrderType.LIMIT, 100.00999999, 50, 0.0))
+        
+        assert len(lob.bids) == 1
+        assert lob.bids[10001].total_size == 150
+        assert lob.orders[2].price_ticks == 10001
+        assert lob.get_best_bid() == 100.01
+    
     def test_multiple_price_levels(self, lob):
         """Test handling of multiple price levels."""
         # Add bids at different prices
@@ -229,6 +415,22 @@ class TestLimitOrderBook:
         assert len(depth['bids']) == 5
         assert depth['bids'][0][0] == 100.0  # Best bid
         assert depth['bids'][4][0] == 99.96  # Worst bid in depth
+    
+    def test_price_index_tracks_level_removal(self, lob):
+        """Test best prices and depth stay sorted as levels come and go."""
+        for i, price in enumerate([101.02, 101.00, 101.05, 101.01]):
+            lob.submit_order(Order(i, OrderSide.SELL, OrderType.LIMIT, price, 10, 0.0))
+        
+        assert lob.get_best_ask() == 101.00
+        assert [p for p, _ in lob.get_book_depth(3)['asks']] == [101.00, 101.01, 101.02]
+        
+        lob.cancel_order(1)
+        assert lob.get_best_ask() == 101.01
+        
+        # Sweep two levels with a market order
+        lob.submit_order(Order(10, OrderSide.BUY, OrderType.MARKET, 0, 20, 1.0))
+        assert lob.get_best_ask() == 101.05
+        assert lob.get_book_depth(5)['asks'] == [(101.05, 10)]
 
 
 class TestOrderBookStatistics:
@@ -264,6 +466,32 @@ class TestOrderBookStatistics:
         assert 'depth' in snapshot
         assert 'total_volume' in snapshot
     
+    def test_depth_cache_invalidation(self, lob_with_orders):
+        """Test cached depth is rebuilt only when the touched side's top levels change."""
+        lob = lob_with_orders
+        assert lob.get_book_depth(2)['bids'] == [(99.02, 100), (99.01, 100)]
+        asks_cache = lob._depth_cache[False]
+        
+        # Deeper than the cached top-2 bids: cache stays valid
+        lob.submit_order(Order(20, OrderSide.BUY, OrderType.LIMIT, 98.50, 100, 0.0))
+        assert lob._depth_cache[True] is not None
+        
+        # At the touch: bid side rebuilt, ask side untouched
+        lob.submit_order(Order(21, OrderSide.BUY, OrderType.LIMIT, 99.02, 25, 0.0))
+        assert lob._depth_cache[True] is None
+        assert lob._depth_cache[False] is asks_cache
+        assert lob.get_book_depth(2)['bids'] == [(99.02, 125), (99.01, 100)]
+        assert lob.get_order_book_imbalance(2) == pytest.approx(25 / 425)
+    
+    def test_snapshot_cache(self, lob_with_orders):
+        """Test repeated snapshots are served from cache until the book changes."""
+        first = lob_with_orders.get_state_snapshot()
+        second = lob_with_orders.get_state_snapshot()
+        assert first == second and first is not second
+        
+        lob_with_orders.cancel_order(10)
+        assert lob_with_orders.get_state_snapshot()['best_ask'] == 101.01
+    
     def test_volume_tracking(self, lob_with_orders):
         """Test volume is tracked correctly."""
         initial_volume = lob_with_orders.total_volume
@@ -274,6 +502,136 @@ class TestOrderBookStatistics:
         
         assert lob_with_orders.total_volume == initial_volume + 50
         assert lob_with_orders.total_trades == 1
+    
+    def test_ring_fill_log_is_bounded(self):
+        """Test a ring fill log keeps only the most recent fills."""
+        lob = LimitOrderBook(tick_size=0.01, fill_log="ring", fill_log_capacity=3)
+        lob.submit_order(Order(1, OrderSide.SELL, OrderType.LIMIT, 100.0, 100, 0.0))
+        for i in range(5):
+            lob.submit_order(Order(10 + i, OrderSide.BUY, OrderType.MARKET, 0, 10, 1.0))
+        
+        assert lob.fills.total == 5
+        assert [f.aggressive_order_id for f in lob.iter_fills()] == [12, 13, 14]
+    
+    def test_columnar_fill_log_spills(self, tmp_path):
+        """Test a columnar fill log spills chunks to disk and streams them back."""
+        lob = LimitOrderBook(tick_size=0.01, fill_log="columnar",
+                             fill_log_capacity=2, fill_log_dir=str(tmp_path))
+        lob.submit_order(Order(1, OrderSide.SELL, OrderType.LIMIT, 100.0, 100, 0.0))
+        for i in range(5):
+            lob.submit_order(Order(10 + i, OrderSide.BUY, OrderType.MARKET, 0, 10 + i, 1.0))
+        lob.cancel_order(1)
+        
+        assert len(list(tmp_path.iterdir())) == 2
+        assert len(lob.fills) == 5
+        assert [f.size for f in lob.iter_fills()] == [10, 11, 12, 13, 14]
+        assert sum(chunk['size'].sum() for chunk in lob.fills.iter_chunks()) == 60
+        assert list(lob.cancellations) == [(1, 1.0)]
+    
+    @pytest.mark.parametrize("mode", ["list", "none", "ring", "columnar"])
+    def test_fill_logs_read_like_lists(self, mode, tmp_path):
+        """Test every log's len, indexing and slicing match the events it holds."""
+        lob = LimitOrderBook(tick_size=0.01, fill_log=mode, fill_log_capacity=3,
+                             fill_log_dir=str(tmp_path) if mode == "columnar" else None)
+        lob.submit_order(Order(1, OrderSide.SELL, OrderType.LIMIT, 100.0, 100, 0.0))
+        for i in range(7):
+            lob.submit_order(Order(10 + i, OrderSide.BUY, OrderType.MARKET, 0, 5, 1.0))
+        
+        held = list(lob.fills)
+        assert len(lob.fills) == len(held)
+        assert {"list": 7, "none": 0, "ring": 3, "columnar": 7}[mode] == len(held)
+        assert lob.fills[-2:] == held[-2:]
+        assert lob.fills[::-2] == held[::-2]
+        if held:
+            assert lob.fills[0] == held[0] and lob.fills[-1] == held[-1]
+        else:
+            with pytest.raises(IndexError):
+                lob.fills[0]
+
+
+class TestFork:
+    """Test copy-on-write forks of the book."""
+    
+    def _book(self, book_cls=LimitOrderBook):
+        lob = book_cls(tick_size=0.01)
+        lob.submit_order(Order(1, OrderSide.BUY, OrderType.LIMIT, 99.99, 100, 0.0))
+        lob.submit_order(Order(2, OrderSide.BUY, OrderType.LIMIT, 99.99, 50, 0.0))
+        lob.submit_order(Order(3, OrderSide.SELL, OrderType.LIMIT, 100.01, 80, 0.0))
+        return lob
+    
+    @pytest.mark.parametrize("book_cls", [LimitOrderBook, ArrayLimitOrderBook])
+    def test_branches_are_independent(self, book_cls):
+        """Test mutations on a fork leave the parent untouched and vice versa."""
+        lob = self._book(book_cls)
+        before = lob.get_book_depth()
+        fork = lob.fork()
+        assert fork.orders[1] is lob.orders[1]  # Levels shared until written
+        
+        fills = fork.submit_order(Order(4, OrderSide.SELL, OrderType.MARKET, 0, 120, 1.0))
+        assert [f.size for f in fills] == [100, 20]
+        fork.cancel_order(3)
+        
+        assert lob.get_book_depth() == before
+        assert lob.orders[2].size == 50
+        assert fork.get_book_depth() == {'bids': [(99.99, 30)], 'asks': []}
+        
+        lob.submit_order(Order(5, OrderSide.BUY, OrderType.LIMIT, 99.99, 10, 2.0))
+        assert lob.get_book_depth()['bids'] == [(99.99, 160)]
+        assert fork.get_book_depth()['bids'] == [(99.99, 30)]
+        assert 5 not in fork.orders and 1 not in fork.orders
+    
+    @pytest.mark.parametrize("book_cls", [LimitOrderBook, ArrayLimitOrderBook])
+    def test_fork_keeps_queue_priority(self, book_cls):
+        """Test copied levels preserve FIFO order and queue standing."""
+        lob = self._book(book_cls)
+        lob.track_queue("unknown")
+        fork = lob.fork()
+        
+        fork.cancel_order(1)
+        assert fork.get_queue_position(2) == (0, 50)
+        assert lob.get_queue_position(2) == (1, 150)
+        assert lob.get_shares_ahead(2) == 100
+
+
+class TestOrderIds:
+    """Test the order id allocator."""
+    
+    def test_allocator_owners(self):
+        """Test ids are unique and map back to their owners."""
+        allocator = OrderIdAllocator(capacity=2)
+        first = allocator.allocate("mm")
+        block = allocator.allocate_block(np.full(5, allocator.owner_code("trader_3")))
+        
+        assert first == 1 and block.tolist() == [2, 3, 4, 5, 6]
+        assert allocator.owner_of(1) == "mm"
+        assert allocator.owner_of(6) == "trader_3"
+        assert allocator.owner_of(7) is None
+        assert allocator.owner_codes_of(np.array([1, 2])).tolist() == [
+            allocator.owner_code("mm"), allocator.owner_code("trader_3")]
+
+
+class TestFillRouting:
+    """Test fills are routed to their owners' ledgers."""
+    
+    def test_routes_by_owner_and_side(self):
+        """Test each owner gets its passive and aggressive fills separately."""
+        lob = LimitOrderBook(tick_size=0.01)
+        received = []
+        lob.subscribe_fills("mm", lambda records, as_passive: received.append(
+            (records['size'].tolist(), as_passive)))
+        
+        lob.submit_order(Order(lob.get_next_order_id("mm"), OrderSide.SELL, OrderType.LIMIT, 100.0, 30, 0.0, "mm"))
+        lob.submit_order(Order(lob.get_next_order_id("bg"), OrderSide.SELL, OrderType.LIMIT, 100.0, 30, 0.0, "bg"))
+        lob.submit_batch([Order(lob.get_next_order_id("bg"), OrderSide.BUY, OrderType.MARKET, 0, 50, 1.0, "bg")])
+        assert received == [([30], True)]
+        
+        lob.submit_order(Order(lob.get_next_order_id("mm"), OrderSide.BUY, OrderType.MARKET, 0, 10, 2.0, "mm"))
+        assert received[-1] == ([10], False)
+        
+        lob.unsubscribe_fills("mm")
+        lob.submit_order(Order(lob.get_next_order_id("bg"), OrderSide.SELL, OrderType.LIMIT, 100.0, 5, 3.0, "bg"))
+        lob.submit_order(Order(lob.get_next_order_id("mm"), OrderSide.BUY, OrderType.MARKET, 0, 5, 3.0, "mm"))
+        assert len(received) == 2
 
 
 if __name__ == "__main__":
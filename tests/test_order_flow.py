@@ -0,0 +1,102 @@
+"""
+Unit tests for background order flow generation.
+"""
+
+import pytest
+import numpy as np
+from src.simulation.order_book import LIMIT_CODE, MARKET_CODE
+from src.simulation.order_batch import OrderBatch
+from src.simulation.order_flow import OrderFlowGenerator, OrderFlowConfig, ActiveOrderSet
+
+
+class TestArrivalStream:
+    """Test the persistent continuous-time order flow."""
+    
+    def test_poisson_rates(self):
+        """Test arrival counts per type match the configured rates."""
+        config = OrderFlowConfig(limit_order_rate=10.0, market_order_rate=2.0,
+                                 cancellation_rate=0.0)
+        generator = OrderFlowGenerator(config, seed=1)
+        batch, volatilities = generator.generate_batch(1000.0)
+        
+        limits = int((batch.order_type == LIMIT_CODE).sum())
+        markets = int((batch.order_type == MARKET_CODE).sum())
+        assert abs(limits - 10000) < 400
+        assert abs(markets - 2000) < 180
+        assert len(volatilities) == len(batch)
+    
+    def test_batch_is_reproducible(self):
+        """Test a fixed seed yields identical batches."""
+        batches = []
+        for _ in range(2):
+            generator = OrderFlowGenerator(seed=9)
+            batches.append([generator.generate_batch(t)[0] for t in (1.0, 2.0, 5.0)])
+        
+        for first, second in zip(*batches):
+            for name in ('order_id', 'is_buy', 'order_type', 'price_ticks', 'size',
+                         'timestamp', 'latency', 'trader'):
+                np.testing.assert_array_equal(getattr(first, name), getattr(second, name))
+    
+    def test_batch_windows_do_not_change_the_stream(self):
+        """Test pulling batches in small windows yields the same orders as one pull."""
+        whole = OrderFlowGenerator(seed=6).generate_batch(30.0)[0]
+        generator = OrderFlowGenerator(seed=6)
+        stepped = OrderBatch.concat([generator.generate_batch(k * 0.1)[0] for k in range(1, 301)])
+        
+        for name in ('order_id', 'order_type', 'timestamp', 'size', 'trader'):
+            np.testing.assert_array_equal(getattr(whole, name), getattr(stepped, name))
+    
+    def test_batch_orders_are_consistent(self):
+        """Test batch prices, sizes and cancellation targets are valid."""
+        generator = OrderFlowGenerator(seed=2)
+        batch, volatilities = generator.generate_batch(50.0, midprice=100.0, spread=0.02)
+        
+        assert len(volatilities) >= len(batch)
+        assert np.all(np.diff(batch.timestamp) >= 0)
+        limit = batch.order_type == 0
+        cancel = batch.order_type == 2
+        assert np.all(np.abs(batch.price_ticks[limit] - 10000) < 100)
+        assert np.all(batch.size[~cancel] >= 10) and np.all(batch.size[~cancel] <= 500)
+        
+        # Each cancellation targets a distinct limit order created before it
+        created = {}
+        for i in np.flatnonzero(limit):
+            created[batch.order_id[i]] = batch.timestamp[i]
+        targets = batch.order_id[cancel]
+        assert len(set(targets.tolist())) == len(targets)
+        for target, timestamp in zip(targets, batch.timestamp[cancel]):
+            assert created[target] <= timestamp
+        
+        orders = batch.to_orders(tick_size=0.01)
+        assert [o.order_id for o in orders] == batch.order_id.tolist()
+        for i in np.flatnonzero(limit):
+            assert orders[i].price == round(orders[i].price, 2)
+            assert orders[i].price == float(f"{batch.price_ticks[i] / 100:.2f}")
+
+
+class TestActiveOrderSet:
+    """Test O(1) cancellation candidate tracking."""
+    
+    def test_swap_remove(self):
+        """Test removal keeps the set dense and consistent."""
+        active = ActiveOrderSet([1, 2, 3, 4])
+        assert active.discard(2)
+        assert not active.discard(2)
+        assert sorted(active) == [1, 3, 4]
+        assert active.pop_random(0.0) == 1
+        assert active.pop_random(0.99) in (3, 4)
+        assert len(active) == 1 and 1 not in active
+    
+    def test_uniform_choice(self):
+        """Test random removal picks every id about equally often."""
+        rng = np.random.default_rng(0)
+        counts = np.zeros(5)
+        for _ in range(5000):
+            active = ActiveOrderSet(range(5))
+            active.discard(int(rng.integers(0, 5)))
+            counts[active.pop_random(rng.random())] += 1
+        assert np.all(np.abs(counts / 5000 - 0.2) < 0.03)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
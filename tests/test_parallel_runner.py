@@ -0,0 +1,38 @@
+"""
+Unit tests for parallel simulation runs.
+"""
+
+import pytest
+import numpy as np
+from src.simulation.market_simulator import MarketSimulator, SimulationConfig
+from src.simulation.parallel_runner import run_parallel_simulations, spawn_seeds
+
+
+class TestParallelRunner:
+    """Test seed-sharded parallel simulation runs."""
+    
+    def test_independent_of_worker_count(self):
+        """Test results depend only on the root seed, not on sharding."""
+        config = SimulationConfig(seed=11)
+        serial = run_parallel_simulations(5, 2.0, config, max_workers=1)
+        parallel = run_parallel_simulations(5, 2.0, config, max_workers=2, shards_per_worker=1)
+        
+        assert serial['seeds'] == parallel['seeds'] == spawn_seeds(5, 11)
+        assert len(set(serial['seeds'])) == 5
+        for name, column in serial['history'].items():
+            np.testing.assert_array_equal(column, parallel['history'][name])
+        assert serial['pooled'] == parallel['pooled']
+    
+    def test_runs_reproduce_single_simulations(self):
+        """Test each run matches a MarketSimulator seeded with its seed."""
+        results = run_parallel_simulations(3, 2.0, SimulationConfig(seed=2), max_workers=1)
+        
+        assert results['history']['midprice'].shape == (3, 20)
+        single = MarketSimulator(SimulationConfig(seed=results['seeds'][1])).run_simulation(2.0)
+        assert results['runs'][1]['avg_spread'] == single['avg_spread']
+        assert results['per_seed']['total_volume'][1] == single['total_volume']
+        assert results['pooled']['total_volume'] == results['per_seed']['total_volume'].sum()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
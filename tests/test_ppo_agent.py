@@ -0,0 +1,154 @@
+"""
+Unit tests for the PPO agent's VecEnv adapter.
+"""
+
+import pytest
+import numpy as np
+import gymnasium as gym
+
+pytest.importorskip("stable_baselines3")
+
+from stable_baselines3 import PPO
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv, VecEnv
+from src.agents.ppo_agent import CurriculumCallback, VectorEnvAdapter
+from src.environments.market_making_env import MarketMakingEnv, MarketMakingConfig
+from src.environments.vector_market_making_env import VectorMarketMakingEnv
+from src.simulation.market_simulator import SimulationConfig
+
+
+def _config(episode_duration=20.0, seed=None):
+    return MarketMakingConfig(
+        episode_duration=episode_duration,
+        time_step=1.0,
+        simulation_config=SimulationConfig(seed=seed)
+    )
+
+
+class TestVectorEnvAdapter:
+    """Test VectorEnvAdapter follows SB3 VecEnv semantics."""
+    
+    def test_step_reports_terminal_observation(self):
+        """Test finished envs report their final observation SB3-style."""
+        adapter = VectorEnvAdapter(VectorMarketMakingEnv(2, _config(episode_duration=3.0, seed=1)))
+        assert isinstance(adapter, VecEnv)
+        
+        obs = adapter.reset()
+        assert obs.shape == (2, 9)
+        assert len(adapter.reset_infos) == 2
+        
+        actions = np.tile([5.0, 5.0, 10.0, 10.0], (2, 1))
+        for _ in range(3):
+            obs, rewards, dones, infos = adapter.step(actions)
+        
+        assert dones.all() and rewards.dtype == np.float32
+        for info in infos:
+            assert info['terminal_observation'].shape == (9,)
+            assert info['TimeLimit.truncated']
+    
+    def test_seed_reaches_envs(self):
+        """Test VecEnv.seed reseeds each env on the next reset."""
+        adapter = VectorEnvAdapter(VectorMarketMakingEnv(2, _config(seed=0)))
+        singles = [MarketMakingEnv(_config(seed=seed)) for seed in (7, 8)]
+        
+        assert adapter.seed(7) == [7, 8]
+        adapter.reset()
+        for env in singles:
+            env.reset()
+        assert adapter._next_seeds is None  # Seeds apply to one reset only
+        
+        rng = np.random.default_rng(0)
+        for _ in range(3):
+            actions = rng.uniform([0, 0, 10, 10], [10, 10, 500, 500], (2, 4))
+            obs, _, _, _ = adapter.step(actions)
+            for i, env in enumerate(singles):
+                np.testing.assert_allclose(obs[i], env.step(actions[i])[0])
+    
+    def test_options_apply_to_next_reset(self):
+        """Test set_options passes one options dict to the next reset only."""
+        venv = VectorMarketMakingEnv(2, _config(seed=0))
+        adapter = VectorEnvAdapter(venv)
+        received = []
+        reset = venv.reset
+        venv.reset = lambda seed=None, options=None: received.append(options) or reset(seed=seed)
+        
+        adapter.set_options([{'mode': 1}, {'mode': 1}])
+        adapter.reset()
+        adapter.reset()
+        assert received == [{'mode': 1}, None]
+        
+        with pytest.raises(ValueError):
+            adapter.set_options([{'mode': 1}, {'mode': 2}])
+    
+    def test_attributes_are_per_env(self):
+        """Test per-env attributes are read and written at the given indices only."""
+        venv = VectorMarketMakingEnv(3, _config(seed=2))
+        adapter = VectorEnvAdapter(venv)
+        adapter.reset()
+        
+        assert adapter.get_attr('num_envs') == [3, 3, 3]
+        assert adapter.get_attr('simulators', indices=[2]) == [venv.simulators[2]]
+        
+        adapter.set_attr('current_step', 5, indices=[1])
+        assert venv.current_step.tolist() == [0, 5, 0]
+        assert adapter.get_attr('current_step', indices=1) == [5]
+        
+        with pytest.raises(NotImplementedError):
+            adapter.set_attr('mm_id', "other", indices=[0])
+    
+    def test_env_method_calls_venv_once(self):
+        """Test env_method calls the venv method once and rejects env subsets."""
+        venv = VectorMarketMakingEnv(3, _config(seed=3))
+        adapter = VectorEnvAdapter(venv)
+        calls = []
+        venv.set_market_params = lambda **params: calls.append(params)
+        
+        assert adapter.env_method('set_market_params', base_volatility=0.02) == [None] * 3
+        assert calls == [{'base_volatility': 0.02}]
+        
+        with pytest.raises(NotImplementedError):
+            adapter.env_method('set_market_params', base_volatility=0.03, indices=[0])
+        assert len(calls) == 1
+
+
+
+class TestCurriculumCallback:
+    """Test curriculum updates reach the envs."""
+    
+    def test_updates_subprocess_envs(self):
+        """Test SubprocVecEnv workers receive the volatility schedule."""
+        venv = SubprocVecEnv([lambda: MarketMakingEnv(_config(seed=1))] * 2)
+        try:
+            model = PPO("MlpPolicy", venv, n_steps=8, batch_size=8, n_epochs=1, seed=0)
+            callback = CurriculumCallback(initial_vol=0.01, target_vol=0.05, vol_increase_steps=8)
+            model.learn(16, callback=callback)
+            
+            _, _, _, infos = venv.step(np.tile([2.0, 2.0, 100.0, 100.0], (2, 1)))
+            assert all(info['volatility'] >= 0.05 for info in infos)
+        finally:
+            venv.close()
+    
+    def test_updates_vector_env_once_per_change(self):
+        """Test a VectorEnvAdapter's venv is updated once per new volatility."""
+        venv = VectorMarketMakingEnv(2, _config(seed=1))
+        calls = []
+        venv.set_market_params = lambda **params: calls.append(params['base_volatility'])
+        model = PPO("MlpPolicy", VectorEnvAdapter(venv), n_steps=8, batch_size=8, n_epochs=1, seed=0)
+        callback = CurriculumCallback(initial_vol=0.01, target_vol=0.05, vol_increase_steps=8)
+        model.learn(32, callback=callback)
+        
+        assert calls[-1] == pytest.approx(0.05)
+        assert len(calls) == len(set(calls)) == 4  # Ramp reached at 8 steps, 2 per step
+    
+    def test_skips_envs_without_market_params(self):
+        """Test envs without set_market_params leave the callback a no-op."""
+        venv = DummyVecEnv([lambda: Monitor(gym.make("CartPole-v1"))])
+        model = PPO("MlpPolicy", venv, n_steps=8, batch_size=8, n_epochs=1, seed=0)
+        callback = CurriculumCallback(initial_vol=0.01, target_vol=0.05, vol_increase_steps=8)
+        model.learn(16, callback=callback)
+        
+        assert callback._supported is False
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])